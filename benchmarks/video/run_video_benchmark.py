@@ -37,7 +37,8 @@ from tqdm import tqdm
 
 from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
 from lerobot.common.datasets.video_utils import (
-    decode_video_frames_torchvision,
+    VIDEO_BACKENDS,
+    decode_video_frames,
     encode_video_frames,
 )
 from lerobot.common.utils.benchmark import TimeBenchmark
@@ -147,18 +148,6 @@ def sample_timestamps(timestamps_mode: str, ep_num_images: int, fps: int) -> lis
     return [idx / fps for idx in frame_indexes]
 
 
-def decode_video_frames(
-    video_path: str,
-    timestamps: list[float],
-    tolerance_s: float,
-    backend: str,
-) -> torch.Tensor:
-    if backend in ["pyav", "video_reader"]:
-        return decode_video_frames_torchvision(video_path, timestamps, tolerance_s, backend)
-    else:
-        raise NotImplementedError(backend)
-
-
 def benchmark_decoding(
     imgs_dir: Path,
     video_path: Path,
@@ -465,8 +454,9 @@ if __name__ == "__main__":
         "--backends",
         type=str,
         nargs="*",
-        default=["pyav", "video_reader"],
-        help="Torchvision decoding backend to be tested.",
+        default=list(VIDEO_BACKENDS),
+        choices=list(VIDEO_BACKENDS),
+        help="Decoding backends to be tested, among the ones registered in `VIDEO_BACKENDS` (all by default).",
     )
     parser.add_argument(
         "--num-samples",
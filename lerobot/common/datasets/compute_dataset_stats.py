@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Computes the per-episode stats of a local dataset (`meta/episodes_stats.jsonl`) and its global stats.
+
+Episodes are sharded across a pool of processes, each of which reads the parquet file of its episode and
+decodes only the frames sampled for the image stats (for videos, with a seek to the key frame preceding each
+group of sampled frames rather than a full decode). The stats of each episode are appended to
+`episodes_stats.jsonl` as soon as they are computed, so that an interrupted run resumes where it stopped.
+Finally, the global stats are obtained with a tree reduction over the stats of all the episodes.
+
+Usage:
+
+```bash
+python lerobot/common/datasets/compute_dataset_stats.py \
+    --repo-id=lerobot/pusht \
+    --num-workers=8
+```
+"""
+
+import argparse
+import io
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import PIL.Image
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from lerobot.common.datasets.compute_stats import (
+    auto_downsample_height_width,
+    compute_episode_stats,
+    sample_indices,
+    tree_aggregate_stats,
+)
+from lerobot.common.datasets.lerobot_dataset import LeRobotDatasetMetadata
+from lerobot.common.datasets.utils import (
+    EPISODES_STATS_PATH,
+    arrow_column_to_numpy,
+    cast_stats_to_numpy,
+    get_hf_features_from_features,
+    serialize_dict,
+    write_episode_stats,
+    write_jsonlines,
+)
+from lerobot.common.datasets.video_utils import decode_video_frames
+
+
+def compute_episode_stats_from_files(
+    root: Path,
+    features: dict,
+    data_path: str,
+    video_paths: dict[str, str],
+    frames_indices: dict[str, dict],
+    tolerance_s: float = 1e-4,
+    video_backend: str = "pyav_native",
+) -> dict:
+    """Computes the stats of an episode from its files only, so that it can run in a worker process.
+
+    Numerical features are read from the parquet file of the episode. For image and video features, only the
+    frames sampled by `sample_indices` are decoded, like when the stats are computed in `save_episode`.
+    """
+    table = pq.read_table(root / data_path)
+    hf_features = get_hf_features_from_features(features)
+    sampled = sample_indices(len(table))
+
+    episode_data = {}
+    for key, ft in features.items():
+        if ft["dtype"] == "string":
+            continue
+        elif ft["dtype"] == "image":
+            images = table[key].take(sampled).to_pylist()
+            images = [np.asarray(PIL.Image.open(io.BytesIO(img["bytes"])).convert("RGB")) for img in images]
+            episode_data[key] = np.stack(
+                [auto_downsample_height_width(img.transpose(2, 0, 1)) for img in images]
+            )
+        elif ft["dtype"] == "video":
+            timestamps = table["timestamp"].take(sampled).to_pylist()
+            frames = decode_video_frames(
+                root / video_paths[key],
+                timestamps,
+                tolerance_s,
+                video_backend,
+                return_uint8=True,
+                frames_index=frames_indices.get(key),
+            )
+            episode_data[key] = np.stack([auto_downsample_height_width(frame) for frame in frames.numpy()])
+        else:
+            episode_data[key] = arrow_column_to_numpy(table[key], hf_features[key])
+
+    return compute_episode_stats(episode_data, features)
+
+
+def load_computed_episodes_stats(stats_path: Path) -> dict:
+    """Loads the episodes stats already written in `stats_path`, ignoring a last line truncated by a crash."""
+    episodes_stats = {}
+    if not stats_path.is_file():
+        return episodes_stats
+
+    with open(stats_path) as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Ignoring a truncated line at the end of '{stats_path}'.")
+                break
+            episodes_stats[item["episode_index"]] = cast_stats_to_numpy(item["stats"])
+
+    return episodes_stats
+
+
+def write_episodes_stats(episodes_stats: dict, stats_path: Path) -> None:
+    """Rewrites `stats_path` with the stats of all the episodes, sorted by episode index. The file is written
+    next to it first, then renamed, so that it is never left half written."""
+    tmp_path = stats_path.with_suffix(".tmp")
+    write_jsonlines(
+        [
+            {"episode_index": ep_idx, "stats": serialize_dict(episodes_stats[ep_idx])}
+            for ep_idx in sorted(episodes_stats)
+        ],
+        tmp_path,
+    )
+    tmp_path.replace(stats_path)
+
+
+def compute_dataset_stats(
+    meta: LeRobotDatasetMetadata,
+    num_workers: int = 4,
+    resume: bool = True,
+    tolerance_s: float = 1e-4,
+    video_backend: str = "pyav_native",
+) -> dict[str, dict[str, np.ndarray]]:
+    """Computes the stats of all the episodes of a local dataset, writes them to `episodes_stats.jsonl` and
+    returns the global stats. `meta.episodes_stats` and `meta.stats` are updated accordingly.
+
+    With `resume`, the episodes whose stats are already in `episodes_stats.jsonl` are skipped, otherwise the
+    file is overwritten. Episodes are dispatched to `num_workers` processes (or computed in the main process
+    if it is 0), and their stats are appended to the file in the order they are completed.
+    """
+    stats_path = meta.root / EPISODES_STATS_PATH
+    episodes_stats = load_computed_episodes_stats(stats_path) if resume else {}
+    episodes_stats = {ep_idx: s for ep_idx, s in episodes_stats.items() if ep_idx < meta.total_episodes}
+    # Start again from a clean file, without the line truncated by a previous crash if any
+    write_episodes_stats(episodes_stats, stats_path)
+
+    def get_episode_args(ep_idx: int) -> tuple:
+        video_paths = {key: str(meta.get_video_file_path(ep_idx, key)) for key in meta.video_keys}
+        frames_indices = meta.video_index.get(ep_idx, {})
+        data_path = str(meta.get_data_file_path(ep_idx))
+        return meta.root, meta.features, data_path, video_paths, frames_indices, tolerance_s, video_backend
+
+    ep_indices = [ep_idx for ep_idx in range(meta.total_episodes) if ep_idx not in episodes_stats]
+    if len(episodes_stats) > 0:
+        logging.info(f"Resuming: {len(episodes_stats)} episodes done, {len(ep_indices)} left.")
+
+    if num_workers > 0:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(compute_episode_stats_from_files, *get_episode_args(ep_idx)): ep_idx
+                for ep_idx in ep_indices
+            }
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                ep_idx = futures[future]
+                episodes_stats[ep_idx] = future.result()
+                write_episode_stats(ep_idx, episodes_stats[ep_idx], meta.root)
+    else:
+        for ep_idx in tqdm(ep_indices):
+            episodes_stats[ep_idx] = compute_episode_stats_from_files(*get_episode_args(ep_idx))
+            write_episode_stats(ep_idx, episodes_stats[ep_idx], meta.root)
+
+    write_episodes_stats(episodes_stats, stats_path)
+    meta.episodes_stats = {ep_idx: episodes_stats[ep_idx] for ep_idx in sorted(episodes_stats)}
+    meta.stats = tree_aggregate_stats(list(meta.episodes_stats.values()))
+    return meta.stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repo-id",
+        type=str,
+        required=True,
+        help="Repository identifier on Hugging Face: a community or a user name `/` the name of the dataset "
+        "(e.g. `lerobot/pusht`).",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=None,
+        help="Root directory of the local dataset. By default, the dataset is looked for in the cache.",
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=4,
+        help="Number of processes computing the stats of the episodes. Set to 0 to use the main process.",
+    )
+    parser.add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_false",
+        help="Recompute the stats of all the episodes instead of resuming from `episodes_stats.jsonl`.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    meta = LeRobotDatasetMetadata(args.repo_id, root=args.root)
+    compute_dataset_stats(meta, num_workers=args.num_workers, resume=args.resume)
+
+
+if __name__ == "__main__":
+    main()
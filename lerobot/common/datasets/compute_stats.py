@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import numpy as np
+import PIL.Image
 
 from lerobot.common.datasets.utils import load_image_as_numpy
 
@@ -82,13 +83,86 @@ def get_feature_stats(array: np.ndarray, axis: tuple, keepdims: bool) -> dict[st
     }
 
 
+class RunningStats:
+    """Min, max, mean and std of a feature, updated batch by batch instead of being computed over a whole
+    array, and equal to the ones of `get_feature_stats` over the concatenation of the batches. Means and
+    variances of the batches are merged with the parallel algorithm of Chan et al.
+    """
+
+    def __init__(self, axis: int | tuple = 0, keepdims: bool = False):
+        self.axis = axis
+        self.keepdims = keepdims
+        self.num_samples = 0
+        self.num_values = 0
+        self.min = self.max = self.mean = self.m2 = None
+
+    def update(self, batch: np.ndarray) -> None:
+        """Adds a batch of samples, stacked along the first axis."""
+        batch_min = np.min(batch, axis=self.axis, keepdims=self.keepdims)
+        batch_max = np.max(batch, axis=self.axis, keepdims=self.keepdims)
+        batch_mean = np.mean(batch, axis=self.axis, keepdims=True, dtype=np.float64)
+        batch_m2 = np.sum(np.square(batch - batch_mean), axis=self.axis, keepdims=self.keepdims)
+        if not self.keepdims:
+            batch_mean = np.squeeze(batch_mean, axis=self.axis)
+        num_values = batch.size // batch_m2.size
+
+        if self.num_values == 0:
+            self.min, self.max, self.mean, self.m2 = batch_min, batch_max, batch_mean, batch_m2
+        else:
+            total = self.num_values + num_values
+            delta = batch_mean - self.mean
+            self.mean = self.mean + delta * num_values / total
+            self.m2 = self.m2 + batch_m2 + np.square(delta) * self.num_values * num_values / total
+            self.min = np.minimum(self.min, batch_min)
+            self.max = np.maximum(self.max, batch_max)
+
+        self.num_values += num_values
+        self.num_samples += len(batch)
+
+    def get_stats(self) -> dict[str, np.ndarray]:
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "std": np.sqrt(self.m2 / self.num_values),
+            "count": np.array([self.num_samples]),
+        }
+
+
+class ImageStats(RunningStats):
+    """`RunningStats` of the frames of a camera, updated frame by frame while recording instead of being
+    computed from images sampled on disk with `sample_images`. Frames can be channel first or last, uint8 or
+    float in [0,1], and are downsampled then converted to uint8 like the images of `sample_images`. Stats are
+    returned in the format of `compute_episode_stats`, i.e. normalized in [0,1] and per channel.
+    """
+
+    def __init__(self):
+        super().__init__(axis=(0, 2, 3), keepdims=True)
+
+    def add_image(self, image: np.ndarray | PIL.Image.Image) -> None:
+        image = np.asarray(image)
+        if image.shape[0] != 3:
+            # (H, W, C) -> (C, H, W)
+            image = image.transpose(2, 0, 1)
+        # The downsampled view is made contiguous, the reductions are much slower on strided arrays
+        image = np.ascontiguousarray(auto_downsample_height_width(image))
+        if image.dtype != np.uint8:
+            image = (image * 255).astype(np.uint8)
+        self.update(image[None])
+
+    def get_stats(self) -> dict[str, np.ndarray]:
+        stats = super().get_stats()
+        return {k: v if k == "count" else np.squeeze(v / 255.0, axis=0) for k, v in stats.items()}
+
+
 def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], features: dict) -> dict:
     ep_stats = {}
     for key, data in episode_data.items():
         if features[key]["dtype"] == "string":
             continue  # HACK: we should receive np.arrays of strings
         elif features[key]["dtype"] in ["image", "video"]:
-            ep_ft_array = sample_images(data)  # data is a list of image paths
+            # data is a list of image paths, or the already sampled uint8 images
+            ep_ft_array = sample_images(data) if isinstance(data, list) else data
             axes_to_reduce = (0, 2, 3)  # keep channel dim
             keepdims = True
         else:
@@ -174,3 +248,19 @@ def aggregate_stats(stats_list: list[dict[str, dict]]) -> dict[str, dict[str, np
         aggregated_stats[key] = aggregate_feature_stats(stats_with_key)
 
     return aggregated_stats
+
+
+def tree_aggregate_stats(
+    stats_list: list[dict[str, dict]], fan_in: int = 64
+) -> dict[str, dict[str, np.ndarray]]:
+    """Same as `aggregate_stats`, but the stats are aggregated by groups of `fan_in`, then the results of these
+    groups by groups of `fan_in`, and so on until one remains. This bounds the number of stats stacked at once
+    for datasets with many episodes, while keeping the partial sums of the weighted means balanced.
+    """
+    if fan_in < 2:
+        raise ValueError(f"'fan_in' must be at least 2 ({fan_in=}).")
+
+    while len(stats_list) > fan_in:
+        stats_list = [aggregate_stats(stats_list[i : i + fan_in]) for i in range(0, len(stats_list), fan_in)]
+
+    return aggregate_stats(stats_list)
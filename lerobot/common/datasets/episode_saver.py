@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+
+class AsyncEpisodeSaver:
+    """
+    This class saves the episodes of a dataset in a background thread, so that recording the next episode (or
+    resetting the environment) can start while the previous one is still being written and encoded.
+
+    Episodes are saved one at a time, in the order they were submitted, so that the metadata of the dataset
+    is always written in order. Each episode is saved in two steps:
+        - `prepare_fn`, which does the heavy work (writing the data, encoding the videos, computing the stats),
+        - `commit_fn`, which takes its result and writes the metadata of the episode.
+
+    Until their commit, submitted episodes are counted as pending, so that the index of the next episode and
+    of its first frame can be known without waiting (see `get_next_indices`). If an episode fails to save,
+    the episodes submitted after it are not saved either, since their indices would not be valid anymore.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="episode_saver")
+        self._lock = threading.Lock()
+        # episode_index -> episode_length of the episodes submitted but not committed yet
+        self._pending = OrderedDict()
+        self._futures = []
+        self._error = None
+
+    @property
+    def num_pending_episodes(self) -> int:
+        return len(self._pending)
+
+    def get_next_indices(self, total_episodes: int, total_frames: int) -> tuple[int, int]:
+        """Given the number of episodes and frames already committed, returns the index of the next episode
+        and of its first frame, accounting for the pending episodes."""
+        with self._lock:
+            return total_episodes + len(self._pending), total_frames + sum(self._pending.values())
+
+    def submit(
+        self,
+        episode_index: int,
+        episode_length: int,
+        prepare_fn: Callable[[], Any],
+        commit_fn: Callable[[Any], None],
+    ) -> Future:
+        if self._error is not None:
+            raise RuntimeError(
+                f"Can't save episode {episode_index}, a previous episode failed to save."
+            ) from self._error
+
+        with self._lock:
+            self._pending[episode_index] = episode_length
+        future = self._executor.submit(self._save, episode_index, prepare_fn, commit_fn)
+        self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def _save(self, episode_index: int, prepare_fn: Callable[[], Any], commit_fn: Callable[[Any], None]):
+        if self._error is not None:
+            raise RuntimeError(
+                f"Episode {episode_index} was not saved, a previous episode failed to save."
+            ) from self._error
+        try:
+            result = prepare_fn()
+            with self._lock:
+                commit_fn(result)
+                del self._pending[episode_index]
+        except Exception as e:
+            self._error = e
+            raise
+
+    def wait_until_done(self) -> None:
+        """Waits for all the submitted episodes to be saved, and raises the first error encountered."""
+        futures, self._futures = self._futures, []
+        wait(futures)
+        if self._error is not None:
+            raise self._error
+
+    def stop(self) -> None:
+        self._executor.shutdown(wait=True)
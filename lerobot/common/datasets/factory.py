@@ -23,6 +23,7 @@ from lerobot.common.datasets.lerobot_dataset import (
     LeRobotDatasetMetadata,
     MultiLeRobotDataset,
 )
+from lerobot.common.datasets.streaming_dataset import StreamingLeRobotDataset, make_file_fetcher
 from lerobot.common.datasets.transforms import ImageTransforms
 from lerobot.configs.policies import PreTrainedConfig
 from lerobot.configs.train import TrainPipelineConfig
@@ -76,13 +77,36 @@ def make_dataset(cfg: TrainPipelineConfig) -> LeRobotDataset | MultiLeRobotDatas
         NotImplementedError: The MultiLeRobotDataset is currently deactivated.
 
     Returns:
-        LeRobotDataset | MultiLeRobotDataset
+        LeRobotDataset | MultiLeRobotDataset | StreamingLeRobotDataset
     """
     image_transforms = (
         ImageTransforms(cfg.dataset.image_transforms) if cfg.dataset.image_transforms.enable else None
     )
 
-    if isinstance(cfg.dataset.repo_id, str):
+    if isinstance(cfg.dataset.repo_id, str) and cfg.dataset.streaming:
+        fetcher = make_file_fetcher(cfg.dataset.stream_source, cfg.dataset.repo_id, cfg.dataset.revision)
+        # Only fetches the metadata
+        ds_meta = StreamingLeRobotDataset(
+            cfg.dataset.repo_id, root=cfg.dataset.root, revision=cfg.dataset.revision, fetcher=fetcher
+        ).meta
+        delta_timestamps = resolve_delta_timestamps(cfg.policy, ds_meta)
+        dataset = StreamingLeRobotDataset(
+            cfg.dataset.repo_id,
+            root=cfg.dataset.root,
+            episodes=cfg.dataset.episodes,
+            delta_timestamps=delta_timestamps,
+            image_transforms=image_transforms,
+            revision=cfg.dataset.revision,
+            video_backend=cfg.dataset.video_backend,
+            fetcher=fetcher,
+            cache_size_mb=cfg.dataset.stream_cache_size_mb,
+            shuffle=True,
+            shuffle_buffer_size=cfg.dataset.shuffle_buffer_size,
+            seed=cfg.seed if cfg.seed is not None else 0,
+            uint8_images=cfg.dataset.uint8_images,
+            drop_n_last_frames=getattr(cfg.policy, "drop_n_last_frames", 0),
+        )
+    elif isinstance(cfg.dataset.repo_id, str):
         ds_meta = LeRobotDatasetMetadata(
             cfg.dataset.repo_id, root=cfg.dataset.root, revision=cfg.dataset.revision
         )
@@ -95,6 +119,9 @@ def make_dataset(cfg: TrainPipelineConfig) -> LeRobotDataset | MultiLeRobotDatas
             image_transforms=image_transforms,
             revision=cfg.dataset.revision,
             video_backend=cfg.dataset.video_backend,
+            use_columnar_cache=cfg.dataset.use_columnar_cache,
+            frame_cache=cfg.dataset.frame_cache if cfg.dataset.frame_cache.enable else None,
+            uint8_images=cfg.dataset.uint8_images,
         )
     else:
         raise NotImplementedError("The MultiLeRobotDataset isn't supported for now.")
@@ -16,8 +16,13 @@
 import multiprocessing
 import queue
 import threading
+import time
+from collections import Counter
+from multiprocessing import resource_tracker, shared_memory
 from pathlib import Path
+from typing import Callable, NamedTuple
 
+import cv2
 import numpy as np
 import PIL.Image
 import torch
@@ -33,6 +38,10 @@ def safe_stop_image_writer(func):
             if image_writer is not None:
                 print("Waiting for image writer to terminate...")
                 image_writer.stop()
+            episode_saver = getattr(dataset, "episode_saver", None) if dataset else None
+            if episode_saver is not None:
+                print("Waiting for the episodes being saved...")
+                episode_saver.stop()
             raise e
 
     return wrapper
@@ -68,7 +77,21 @@ def image_array_to_pil_image(image_array: np.ndarray, range_check: bool = True)
     return PIL.Image.fromarray(image_array)
 
 
-def write_image(image: np.ndarray | PIL.Image.Image, fpath: Path):
+# Formats of the images written while recording, with their file extension. Apart from "png", which is
+# compressed by PIL with its default (slow) settings, they trade disk space for encoding speed:
+# - "png_fast" and "png_uncompressed": png compressed by OpenCV with a level of 1 and 0,
+# - "webp": lossless webp, with the fastest settings,
+# - "npy": raw (H, W, C) uint8 arrays, which don't require any encoding.
+IMAGE_FORMATS = {
+    "png": ".png",
+    "png_fast": ".png",
+    "png_uncompressed": ".png",
+    "webp": ".webp",
+    "npy": ".npy",
+}
+
+
+def write_image(image: np.ndarray | PIL.Image.Image, fpath: Path, image_format: str = "png"):
     try:
         if isinstance(image, np.ndarray):
             img = image_array_to_pil_image(image)
@@ -76,26 +99,137 @@ def write_image(image: np.ndarray | PIL.Image.Image, fpath: Path):
             img = image
         else:
             raise TypeError(f"Unsupported image type: {type(image)}")
-        img.save(fpath)
+
+        if image_format == "png":
+            img.save(fpath)
+        elif image_format == "webp":
+            img.save(fpath, format="WEBP", lossless=True, quality=0, method=0)
+        elif image_format == "npy":
+            with open(fpath, "wb") as f:
+                np.save(f, np.asarray(img.convert("RGB")))
+        elif image_format in ["png_fast", "png_uncompressed"]:
+            compression = 1 if image_format == "png_fast" else 0
+            img_array = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+            if not cv2.imwrite(str(fpath), img_array, [cv2.IMWRITE_PNG_COMPRESSION, compression]):
+                raise OSError(f"OpenCV failed to write {fpath}")
+        else:
+            raise ValueError(f"Unsupported image format '{image_format}', choose from {list(IMAGE_FORMATS)}.")
     except Exception as e:
         print(f"Error writing image {fpath}: {e}")
 
 
-def worker_thread_loop(queue: queue.Queue):
+class SharedImageRef(NamedTuple):
+    """Handle of an image held in a slot of a `SharedImageRing`, sent to the writer processes instead of the
+    image itself."""
+
+    name: str
+    slot: int
+    num_slots: int
+    shape: tuple[int, ...]
+    dtype: str
+
+
+class SharedImageRing:
+    """
+    Ring of preallocated shared memory slots holding images of a given shape and dtype, used to hand images
+    over to the writer processes without pickling them through a pipe.
+
+    The shared memory starts with one flag per slot, set by the main process when it copies an image into the
+    slot and cleared by the writer process once the image is written. Since only the main process acquires
+    slots and only the writer holding a slot releases it, no lock is needed.
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: np.dtype, num_slots: int):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.num_slots = num_slots
+        slot_nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=_get_slots_offset(num_slots) + num_slots * slot_nbytes
+        )
+        self.in_use = np.ndarray((num_slots,), dtype=np.uint8, buffer=self.shm.buf)
+        self.in_use[:] = 0
+        self.slots = _get_slots_array(self.shm, num_slots, self.shape, self.dtype)
+        self._next_slot = 0
+
+    @property
+    def num_slots_in_use(self) -> int:
+        return int(self.in_use.sum())
+
+    def put(self, image: np.ndarray) -> SharedImageRef | None:
+        """Copies the image in the next free slot, or returns None if all the slots are in use."""
+        for i in range(self.num_slots):
+            slot = (self._next_slot + i) % self.num_slots
+            if not self.in_use[slot]:
+                self.slots[slot] = image
+                self.in_use[slot] = 1
+                self._next_slot = (slot + 1) % self.num_slots
+                return SharedImageRef(self.shm.name, slot, self.num_slots, self.shape, self.dtype.str)
+        return None
+
+    def close(self) -> None:
+        del self.in_use, self.slots
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _get_slots_offset(num_slots: int) -> int:
+    # The images start after the flags, aligned on 64 bytes
+    return -(-num_slots // 64) * 64
+
+
+def _get_slots_array(
+    shm: shared_memory.SharedMemory, num_slots: int, shape: tuple[int, ...], dtype: np.dtype
+) -> np.ndarray:
+    return np.ndarray((num_slots, *shape), dtype=dtype, buffer=shm.buf, offset=_get_slots_offset(num_slots))
+
+
+# Shared memories attached by the writer processes, by name
+_attached_shms = {}
+
+
+def write_shared_image(ref: SharedImageRef, fpath: Path, image_format: str = "png"):
+    """Writes an image from its slot of a `SharedImageRing`, then releases the slot."""
+    if ref.name not in _attached_shms:
+        _attached_shms[ref.name] = shared_memory.SharedMemory(name=ref.name)
+        # The shared memory is owned by the main process. Without this, the resource tracker of the writer
+        # process would unlink it when the process exits.
+        resource_tracker.unregister(_attached_shms[ref.name]._name, "shared_memory")
+    shm = _attached_shms[ref.name]
+    try:
+        image = _get_slots_array(shm, ref.num_slots, ref.shape, np.dtype(ref.dtype))[ref.slot]
+        write_image(image, fpath, image_format)
+    finally:
+        shm.buf[ref.slot] = 0
+
+
+def worker_thread_loop(
+    queue: queue.Queue, image_format: str = "png", on_written: Callable[[Path], None] | None = None
+):
     while True:
         item = queue.get()
         if item is None:
             queue.task_done()
             break
-        image_array, fpath = item
-        write_image(image_array, fpath)
-        queue.task_done()
+        image, fpath = item
+        try:
+            if isinstance(image, SharedImageRef):
+                write_shared_image(image, fpath, image_format)
+            else:
+                write_image(image, fpath, image_format)
+        finally:
+            if on_written is not None:
+                on_written(fpath)
+            queue.task_done()
 
 
-def worker_process(queue: queue.Queue, num_threads: int):
+def worker_process(
+    queue: queue.Queue, num_threads: int, image_format: str = "png", written_queue: queue.Queue | None = None
+):
+    on_written = written_queue.put if written_queue is not None else None
     threads = []
     for _ in range(num_threads):
-        t = threading.Thread(target=worker_thread_loop, args=(queue,))
+        t = threading.Thread(target=worker_thread_loop, args=(queue, image_format, on_written))
         t.daemon = True
         t.start()
         threads.append(t)
@@ -116,15 +250,49 @@ class AsyncImageWriter:
     The optimal number of processes and threads depends on your computer capabilities.
     We advise to use 4 threads per camera with 0 processes. If the fps is not stable, try to increase or lower
     the number of threads. If it is still not stable, try to use 1 subprocess, or more.
+
+    With processes, images are pickled through the queue by default. When `num_shared_memory_slots>0`, numpy
+    images are instead copied in a `SharedImageRing` of that many slots (one ring per image shape, i.e. per
+    camera in practice) and only their slot is sent to the processes. When all the slots of a ring are in use,
+    `save_image` waits for one to be released, or drops the image if `drop_when_full=True`. See `metrics` for
+    the occupancy of the slots and the number of dropped images. The images dropped are also counted by
+    directory (see `pop_num_dropped_images`), since an episode missing some of its images can't be saved.
+
+    Images are written in `image_format`, one of `IMAGE_FORMATS`. The faster formats allow to keep up with
+    the recording on less powerful computers, at the cost of more disk space.
+
+    The images not written yet are counted by directory, so that `wait_until_done` can wait for the images of
+    an episode only, while those of the next episode are being saved.
     """
 
-    def __init__(self, num_processes: int = 0, num_threads: int = 1):
+    def __init__(
+        self,
+        num_processes: int = 0,
+        num_threads: int = 1,
+        num_shared_memory_slots: int = 0,
+        drop_when_full: bool = False,
+        image_format: str = "png",
+    ):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format '{image_format}', choose from {list(IMAGE_FORMATS)}.")
         self.num_processes = num_processes
         self.num_threads = num_threads
+        self.num_shared_memory_slots = num_shared_memory_slots if num_processes > 0 else 0
+        self.drop_when_full = drop_when_full
+        self.image_format = image_format
         self.queue = None
         self.threads = []
         self.processes = []
+        self.rings = {}
+        self.max_slots_in_use = 0
+        self.num_dropped_images = 0
+        self.blocked_s = 0.0
         self._stopped = False
+        self._pending = Counter()
+        self._pending_cond = threading.Condition()
+        self._dropped = Counter()
+        self._written_queue = None
+        self._written_thread = None
 
         if num_threads <= 0 and num_processes <= 0:
             raise ValueError("Number of threads and processes must be greater than zero.")
@@ -133,15 +301,24 @@ class AsyncImageWriter:
             # Use threading
             self.queue = queue.Queue()
             for _ in range(self.num_threads):
-                t = threading.Thread(target=worker_thread_loop, args=(self.queue,))
+                t = threading.Thread(
+                    target=worker_thread_loop, args=(self.queue, self.image_format, self._on_written)
+                )
                 t.daemon = True
                 t.start()
                 self.threads.append(t)
         else:
             # Use multiprocessing
             self.queue = multiprocessing.JoinableQueue()
+            # The processes send back the paths of the images written
+            self._written_queue = multiprocessing.Queue()
+            self._written_thread = threading.Thread(target=self._collect_written, daemon=True)
+            self._written_thread.start()
             for _ in range(self.num_processes):
-                p = multiprocessing.Process(target=worker_process, args=(self.queue, self.num_threads))
+                p = multiprocessing.Process(
+                    target=worker_process,
+                    args=(self.queue, self.num_threads, self.image_format, self._written_queue),
+                )
                 p.daemon = True
                 p.start()
                 self.processes.append(p)
@@ -150,10 +327,70 @@ class AsyncImageWriter:
         if isinstance(image, torch.Tensor):
             # Convert tensor to numpy array to minimize main process time
             image = image.cpu().numpy()
+        if self.num_shared_memory_slots > 0 and isinstance(image, np.ndarray):
+            image = self._put_in_shared_memory(image)
+            if image is None:
+                self._dropped[Path(fpath).parent] += 1
+                return
+        with self._pending_cond:
+            self._pending[Path(fpath).parent] += 1
         self.queue.put((image, fpath))
 
-    def wait_until_done(self):
-        self.queue.join()
+    def _on_written(self, fpath: Path) -> None:
+        directory = Path(fpath).parent
+        with self._pending_cond:
+            self._pending[directory] -= 1
+            if self._pending[directory] <= 0:
+                del self._pending[directory]
+            self._pending_cond.notify_all()
+
+    def _collect_written(self) -> None:
+        while (fpath := self._written_queue.get()) is not None:
+            self._on_written(fpath)
+
+    def _put_in_shared_memory(self, image: np.ndarray) -> SharedImageRef | None:
+        ring_key = (image.shape, image.dtype.str)
+        if ring_key not in self.rings:
+            self.rings[ring_key] = SharedImageRing(image.shape, image.dtype, self.num_shared_memory_slots)
+        ring = self.rings[ring_key]
+
+        ref = ring.put(image)
+        if ref is None:
+            if self.drop_when_full:
+                self.num_dropped_images += 1
+                return None
+            start = time.perf_counter()
+            while ref is None:
+                time.sleep(0.001)
+                ref = ring.put(image)
+            self.blocked_s += time.perf_counter() - start
+
+        self.max_slots_in_use = max(self.max_slots_in_use, ring.num_slots_in_use)
+        return ref
+
+    @property
+    def metrics(self) -> dict:
+        """Backpressure of the shared memory transport: slots currently in use (over all the rings) and at
+        most in a ring, images dropped because a ring was full, and time spent waiting for a free slot."""
+        return {
+            "num_slots": sum(ring.num_slots for ring in self.rings.values()),
+            "slots_in_use": sum(ring.num_slots_in_use for ring in self.rings.values()),
+            "max_slots_in_use": self.max_slots_in_use,
+            "num_dropped_images": self.num_dropped_images,
+            "blocked_s": self.blocked_s,
+        }
+
+    def pop_num_dropped_images(self, directory: Path) -> int:
+        """Returns the number of images dropped in `directory` (see `drop_when_full`) and resets it."""
+        return self._dropped.pop(Path(directory), 0)
+
+    def wait_until_done(self, directory: Path | None = None):
+        """Waits for all the images to be written, or only for the ones in `directory` if given."""
+        if directory is None:
+            self.queue.join()
+            return
+        with self._pending_cond:
+            self._pending_cond.wait_for(lambda: self._pending[Path(directory)] == 0)
 
     def stop(self):
         if self._stopped:
@@ -174,5 +411,11 @@ class AsyncImageWriter:
                     p.terminate()
             self.queue.close()
             self.queue.join_thread()
+            for ring in self.rings.values():
+                ring.close()
+            self._written_queue.put(None)
+            self._written_thread.join()
+            self._written_queue.close()
+            self._written_queue.join_thread()
 
         self._stopped = True
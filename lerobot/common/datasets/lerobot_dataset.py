@@ -13,9 +13,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import bisect
 import contextlib
+import copy
 import logging
 import shutil
+import threading
+from concurrent.futures import Future
+from functools import partial
 from pathlib import Path
 from typing import Callable
 
@@ -25,20 +30,25 @@ import packaging.version
 import PIL.Image
 import torch
 import torch.utils
-from datasets import concatenate_datasets, load_dataset
+from datasets import load_dataset
 from huggingface_hub import HfApi, snapshot_download
 from huggingface_hub.constants import REPOCARD_NAME
 from huggingface_hub.errors import RevisionNotFoundError
+from torchvision.transforms.v2 import functional as F  # noqa: N812
 
 from lerobot.common.constants import HF_LEROBOT_HOME
-from lerobot.common.datasets.compute_stats import aggregate_stats, compute_episode_stats
-from lerobot.common.datasets.image_writer import AsyncImageWriter, write_image
+from lerobot.common.datasets.compute_stats import ImageStats, aggregate_stats, compute_episode_stats
+from lerobot.common.datasets.episode_saver import AsyncEpisodeSaver
+from lerobot.common.datasets.image_writer import IMAGE_FORMATS, AsyncImageWriter, write_image
 from lerobot.common.datasets.utils import (
     DEFAULT_FEATURES,
     DEFAULT_IMAGE_PATH,
     INFO_PATH,
     TASKS_PATH,
+    VALIDATION_PATH,
     append_jsonlines,
+    arrow_column_to_numpy,
+    arrow_column_to_torch,
     backward_compatible_episodes_stats,
     check_delta_timestamps,
     check_timestamps_sync,
@@ -46,29 +56,46 @@ from lerobot.common.datasets.utils import (
     create_empty_dataset_info,
     create_lerobot_dataset_card,
     embed_images,
+    get_columnar_cache_dir,
     get_delta_indices,
     get_episode_data_index,
     get_features_from_robot,
+    get_frame_cache_dir,
     get_hf_features_from_features,
     get_safe_version,
     hf_transform_to_torch,
     is_valid_version,
+    is_validated,
+    load_columnar_cache,
     load_episodes,
     load_episodes_stats,
+    load_image_as_numpy,
     load_info,
     load_stats,
     load_tasks,
+    load_video_index,
+    take_hf_dataset_rows,
     validate_episode_buffer,
     validate_frame,
+    write_columnar_cache,
     write_episode,
     write_episode_stats,
     write_info,
     write_json,
+    write_validated,
+    write_video_index,
 )
 from lerobot.common.datasets.video_utils import (
+    StreamingVideoEncoder,
+    VideoDecoderCache,
     VideoFrame,
-    decode_video_frames_torchvision,
+    VideoFrameCache,
+    VideoFrameCacheConfig,
+    decode_video_frames_by_spans,
     encode_video_frames,
+    find_closest_frames,
+    get_frames_timestamps,
+    get_video_frames_index,
     get_video_info,
 )
 from lerobot.common.robot_devices.robots.utils import Robot
@@ -87,6 +114,8 @@ class LeRobotDatasetMetadata:
         self.repo_id = repo_id
         self.revision = revision if revision else CODEBASE_VERSION
         self.root = Path(root) if root is not None else HF_LEROBOT_HOME / repo_id
+        # Guards the metadata updated by the episode saver thread while the next episode is being recorded
+        self._lock = threading.Lock()
 
         try:
             if force_cache_sync:
@@ -111,6 +140,16 @@ class LeRobotDatasetMetadata:
         else:
             self.episodes_stats = load_episodes_stats(self.root)
             self.stats = aggregate_stats(list(self.episodes_stats.values()))
+        self.video_index = load_video_index(self.root)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
 
     def pull_from_repo(
         self,
@@ -233,10 +272,11 @@ class LeRobotDatasetMetadata:
         if task in self.task_to_task_index:
             raise ValueError(f"The task '{task}' already exists and can't be added twice.")
 
-        task_index = self.info["total_tasks"]
-        self.task_to_task_index[task] = task_index
-        self.tasks[task_index] = task
-        self.info["total_tasks"] += 1
+        with self._lock:
+            task_index = self.info["total_tasks"]
+            self.task_to_task_index[task] = task_index
+            self.tasks[task_index] = task
+            self.info["total_tasks"] += 1
 
         task_dict = {
             "task_index": task_index,
@@ -251,30 +291,37 @@ class LeRobotDatasetMetadata:
         episode_tasks: list[str],
         episode_stats: dict[str, dict],
     ) -> None:
-        self.info["total_episodes"] += 1
-        self.info["total_frames"] += episode_length
-
-        chunk = self.get_episode_chunk(episode_index)
-        if chunk >= self.total_chunks:
-            self.info["total_chunks"] += 1
-
-        self.info["splits"] = {"train": f"0:{self.info['total_episodes']}"}
-        self.info["total_videos"] += len(self.video_keys)
+        """Adds an episode to the metadata. It may run in the thread of the episode saver while tasks are added
+        by the recording thread: the metadata is updated under a lock, and the files are written from a copy of
+        it, so that they are never written half-updated."""
         if len(self.video_keys) > 0:
-            self.update_video_info()
-
-        write_info(self.info, self.root)
+            self.add_video_index(episode_index)
 
         episode_dict = {
             "episode_index": episode_index,
             "tasks": episode_tasks,
             "length": episode_length,
         }
-        self.episodes[episode_index] = episode_dict
-        write_episode(episode_dict, self.root)
+        with self._lock:
+            self.info["total_episodes"] += 1
+            self.info["total_frames"] += episode_length
+
+            chunk = self.get_episode_chunk(episode_index)
+            if chunk >= self.total_chunks:
+                self.info["total_chunks"] += 1
+
+            self.info["splits"] = {"train": f"0:{self.info['total_episodes']}"}
+            self.info["total_videos"] += len(self.video_keys)
+            if len(self.video_keys) > 0:
+                self.update_video_info()
+
+            self.episodes[episode_index] = episode_dict
+            self.episodes_stats[episode_index] = episode_stats
+            self.stats = aggregate_stats([self.stats, episode_stats]) if self.stats else episode_stats
+            info = copy.deepcopy(self.info)
 
-        self.episodes_stats[episode_index] = episode_stats
-        self.stats = aggregate_stats([self.stats, episode_stats]) if self.stats else episode_stats
+        write_info(info, self.root)
+        write_episode(episode_dict, self.root)
         write_episode_stats(episode_index, episode_stats, self.root)
 
     def update_video_info(self) -> None:
@@ -287,6 +334,27 @@ class LeRobotDatasetMetadata:
                 video_path = self.root / self.get_video_file_path(ep_index=0, vid_key=key)
                 self.info["features"][key]["info"] = get_video_info(video_path)
 
+    def add_video_index(self, episode_index: int) -> None:
+        """Indexes the frames and key frames of the videos of an episode which are not in `video_index` yet,
+        and appends them to 'meta/video_index.jsonl'. This index lets `decode_video_frames` check the
+        tolerance and plan its seeks without decoding.
+
+        The episodes are indexed when they are saved (see `save_episode`). The index of the episodes of a
+        dataset recorded before it existed is only built when this is called explicitly, as opening a dataset
+        never writes into its metadata."""
+        ep_video_index = self.video_index.setdefault(episode_index, {})
+        for key in self.video_keys:
+            if key in ep_video_index:
+                continue
+            video_path = self.root / self.get_video_file_path(episode_index, key)
+            frames_index = get_video_frames_index(video_path)
+            write_video_index(episode_index, key, frames_index, self.root)
+            ep_video_index[key] = {
+                "time_base": frames_index["time_base"],
+                "pts": np.array(frames_index["pts"], dtype=np.int64),
+                "keyframes": np.array(frames_index["keyframes"], dtype=np.int64),
+            }
+
     def __repr__(self):
         feature_keys = list(self.features)
         return (
@@ -340,8 +408,10 @@ class LeRobotDatasetMetadata:
 
             features = {**features, **DEFAULT_FEATURES}
 
+        obj._lock = threading.Lock()
         obj.tasks, obj.task_to_task_index = {}, {}
         obj.episodes_stats, obj.stats, obj.episodes = {}, {}, {}
+        obj.video_index = {}
         obj.info = create_empty_dataset_info(CODEBASE_VERSION, fps, robot_type, features, use_videos)
         if len(obj.video_keys) > 0 and not use_videos:
             raise ValueError()
@@ -363,6 +433,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
         force_cache_sync: bool = False,
         download_videos: bool = True,
         video_backend: str | None = None,
+        use_columnar_cache: bool = False,
+        frame_cache: VideoFrameCacheConfig | None = None,
+        uint8_images: bool = False,
     ):
         """
         2 modes are available for instantiating this class, depending on 2 different use cases:
@@ -462,22 +535,41 @@ class LeRobotDataset(torch.utils.data.Dataset):
             download_videos (bool, optional): Flag to download the videos. Note that when set to True but the
                 video files are already present on local disk, they won't be downloaded again. Defaults to
                 True.
-            video_backend (str | None, optional): Video backend to use for decoding videos. There is currently
-                a single option which is the pyav decoder used by Torchvision. Defaults to pyav.
+            video_backend (str | None, optional): Video backend to use for decoding videos, among the
+                registered `VIDEO_BACKENDS`: 'pyav' and 'video_reader' (torchvision decoders) or 'pyav_native'
+                (PyAV with accurate seeks and threaded decoding). Defaults to pyav.
+            use_columnar_cache (bool, optional): Flag to load all the numerical (non-visual) columns of the
+                selected episodes once as contiguous numpy arrays, memory-mapped from a sidecar cache written
+                in 'root/cache/columns'. Querying these columns then becomes simple array indexing instead of
+                a conversion of each row from the hf_dataset. Defaults to False.
+            frame_cache (VideoFrameCacheConfig | None, optional): Configuration of a cache of decoded video
+                frames, shared by the dataloader workers and backed by memory-mapped files in
+                'root/cache/frames'. Frames are then only decoded once. Defaults to None (no cache).
+            uint8_images (bool, optional): Flag to return camera frames (images and videos) as uint8 (c, h, w)
+                tensors instead of float32 in [0,1]. This divides by 4 the size of the batches moved to the GPU,
+                the conversion to float being left to the policy (see `Normalize`). Note that the
+                `image_transforms` then receive uint8 images. Defaults to False.
         """
         super().__init__()
         self.repo_id = repo_id
         self.root = Path(root) if root else HF_LEROBOT_HOME / repo_id
         self.image_transforms = image_transforms
+        self.uint8_images = uint8_images
         self.delta_timestamps = delta_timestamps
         self.episodes = episodes
         self.tolerance_s = tolerance_s
         self.revision = revision if revision else CODEBASE_VERSION
         self.video_backend = video_backend if video_backend else "pyav"
+        self.video_decoder_cache = VideoDecoderCache()
         self.delta_indices = None
+        self.disabled_features = set()
 
         # Unused attributes
         self.image_writer = None
+        self.image_format = "png"
+        self.image_stats = {}
+        self.video_encoders = None
+        self.episode_saver = None
         self.episode_buffer = None
 
         self.root.mkdir(exist_ok=True, parents=True)
@@ -502,12 +594,12 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.hf_dataset = self.load_hf_dataset()
 
         self.episode_data_index = get_episode_data_index(self.meta.episodes, self.episodes)
+        self.columnar_cache = self.load_columnar_cache() if use_columnar_cache else None
+        self.frame_cache = None
+        if frame_cache is not None and len(self.meta.video_keys) > 0:
+            self.frame_cache = self.create_frame_cache(frame_cache)
 
-        # Check timestamps
-        timestamps = torch.stack(self.hf_dataset["timestamp"]).numpy()
-        episode_indices = torch.stack(self.hf_dataset["episode_index"]).numpy()
-        ep_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
-        check_timestamps_sync(timestamps, episode_indices, ep_data_index_np, self.fps, self.tolerance_s)
+        self.check_timestamps()
 
         # Setup delta_indices
         if self.delta_timestamps is not None:
@@ -526,7 +618,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
         upload_large_folder: bool = False,
         **card_kwargs,
     ) -> None:
-        ignore_patterns = ["images/"]
+        self._wait_episode_saver()
+        ignore_patterns = ["images/", "cache/", VALIDATION_PATH]
         if not push_videos:
             ignore_patterns.append("videos/")
 
@@ -621,10 +714,60 @@ class LeRobotDataset(torch.utils.data.Dataset):
             files = [str(self.root / self.meta.get_data_file_path(ep_idx)) for ep_idx in self.episodes]
             hf_dataset = load_dataset("parquet", data_files=files, split="train")
 
+        disabled_columns = [key for key in self.disabled_features if key in hf_dataset.column_names]
+        if len(disabled_columns) > 0:
+            hf_dataset = hf_dataset.remove_columns(disabled_columns)
+
         # TODO(aliberts): hf_dataset.set_format("torch")
-        hf_dataset.set_transform(hf_transform_to_torch)
+        hf_dataset.set_transform(partial(hf_transform_to_torch, uint8_images=self.uint8_images))
         return hf_dataset
 
+    def load_columnar_cache(self) -> dict[str, np.ndarray]:
+        """Loads the numerical columns of the selected episodes as memory-mapped numpy arrays. They are first
+        written to a sidecar cache if it doesn't exist yet for this dataset version and episodes selection.
+        """
+        cache_key = {
+            "codebase_version": self.meta.info["codebase_version"],
+            "revision": self.revision,
+            "total_frames": self.meta.total_frames,
+            "episodes": self.episodes,
+        }
+        cache_dir = get_columnar_cache_dir(self.root, cache_key)
+        if not cache_dir.is_dir():
+            table = self.hf_dataset.with_format("arrow")[:]
+            columns = {
+                key: arrow_column_to_numpy(table[key], self.hf_features[key])
+                for key, ft in self.features.items()
+                if ft["dtype"] not in ["image", "video", "string"]
+            }
+            write_columnar_cache(columns, cache_dir)
+
+        return load_columnar_cache(cache_dir)
+
+    def create_frame_cache(self, config: VideoFrameCacheConfig) -> VideoFrameCache:
+        frame_shapes = {}
+        for key in self.meta.video_keys:
+            shape, names = self.meta.features[key]["shape"], self.meta.features[key]["names"]
+            c, h, w = (shape[2], shape[0], shape[1]) if names[2] in ["channel", "channels"] else shape
+            if config.resize is not None:
+                h, w = config.resize
+            frame_shapes[key] = (c, h, w)
+
+        episodes = self.episodes if self.episodes is not None else list(self.meta.episodes)
+        episode_lengths = {ep_idx: self.meta.episodes[ep_idx]["length"] for ep_idx in episodes}
+        # Decoded frames are only reused for the same videos, decoded the same way. The lengths of all the
+        # episodes (rather than the selected ones) identify the videos of a local dataset that was re-recorded.
+        cache_key = {
+            "codebase_version": self.meta.info["codebase_version"],
+            "revision": self.revision,
+            "video_backend": self.video_backend,
+            "resize": config.resize,
+            "frame_shapes": frame_shapes,
+            "episode_lengths": [ep["length"] for ep in self.meta.episodes.values()],
+        }
+        cache_dir = get_frame_cache_dir(self.root, cache_key)
+        return VideoFrameCache(config, cache_dir, frame_shapes, episode_lengths)
+
     def create_hf_dataset(self) -> datasets.Dataset:
         features = get_hf_features_from_features(self.features)
         ft_dict = {col: [] for col in features}
@@ -642,7 +785,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
     @property
     def num_frames(self) -> int:
         """Number of frames in selected episodes."""
-        return len(self.hf_dataset) if self.hf_dataset is not None else self.meta.total_frames
+        if self._hf_dataset is not None:
+            return len(self._hf_dataset)
+        if self.episodes is None:
+            return self.meta.total_frames
+        return sum(self.meta.episodes[ep_idx]["length"] for ep_idx in self.episodes)
 
     @property
     def num_episodes(self) -> int:
@@ -653,14 +800,52 @@ class LeRobotDataset(torch.utils.data.Dataset):
     def features(self) -> dict[str, dict]:
         return self.meta.features
 
+    @property
+    def hf_dataset(self) -> datasets.Dataset:
+        """When recording, episodes are only appended to their parquet files. The hf_dataset is then unset
+        and lazily reloaded from these files (memory-mapped) on the next access, so that saving an episode
+        doesn't depend on the size of the dataset and its data isn't kept in memory."""
+        if self._hf_dataset is None:
+            # The data files of the episodes being saved may not be complete yet
+            self._wait_episode_saver()
+            self._hf_dataset = self.load_hf_dataset()
+        return self._hf_dataset
+
+    @hf_dataset.setter
+    def hf_dataset(self, hf_dataset: datasets.Dataset | None) -> None:
+        self._hf_dataset = hf_dataset
+
     @property
     def hf_features(self) -> datasets.Features:
         """Features of the hf_dataset."""
-        if self.hf_dataset is not None:
-            return self.hf_dataset.features
+        if self._hf_dataset is not None:
+            return self._hf_dataset.features
         else:
             return get_hf_features_from_features(self.features)
 
+    @property
+    def video_keys(self) -> list[str]:
+        """Keys of the videos which are decoded, i.e. the ones of the metadata minus the disabled features."""
+        return [key for key in self.meta.video_keys if key not in self.disabled_features]
+
+    @property
+    def camera_keys(self) -> list[str]:
+        """Keys of the images and videos which are loaded, minus the disabled features."""
+        return [key for key in self.meta.camera_keys if key not in self.disabled_features]
+
+    def disable_features(self, keys: set[str]) -> None:
+        """Stops loading the given features: their columns are removed from the hf_dataset (and from the
+        columnar cache) and their videos are not decoded anymore. Items don't contain these keys then."""
+        self.disabled_features.update(keys)
+        columns = [key for key in keys if key in self.hf_dataset.column_names]
+        if len(columns) > 0:
+            self.hf_dataset = self.hf_dataset.remove_columns(columns)
+            self.hf_dataset.set_transform(partial(hf_transform_to_torch, uint8_images=self.uint8_images))
+        if self.columnar_cache is not None:
+            self.columnar_cache = {k: v for k, v in self.columnar_cache.items() if k not in keys}
+        if self.delta_indices is not None:
+            self.delta_indices = {k: v for k, v in self.delta_indices.items() if k not in keys}
+
     def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, list[int | bool]]]:
         ep_start = self.episode_data_index["from"][ep_idx]
         ep_end = self.episode_data_index["to"][ep_idx]
@@ -682,21 +867,40 @@ class LeRobotDataset(torch.utils.data.Dataset):
         query_indices: dict[str, list[int]] | None = None,
     ) -> dict[str, list[float]]:
         query_timestamps = {}
-        for key in self.meta.video_keys:
+        for key in self.video_keys:
             if query_indices is not None and key in query_indices:
-                timestamps = self.hf_dataset.select(query_indices[key])["timestamp"]
-                query_timestamps[key] = torch.stack(timestamps).tolist()
+                if self.columnar_cache is not None:
+                    query_timestamps[key] = self.columnar_cache["timestamp"][query_indices[key]].tolist()
+                else:
+                    timestamps = self.hf_dataset.select(query_indices[key])["timestamp"]
+                    query_timestamps[key] = torch.stack(timestamps).tolist()
             else:
                 query_timestamps[key] = [current_ts]
 
         return query_timestamps
 
     def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
-        return {
-            key: torch.stack(self.hf_dataset.select(q_idx)[key])
-            for key, q_idx in query_indices.items()
-            if key not in self.meta.video_keys
-        }
+        result = {}
+        for key, q_idx in query_indices.items():
+            if key in self.meta.video_keys:
+                continue
+            if self.columnar_cache is not None and key in self.columnar_cache:
+                result[key] = torch.from_numpy(self.columnar_cache[key][q_idx])
+            else:
+                result[key] = torch.stack(self.hf_dataset.select(q_idx)[key])
+        return result
+
+    def _get_cached_item(self, idx: int) -> dict:
+        """Equivalent of `hf_dataset[idx]` which reads the cached columns from the columnar cache."""
+        uncached = [key for key in self.hf_dataset.column_names if key not in self.columnar_cache]
+        table = take_hf_dataset_rows(self.hf_dataset, np.array([idx]), uncached)
+        item = {}
+        for key in self.hf_dataset.column_names:
+            if key in self.columnar_cache:
+                item[key] = torch.tensor(self.columnar_cache[key][idx])
+            else:
+                item[key] = arrow_column_to_torch(table[key], self.hf_features[key], self.uint8_images)[0]
+        return item
 
     def _query_videos(self, query_timestamps: dict[str, list[float]], ep_idx: int) -> dict[str, torch.Tensor]:
         """Note: When using data workers (e.g. DataLoader with num_workers>0), do not call this function
@@ -706,14 +910,122 @@ class LeRobotDataset(torch.utils.data.Dataset):
         """
         item = {}
         for vid_key, query_ts in query_timestamps.items():
-            video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
-            frames = decode_video_frames_torchvision(
-                video_path, query_ts, self.tolerance_s, self.video_backend
-            )
+            frames = self._decode_video_frames(vid_key, ep_idx, query_ts)
             item[vid_key] = frames.squeeze(0)
 
         return item
 
+    def check_timestamps(self) -> None:
+        """Checks that the timestamps of the selected episodes are in sync (see `check_timestamps_sync`) and
+        match their video frames. The columns are read from Arrow as numpy arrays, and once the check passed,
+        it is recorded in 'meta/validation.json' for this dataset version, episodes selection and tolerance,
+        so that it is skipped the next times the dataset is opened.
+        """
+        validation_key = {
+            "check": "timestamps",
+            "codebase_version": self.meta.info["codebase_version"],
+            "revision": self.revision,
+            "total_frames": self.meta.total_frames,
+            "total_episodes": self.meta.total_episodes,
+            "episodes": self.episodes,
+            "fps": self.fps,
+            "tolerance_s": self.tolerance_s,
+        }
+        if is_validated(self.root, validation_key):
+            return
+
+        if self.columnar_cache is not None:
+            timestamps = self.columnar_cache["timestamp"]
+            episode_indices = self.columnar_cache["episode_index"]
+        else:
+            table = self.hf_dataset.select_columns(["timestamp", "episode_index"]).with_format("arrow")[:]
+            timestamps = arrow_column_to_numpy(table["timestamp"], self.hf_features["timestamp"])
+            episode_indices = arrow_column_to_numpy(table["episode_index"], self.hf_features["episode_index"])
+
+        ep_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
+        check_timestamps_sync(timestamps, episode_indices, ep_data_index_np, self.fps, self.tolerance_s)
+        if len(self.meta.video_keys) > 0 and not self._check_video_timestamps(
+            timestamps, episode_indices, ep_data_index_np
+        ):
+            # Not recorded, so that the warnings are logged again the next times
+            return
+
+        write_validated(self.root, validation_key)
+
+    def _check_video_timestamps(
+        self, timestamps: np.ndarray, episode_indices: np.ndarray, episode_data_index: dict[str, np.ndarray]
+    ) -> bool:
+        """Checks that each frame timestamp has a video frame within tolerance, using the video index (see
+        `LeRobotDatasetMetadata.add_video_index`) instead of decoding. Videos which are not indexed aren't
+        checked. A video which fails the check only logs a warning, since only the items querying its frames
+        out of tolerance fail to load. Returns whether all the indexed videos passed the check."""
+        all_valid = True
+        for start, end in zip(episode_data_index["from"], episode_data_index["to"], strict=True):
+            ep_idx = int(episode_indices[start])
+            for vid_key, frames_index in self.meta.video_index.get(ep_idx, {}).items():
+                video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
+                try:
+                    find_closest_frames(
+                        timestamps[start:end],
+                        get_frames_timestamps(frames_index),
+                        self.tolerance_s,
+                        video_path,
+                    )
+                except AssertionError as e:
+                    logging.warning(f"Episode {ep_idx} of '{vid_key}' won't load entirely: {e}")
+                    all_valid = False
+        return all_valid
+
+    def _decode_video_frames(self, vid_key: str, ep_idx: int, timestamps: list[float]) -> torch.Tensor:
+        video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
+        frames_index = self.meta.video_index.get(ep_idx, {}).get(vid_key)
+        if self.frame_cache is None:
+            return decode_video_frames_by_spans(
+                video_path,
+                timestamps,
+                self.tolerance_s,
+                self.video_backend,
+                decoder_cache=self.video_decoder_cache,
+                return_uint8=self.uint8_images,
+                frames_index=frames_index,
+            )
+
+        # Frames are cached by their index in the episode, timestamps which don't match one are not cached
+        timestamps = np.asarray(timestamps)
+        frame_indices = np.round(timestamps * self.fps).astype(np.int64)
+        cacheable = (
+            (np.abs(frame_indices / self.fps - timestamps) < self.tolerance_s)
+            & (frame_indices >= 0)
+            & (frame_indices < self.meta.episodes[ep_idx]["length"])
+        )
+        frames = torch.empty((len(timestamps), *self.frame_cache.frame_shapes[vid_key]), dtype=torch.uint8)
+        cached_pos = np.flatnonzero(cacheable)
+        cached_frames, found = self.frame_cache.get(vid_key, ep_idx, frame_indices[cached_pos])
+        frames[cached_pos[found]] = cached_frames[found]
+
+        missing = ~cacheable
+        missing[cached_pos[~found]] = True
+        if missing.any():
+            missing_pos = np.flatnonzero(missing)
+            decoded = decode_video_frames_by_spans(
+                video_path,
+                timestamps[missing_pos].tolist(),
+                self.tolerance_s,
+                self.video_backend,
+                decoder_cache=self.video_decoder_cache,
+                return_uint8=True,
+                frames_index=frames_index,
+            )
+            if self.frame_cache.config.resize is not None:
+                decoded = F.resize(decoded, list(self.frame_cache.config.resize), antialias=True)
+            frames[missing_pos] = decoded
+
+            new_pos = missing_pos[cacheable[missing_pos]]
+            if len(new_pos) > 0:
+                self.frame_cache.put(vid_key, ep_idx, frame_indices[new_pos], frames[new_pos])
+
+        return frames if self.uint8_images else frames.type(torch.float32) / 255
+
     def _add_padding_keys(self, item: dict, padding: dict[str, list[bool]]) -> dict:
         for key, val in padding.items():
             item[key] = torch.BoolTensor(val)
@@ -723,7 +1035,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
         return self.num_frames
 
     def __getitem__(self, idx) -> dict:
-        item = self.hf_dataset[idx]
+        item = self._get_cached_item(idx) if self.columnar_cache is not None else self.hf_dataset[idx]
         ep_idx = item["episode_index"].item()
 
         query_indices = None
@@ -734,15 +1046,14 @@ class LeRobotDataset(torch.utils.data.Dataset):
             for key, val in query_result.items():
                 item[key] = val
 
-        if len(self.meta.video_keys) > 0:
+        if len(self.video_keys) > 0:
             current_ts = item["timestamp"].item()
             query_timestamps = self._get_query_timestamps(current_ts, query_indices)
             video_frames = self._query_videos(query_timestamps, ep_idx)
             item = {**video_frames, **item}
 
         if self.image_transforms is not None:
-            image_keys = self.meta.camera_keys
-            for cam in image_keys:
+            for cam in self.camera_keys:
                 item[cam] = self.image_transforms(item[cam])
 
         # Add task as a string
@@ -751,6 +1062,138 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         return item
 
+    def _get_batch_query_indices(
+        self, indices: np.ndarray
+    ) -> tuple[dict[str, np.ndarray], dict[str, torch.Tensor]]:
+        """Vectorized version of `_get_query_indices` for a whole batch of indices. Returned query indices
+        and padding masks have shape (batch_size, len(delta_indices[key])).
+        """
+        ep_from = self.episode_data_index["from"].numpy()
+        ep_to = self.episode_data_index["to"].numpy()
+        ep_pos = np.searchsorted(ep_to, indices, side="right")
+        ep_start = ep_from[ep_pos][:, None]
+        ep_end = ep_to[ep_pos][:, None]
+
+        query_indices, padding = {}, {}
+        for key, delta_idx in self.delta_indices.items():
+            q_idx = indices[:, None] + np.asarray(delta_idx, dtype=np.int64)[None, :]
+            # Pad values outside of current episode range
+            padding[f"{key}_is_pad"] = torch.from_numpy((q_idx < ep_start) | (q_idx >= ep_end))
+            query_indices[key] = np.clip(q_idx, ep_start, ep_end - 1)
+
+        return query_indices, padding
+
+    def _query_hf_dataset_batch(
+        self, indices: np.ndarray, query_indices: dict[str, np.ndarray] | None = None
+    ) -> tuple[dict[str, torch.Tensor | list], dict[str, torch.Tensor]]:
+        """Batched counterpart of `hf_dataset[idx]` followed by `_query_hf_dataset`. All the rows needed by
+        the batch are read at once and every column is converted to a single pre-stacked tensor. Timestamps
+        of the queried video frames are returned separately, with shape (batch_size, len(delta_indices[key])).
+        """
+        rows = [indices]
+        if query_indices is not None:
+            rows += [q_idx.ravel() for q_idx in query_indices.values()]
+        rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        cache = self.columnar_cache if self.columnar_cache is not None else {}
+        table = take_hf_dataset_rows(
+            self.hf_dataset, rows, [key for key in self.hf_dataset.column_names if key not in cache]
+        )
+
+        def gather(column: str, positions: np.ndarray) -> torch.Tensor | list:
+            if column in cache:
+                return torch.from_numpy(cache[column][rows[positions]])
+            values = arrow_column_to_torch(
+                table[column].take(positions.ravel()), self.hf_features[column], self.uint8_images
+            )
+            if isinstance(values, torch.Tensor):
+                return values.reshape(*positions.shape, *values.shape[1:])
+            if positions.ndim == 2:
+                width = positions.shape[1]
+                return [values[i : i + width] for i in range(0, len(values), width)]
+            return values
+
+        # Positions in `table` of the rows requested by the batch, and of the rows queried for each delta key
+        item_positions = inverse[: len(indices)]
+        query_positions = {}
+        if query_indices is not None:
+            offset = len(indices)
+            for key, q_idx in query_indices.items():
+                query_positions[key] = inverse[offset : offset + q_idx.size].reshape(q_idx.shape)
+                offset += q_idx.size
+
+        batch, video_timestamps = {}, {}
+        for key in self.hf_dataset.column_names:
+            batch[key] = gather(key, query_positions.get(key, item_positions))
+        for key, positions in query_positions.items():
+            if key in self.meta.video_keys:
+                video_timestamps[key] = gather("timestamp", positions)
+
+        return batch, video_timestamps
+
+    def _query_videos_batch(
+        self, batch: dict[str, torch.Tensor], video_timestamps: dict[str, torch.Tensor]
+    ) -> list[dict[str, torch.Tensor]]:
+        """Batched counterpart of `_query_videos`. For each camera, the frames queried by all the samples
+        of the batch that come from the same episode are decoded together, so that each contiguous span of
+        video is only decoded once (see `EpisodeBlockSampler` to get batches made of such spans).
+        """
+        ep_indices = batch["episode_index"]
+        items = [{} for _ in range(len(ep_indices))]
+        for ep_idx in ep_indices.unique().tolist():
+            positions = torch.nonzero(ep_indices == ep_idx).squeeze(1)
+            for vid_key in self.video_keys:
+                if vid_key in video_timestamps:
+                    query_ts = video_timestamps[vid_key][positions]
+                else:
+                    query_ts = batch["timestamp"][positions][:, None]
+                frames = self._decode_video_frames(vid_key, ep_idx, query_ts.flatten().tolist())
+                frames = frames.reshape(*query_ts.shape, *frames.shape[1:])
+                for i, item_frames in zip(positions.tolist(), frames, strict=True):
+                    items[i][vid_key] = item_frames.squeeze(0)
+
+        return items
+
+    def __getitems__(self, indices: list[int]) -> list[dict]:
+        """Batched version of `__getitem__`, automatically used by `torch.utils.data.DataLoader` instead of
+        calling `__getitem__` once per sample.
+
+        Query indices and padding masks are computed for the whole batch at once, and the data is read with
+        a single arrow `take` per column instead of one `select` per sample and per delta key. Video frames are
+        decoded per episode and camera (see `_query_videos_batch`). Returned items are views over the
+        pre-stacked batch tensors, which keeps this compatible with any `collate_fn`.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+
+        query_indices, padding = None, {}
+        if self.delta_indices is not None:
+            query_indices, padding = self._get_batch_query_indices(indices)
+
+        batch, video_timestamps = self._query_hf_dataset_batch(indices, query_indices)
+        batch = {**batch, **padding}
+
+        video_frames = None
+        if len(self.video_keys) > 0:
+            video_frames = self._query_videos_batch(batch, video_timestamps)
+
+        items = []
+        for i in range(len(indices)):
+            item = {key: val[i] for key, val in batch.items()}
+
+            if video_frames is not None:
+                item = {**video_frames[i], **item}
+
+            if self.image_transforms is not None:
+                for cam in self.camera_keys:
+                    item[cam] = self.image_transforms(item[cam])
+
+            # Add task as a string
+            task_idx = item["task_index"].item()
+            item["task"] = self.meta.tasks[task_idx]
+
+            items.append(item)
+
+        return items
+
     def __repr__(self):
         feature_keys = list(self.features)
         return (
@@ -763,7 +1206,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
         )
 
     def create_episode_buffer(self, episode_index: int | None = None) -> dict:
-        current_ep_idx = self.meta.total_episodes if episode_index is None else episode_index
+        current_ep_idx = self._get_next_indices()[0] if episode_index is None else episode_index
         ep_buffer = {}
         # size and task are special cases that are not in self.features
         ep_buffer["size"] = 0
@@ -776,13 +1219,13 @@ class LeRobotDataset(torch.utils.data.Dataset):
         fpath = DEFAULT_IMAGE_PATH.format(
             image_key=image_key, episode_index=episode_index, frame_index=frame_index
         )
-        return self.root / fpath
+        return (self.root / fpath).with_suffix(IMAGE_FORMATS[self.image_format])
 
     def _save_image(self, image: torch.Tensor | np.ndarray | PIL.Image.Image, fpath: Path) -> None:
         if self.image_writer is None:
             if isinstance(image, torch.Tensor):
                 image = image.cpu().numpy()
-            write_image(image, fpath)
+            write_image(image, fpath, self.image_format)
         else:
             self.image_writer.save_image(image=image, fpath=fpath)
 
@@ -820,51 +1263,62 @@ class LeRobotDataset(torch.utils.data.Dataset):
                     f"An element of the frame is not in the features. '{key}' not in '{self.features.keys()}'."
                 )
 
-            if self.features[key]["dtype"] in ["image", "video"]:
+            if self.features[key]["dtype"] == "video" and self.video_encoders is not None:
+                video_path = self.root / self.meta.get_video_file_path(
+                    self.episode_buffer["episode_index"], key
+                )
+                if frame_index == 0:
+                    self.video_encoders[key].start(video_path)
+                self.video_encoders[key].add_frame(frame[key])
+                self.episode_buffer[key].append(str(video_path))
+            elif self.features[key]["dtype"] in ["image", "video"]:
                 img_path = self._get_image_file_path(
                     episode_index=self.episode_buffer["episode_index"], image_key=key, frame_index=frame_index
                 )
                 if frame_index == 0:
                     img_path.parent.mkdir(parents=True, exist_ok=True)
+                    self.image_stats[key] = ImageStats()
                 self._save_image(frame[key], img_path)
+                self.image_stats[key].add_image(frame[key])
                 self.episode_buffer[key].append(str(img_path))
             else:
                 self.episode_buffer[key].append(frame[key])
 
         self.episode_buffer["size"] += 1
 
-    def save_episode(self, episode_data: dict | None = None) -> None:
+    def save_episode(self, episode_data: dict | None = None) -> Future | None:
         """
         This will save to disk the current episode in self.episode_buffer.
 
+        When the episode saver is started (see `start_episode_saver`), the episode is saved in the background
+        and a `Future` is returned, so that the next episode can be recorded right away. Otherwise, the
+        episode is saved before returning.
+
         Args:
             episode_data (dict | None, optional): Dict containing the episode data to save. If None, this will
                 save the current episode in self.episode_buffer, which is filled with 'add_frame'. Defaults to
                 None.
         """
-        if not episode_data:
-            episode_buffer = self.episode_buffer
-
-        validate_episode_buffer(episode_buffer, self.meta.total_episodes, self.features)
+        episode_buffer = episode_data if episode_data else self.episode_buffer
+        next_episode_index, next_frame_index = self._get_next_indices()
+        validate_episode_buffer(episode_buffer, next_episode_index, self.features)
+        num_dropped_images = self._pop_num_dropped_images(episode_buffer["episode_index"])
+        if num_dropped_images > 0:
+            raise RuntimeError(
+                f"{num_dropped_images} images of episode {episode_buffer['episode_index']} were dropped by the "
+                "image writer, whose shared memory was full: its videos wouldn't match its timestamps. Call "
+                "`clear_episode_buffer` to record it again, with more `image_writer_shared_memory_slots` or "
+                "without `drop_images_when_full`."
+            )
 
         # size and task are special cases that won't be added to hf_dataset
         episode_length = episode_buffer.pop("size")
         tasks = episode_buffer.pop("task")
-        episode_tasks = list(set(tasks))
         episode_index = episode_buffer["episode_index"]
 
-        episode_buffer["index"] = np.arange(self.meta.total_frames, self.meta.total_frames + episode_length)
+        episode_buffer["index"] = np.arange(next_frame_index, next_frame_index + episode_length)
         episode_buffer["episode_index"] = np.full((episode_length,), episode_index)
 
-        # Add new tasks to the tasks dictionary
-        for task in episode_tasks:
-            task_index = self.meta.get_task_index(task)
-            if task_index is None:
-                self.meta.add_task(task)
-
-        # Given tasks in natural language, find their corresponding task indices
-        episode_buffer["task_index"] = np.array([self.meta.get_task_index(task) for task in tasks])
-
         for key, ft in self.features.items():
             # index, episode_index, task_index are already processed above, and image and video
             # are processed separately by storing image path and frame info as meta data
@@ -872,17 +1326,80 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 continue
             episode_buffer[key] = np.stack(episode_buffer[key])
 
-        self._wait_image_writer()
+        # New tasks are added here rather than by the episode saver, so that only this thread modifies them
+        for task in set(tasks):
+            if self.meta.get_task_index(task) is None:
+                self.meta.add_task(task)
+        # Given tasks in natural language, find their corresponding task indices
+        episode_buffer["task_index"] = np.array([self.meta.get_task_index(task) for task in tasks])
+
+        # The stats of the frames given to `add_frame` are accumulated along the way, by `image_stats` or by
+        # the video encoders, instead of being computed from images sampled on disk
+        frame_stats = {}
+        if not episode_data:
+            frame_stats = {
+                key: stats.get_stats()
+                for key, stats in self.image_stats.items()
+                if stats.num_samples == episode_length
+            }
+        self.image_stats = {}
+        # The encoders of this episode are finished by `prepare`, while the next episode is streamed to new ones
+        episode_encoders = {}
+        if self.video_encoders is not None:
+            for key, encoder in self.video_encoders.items():
+                if encoder.video_path == self.root / self.meta.get_video_file_path(episode_index, key):
+                    episode_encoders[key] = encoder
+                    self.video_encoders[key] = StreamingVideoEncoder(self.fps, **self._video_encoder_kwargs)
+
+        if not episode_data:  # Reset the buffer
+            self.episode_buffer = self.create_episode_buffer(episode_index + 1)
+
+        def prepare():
+            return self._prepare_episode(episode_buffer, episode_index, frame_stats, episode_encoders)
+
+        def commit(ep_stats):
+            self._commit_episode(episode_buffer, episode_index, episode_length, tasks, ep_stats)
+
+        if self.episode_saver is None:
+            commit(prepare())
+            return None
+        return self.episode_saver.submit(episode_index, episode_length, prepare, commit)
+
+    def _get_next_indices(self) -> tuple[int, int]:
+        """Index of the next episode to record and of its first frame, counting the episodes being saved."""
+        if self.episode_saver is None:
+            return self.meta.total_episodes, self.meta.total_frames
+        return self.episode_saver.get_next_indices(self.meta.total_episodes, self.meta.total_frames)
+
+    def _prepare_episode(
+        self, episode_buffer: dict, episode_index: int, frame_stats: dict, episode_encoders: dict
+    ) -> dict:
+        """Waits for the images of an episode to be written and for its streamed videos to be encoded, then
+        writes its data and videos, and returns its stats. Only the images and encoders of this episode are
+        waited for, so that the next episode can be recorded meanwhile."""
+        self._wait_episode_images(episode_index)
+        for key, encoder in episode_encoders.items():
+            encoder.finish()
+            frame_stats[key] = encoder.stats
+
         self._save_episode_table(episode_buffer, episode_index)
-        ep_stats = compute_episode_stats(episode_buffer, self.features)
+        ep_stats = compute_episode_stats(
+            {key: val for key, val in episode_buffer.items() if key not in frame_stats}, self.features
+        )
+        ep_stats.update(frame_stats)
 
         if len(self.meta.video_keys) > 0:
             video_paths = self.encode_episode_videos(episode_index)
             for key in self.meta.video_keys:
                 episode_buffer[key] = video_paths[key]
 
+        return ep_stats
+
+    def _commit_episode(
+        self, episode_buffer: dict, episode_index: int, episode_length: int, tasks: list[str], ep_stats: dict
+    ) -> None:
         # `meta.save_episode` be executed after encoding the videos
-        self.meta.save_episode(episode_index, episode_length, episode_tasks, ep_stats)
+        self.meta.save_episode(episode_index, episode_length, list(set(tasks)), ep_stats)
 
         ep_data_index = get_episode_data_index(self.meta.episodes, [episode_index])
         ep_data_index_np = {k: t.numpy() for k, t in ep_data_index.items()}
@@ -894,44 +1411,67 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.tolerance_s,
         )
 
-        video_files = list(self.root.rglob("*.mp4"))
-        assert len(video_files) == self.num_episodes * len(self.meta.video_keys)
+        ep_files = [self.meta.get_data_file_path(episode_index)]
+        ep_files += [self.meta.get_video_file_path(episode_index, key) for key in self.meta.video_keys]
+        missing_files = [str(fpath) for fpath in ep_files if not (self.root / fpath).is_file()]
+        assert not missing_files, f"Files of episode {episode_index} are missing: {missing_files}"
 
-        parquet_files = list(self.root.rglob("*.parquet"))
-        assert len(parquet_files) == self.num_episodes
-
-        # delete images
-        img_dir = self.root / "images"
-        if img_dir.is_dir():
-            shutil.rmtree(self.root / "images")
-
-        if not episode_data:  # Reset the buffer
-            self.episode_buffer = self.create_episode_buffer()
+        self._delete_episode_images(episode_index)
 
     def _save_episode_table(self, episode_buffer: dict, episode_index: int) -> None:
         episode_dict = {key: episode_buffer[key] for key in self.hf_features}
+        if self.image_format != "png":
+            # Images are always stored as png in the dataset, whatever the format they were written in
+            for key in self.meta.image_keys:
+                episode_dict[key] = [
+                    load_image_as_numpy(fpath, dtype=np.uint8, channel_first=False)
+                    for fpath in episode_dict[key]
+                ]
         ep_dataset = datasets.Dataset.from_dict(episode_dict, features=self.hf_features, split="train")
         ep_dataset = embed_images(ep_dataset)
-        self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
-        self.hf_dataset.set_transform(hf_transform_to_torch)
         ep_data_path = self.root / self.meta.get_data_file_path(ep_index=episode_index)
         ep_data_path.parent.mkdir(parents=True, exist_ok=True)
         ep_dataset.to_parquet(ep_data_path)
+        # The episode isn't concatenated in memory, hf_dataset is reloaded from the parquet files when accessed
+        self.hf_dataset = None
 
     def clear_episode_buffer(self) -> None:
         episode_index = self.episode_buffer["episode_index"]
-        if self.image_writer is not None:
-            for cam_key in self.meta.camera_keys:
-                img_dir = self._get_image_file_path(
-                    episode_index=episode_index, image_key=cam_key, frame_index=0
-                ).parent
-                if img_dir.is_dir():
-                    shutil.rmtree(img_dir)
+        if self.video_encoders is not None:
+            for encoder in self.video_encoders.values():
+                encoder.cancel()
+        self._wait_image_writer()
+        self._pop_num_dropped_images(episode_index)
+        self._delete_episode_images(episode_index)
+        self.image_stats = {}
 
         # Reset the buffer
-        self.episode_buffer = self.create_episode_buffer()
+        self.episode_buffer = self.create_episode_buffer(episode_index)
 
-    def start_image_writer(self, num_processes: int = 0, num_threads: int = 4) -> None:
+    def _delete_episode_images(self, episode_index: int) -> None:
+        img_dir = self.root / "images"
+        for cam_key in self.meta.camera_keys:
+            ep_img_dir = self._get_image_file_path(
+                episode_index=episode_index, image_key=cam_key, frame_index=0
+            ).parent
+            if ep_img_dir.is_dir():
+                shutil.rmtree(ep_img_dir)
+            # Directories left empty are removed as well, the others hold the images of the next episodes
+            with contextlib.suppress(OSError):
+                ep_img_dir.parent.rmdir()
+        with contextlib.suppress(OSError):
+            img_dir.rmdir()
+
+    def start_image_writer(
+        self,
+        num_processes: int = 0,
+        num_threads: int = 4,
+        num_shared_memory_slots: int = 0,
+        drop_images_when_full: bool = False,
+    ) -> None:
+        """Writes the images given to `add_frame` asynchronously (see `AsyncImageWriter`). With
+        `drop_images_when_full`, the images that don't fit in the shared memory slots are dropped instead of
+        waiting for a free slot, and `save_episode` then fails for the episode they belong to."""
         if isinstance(self.image_writer, AsyncImageWriter):
             logging.warning(
                 "You are starting a new AsyncImageWriter that is replacing an already existing one in the dataset."
@@ -940,6 +1480,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.image_writer = AsyncImageWriter(
             num_processes=num_processes,
             num_threads=num_threads,
+            num_shared_memory_slots=num_shared_memory_slots,
+            drop_when_full=drop_images_when_full,
+            image_format=self.image_format,
         )
 
     def stop_image_writer(self) -> None:
@@ -951,17 +1494,82 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.image_writer.stop()
             self.image_writer = None
 
+    def start_video_encoders(self, **encoder_kwargs) -> None:
+        """Encodes the videos while recording, from the frames given to `add_frame`, with a
+        `StreamingVideoEncoder` per camera (see its arguments). This replaces writing the frames as png images
+        and encoding them in `save_episode`, which then only has to wait for the last frames to be encoded.
+        """
+        self.stop_video_encoders()
+        self._video_encoder_kwargs = encoder_kwargs
+        self.video_encoders = {
+            key: StreamingVideoEncoder(self.fps, **encoder_kwargs) for key in self.meta.video_keys
+        }
+
+    def stop_video_encoders(self) -> None:
+        """Cancels the videos being encoded, if any, and goes back to encoding the videos from png images."""
+        if self.video_encoders is not None:
+            for encoder in self.video_encoders.values():
+                encoder.cancel()
+            self.video_encoders = None
+
+    def start_episode_saver(self) -> None:
+        """Saves the episodes in a background thread, so that `save_episode` returns right away and the next
+        episode can be recorded while the previous ones are being written and encoded.
+
+        The metadata of an episode (`meta.info`, `meta.episodes` and the stats) is updated by the background
+        thread once the episode is written, under a lock shared with the tasks added by `save_episode`, and
+        `add_frame` doesn't depend on it. Reading the dataset while
+        episodes are being saved (e.g. `meta.total_frames`, or `dataset[idx]` on the data files being written)
+        would race with it: call `stop_episode_saver` first. Only the reload of `hf_dataset` waits for it."""
+        self.stop_episode_saver()
+        self.episode_saver = AsyncEpisodeSaver()
+
+    def stop_episode_saver(self) -> None:
+        """Waits for the episodes being saved, then goes back to saving them in `save_episode`. Like
+        `stop_image_writer`, this needs to be called for the LeRobotDataset object to be pickleable."""
+        if self.episode_saver is not None:
+            try:
+                self.episode_saver.wait_until_done()
+            finally:
+                self.episode_saver.stop()
+                self.episode_saver = None
+
+    def _wait_episode_saver(self) -> None:
+        """Wait for the episodes being saved in the background."""
+        if self.episode_saver is not None:
+            self.episode_saver.wait_until_done()
+
     def _wait_image_writer(self) -> None:
         """Wait for asynchronous image writer to finish."""
         if self.image_writer is not None:
             self.image_writer.wait_until_done()
 
+    def _pop_num_dropped_images(self, episode_index: int) -> int:
+        """Number of images of an episode dropped by the asynchronous image writer (see `start_image_writer`)."""
+        if self.image_writer is None:
+            return 0
+        return sum(
+            self.image_writer.pop_num_dropped_images(
+                self._get_image_file_path(episode_index=episode_index, image_key=key, frame_index=0).parent
+            )
+            for key in self.meta.camera_keys
+        )
+
+    def _wait_episode_images(self, episode_index: int) -> None:
+        """Wait for the images of an episode to be written by the asynchronous image writer."""
+        if self.image_writer is None:
+            return
+        for key in self.meta.camera_keys:
+            ep_img_dir = self._get_image_file_path(episode_index=episode_index, image_key=key, frame_index=0)
+            self.image_writer.wait_until_done(ep_img_dir.parent)
+
     def encode_videos(self) -> None:
         """
         Use ffmpeg to convert frames stored as png into mp4 videos.
         Note: `encode_video_frames` is a blocking call. Making it asynchronous shouldn't speedup encoding,
         since video encoding with ffmpeg is already using multithreading.
         """
+        self._wait_episode_saver()
         for ep_idx in range(self.meta.total_episodes):
             self.encode_episode_videos(ep_idx)
 
@@ -975,6 +1583,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
         for key in self.meta.video_keys:
             video_path = self.root / self.meta.get_video_file_path(episode_index, key)
             video_paths[key] = str(video_path)
+            encoder = self.video_encoders.get(key) if self.video_encoders is not None else None
+            if encoder is not None and encoder.video_path == video_path:
+                # Encoded while recording, only the last frames are left to encode
+                encoder.finish()
+                continue
             if video_path.is_file():
                 # Skip if video is already encoded. Could be the case when resuming data recording.
                 continue
@@ -998,9 +1611,18 @@ class LeRobotDataset(torch.utils.data.Dataset):
         tolerance_s: float = 1e-4,
         image_writer_processes: int = 0,
         image_writer_threads: int = 0,
+        image_writer_shared_memory_slots: int = 0,
+        drop_images_when_full: bool = False,
+        image_format: str = "png",
         video_backend: str | None = None,
+        streaming_encoding: bool = False,
+        async_saving: bool = False,
     ) -> "LeRobotDataset":
-        """Create a LeRobot Dataset from scratch in order to record data."""
+        """Create a LeRobot Dataset from scratch in order to record data. With `streaming_encoding`, videos are
+        encoded while recording instead of from png images at the end of each episode (see
+        `start_video_encoders`). With `async_saving`, episodes are saved in the background (see
+        `start_episode_saver`). Images are written in `image_format` while recording (see `IMAGE_FORMATS`), and
+        with `drop_images_when_full` they may be dropped by the image writer (see `start_image_writer`)."""
         obj = cls.__new__(cls)
         obj.meta = LeRobotDatasetMetadata.create(
             repo_id=repo_id,
@@ -1016,9 +1638,26 @@ class LeRobotDataset(torch.utils.data.Dataset):
         obj.revision = None
         obj.tolerance_s = tolerance_s
         obj.image_writer = None
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format '{image_format}', choose from {list(IMAGE_FORMATS)}.")
+        obj.image_format = image_format
+        obj.image_stats = {}
 
         if image_writer_processes or image_writer_threads:
-            obj.start_image_writer(image_writer_processes, image_writer_threads)
+            obj.start_image_writer(
+                image_writer_processes,
+                image_writer_threads,
+                image_writer_shared_memory_slots,
+                drop_images_when_full,
+            )
+
+        obj.video_encoders = None
+        if streaming_encoding:
+            obj.start_video_encoders()
+
+        obj.episode_saver = None
+        if async_saving:
+            obj.start_episode_saver()
 
         # TODO(aliberts, rcadene, alexander-soare): Merge this with OnlineBuffer/DataBuffer
         obj.episode_buffer = obj.create_episode_buffer()
@@ -1026,10 +1665,15 @@ class LeRobotDataset(torch.utils.data.Dataset):
         obj.episodes = None
         obj.hf_dataset = obj.create_hf_dataset()
         obj.image_transforms = None
+        obj.uint8_images = False
         obj.delta_timestamps = None
         obj.delta_indices = None
         obj.episode_data_index = None
+        obj.columnar_cache = None
+        obj.frame_cache = None
         obj.video_backend = video_backend if video_backend is not None else "pyav"
+        obj.video_decoder_cache = VideoDecoderCache()
+        obj.disabled_features = set()
         return obj
 
 
@@ -1090,6 +1734,12 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
                 "other datasets."
             )
             self.disabled_features.update(extra_keys)
+        # Dropped before loading anything, so that their columns aren't read and their videos aren't decoded
+        for ds in self._datasets:
+            ds.disable_features(self.disabled_features)
+
+        # Index of the first frame of each dataset in the concatenation, plus the total number of frames
+        self.cumulative_frames = np.cumsum([0] + [ds.num_frames for ds in self._datasets]).tolist()
 
         self.image_transforms = image_transforms
         self.delta_timestamps = delta_timestamps
@@ -1185,24 +1835,30 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         if idx >= len(self):
             raise IndexError(f"Index {idx} out of bounds.")
         # Determine which dataset to get an item from based on the index.
-        start_idx = 0
-        dataset_idx = 0
-        for dataset in self._datasets:
-            if idx >= start_idx + dataset.num_frames:
-                start_idx += dataset.num_frames
-                dataset_idx += 1
-                continue
-            break
-        else:
-            raise AssertionError("We expect the loop to break out as long as the index is within bounds.")
-        item = self._datasets[dataset_idx][idx - start_idx]
+        dataset_idx = bisect.bisect_right(self.cumulative_frames, idx) - 1
+        item = self._datasets[dataset_idx][idx - self.cumulative_frames[dataset_idx]]
         item["dataset_index"] = torch.tensor(dataset_idx)
-        for data_key in self.disabled_features:
-            if data_key in item:
-                del item[data_key]
-
         return item
 
+    def __getitems__(self, indices: list[int]) -> list[dict]:
+        """Batched version of `__getitem__`: indices are grouped by dataset, and each group is loaded with the
+        `__getitems__` of its dataset."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) > 0 and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError(f"Indices {indices} out of bounds.")
+        dataset_indices = np.searchsorted(self.cumulative_frames, indices, side="right") - 1
+
+        items = [None] * len(indices)
+        for dataset_idx in np.unique(dataset_indices).tolist():
+            positions = np.flatnonzero(dataset_indices == dataset_idx)
+            local_indices = indices[positions] - self.cumulative_frames[dataset_idx]
+            dataset_items = self._datasets[dataset_idx].__getitems__(local_indices.tolist())
+            for pos, item in zip(positions.tolist(), dataset_items, strict=True):
+                item["dataset_index"] = torch.tensor(dataset_idx)
+                items[pos] = item
+
+        return items
+
     def __repr__(self):
         return (
             f"{self.__class__.__name__}(\n"
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import queue
+import threading
+import time
+from typing import Iterable
+
+import torch
+
+# Marks the end of the iterable in the queue of batches
+_END = object()
+
+
+def batch_to_device(batch: dict, device: torch.device, non_blocking: bool = False) -> dict:
+    """Moves the tensors of a batch to `device`, leaving the other values (e.g. the tasks) as they are."""
+    return {
+        key: value.to(device, non_blocking=non_blocking) if isinstance(value, torch.Tensor) else value
+        for key, value in batch.items()
+    }
+
+
+class DevicePrefetcher:
+    """
+    This class iterates over the batches of `iterable` (typically a dataloader) already moved to `device`. A
+    background thread keeps up to `num_batches` batches ahead, so that both the loading of the batches and
+    their copy to the device overlap with the training step rather than delaying it.
+
+    On CUDA, the copies are issued on a side stream and an event is recorded after each of them: the
+    current stream waits for this event before using the batch, which never blocks the host since the copy
+    is already done by then. On other devices, the copies are simply done by the background thread.
+
+    After each batch, `wait_s` is the time spent waiting for it in `__next__` (non-zero only when the
+    loading is slower than the training step) and `copy_s` is the time its copy to the device took.
+    """
+
+    def __init__(self, iterable: Iterable[dict], device: torch.device, num_batches: int = 2):
+        if num_batches < 1:
+            raise ValueError(f"At least one batch must be prefetched ({num_batches=}).")
+
+        self.device = torch.device(device)
+        self.wait_s = 0.0
+        self.copy_s = 0.0
+        self._iterator = iter(iterable)
+        self._queue = queue.Queue(maxsize=num_batches)
+        self._stream = torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        self._stop_event = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._prefetch_loop, name="device_prefetcher", daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        if self._done:
+            raise StopIteration
+
+        start_time = time.perf_counter()
+        item = self._queue.get()
+        self.wait_s = time.perf_counter() - start_time
+
+        if item is _END:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+
+        batch, event, self.copy_s = item
+        if event is not None:
+            stream = torch.cuda.current_stream(self.device)
+            stream.wait_event(event)
+            # The tensors were allocated on the side stream, their memory must not be reused by it until the
+            # current stream is done with them
+            for value in batch.values():
+                if isinstance(value, torch.Tensor):
+                    value.record_stream(stream)
+        return batch
+
+    def _prefetch_loop(self) -> None:
+        try:
+            for batch in self._iterator:
+                start_time = time.perf_counter()
+                batch, event = self._copy_to_device(batch)
+                if not self._put((batch, event, time.perf_counter() - start_time)):
+                    return
+            self._put(_END)
+        except Exception as e:
+            self._put(e)
+
+    def _copy_to_device(self, batch: dict) -> tuple[dict, torch.cuda.Event | None]:
+        if self._stream is None:
+            return batch_to_device(batch, self.device), None
+
+        with torch.cuda.stream(self._stream):
+            batch = batch_to_device(batch, self.device, non_blocking=True)
+            event = torch.cuda.Event()
+            event.record(self._stream)
+        # Waiting here only blocks the background thread, and gives the actual duration of the copy
+        event.synchronize()
+        return batch, event
+
+    def _put(self, item) -> bool:
+        """Puts `item` in the queue once there is room for it, unless the prefetcher is closed meanwhile."""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def close(self) -> None:
+        """Stops the background thread. The batches already prefetched are dropped."""
+        self._stop_event.set()
+        self._done = True
+        self._thread.join()
@@ -20,6 +20,7 @@ Contains utilities to process raw data format of HDF5 files like in: https://git
 import gc
 import shutil
 from pathlib import Path
+from typing import Iterator
 
 import h5py
 import numpy as np
@@ -40,6 +41,17 @@ from lerobot.common.datasets.utils import (
 )
 from lerobot.common.datasets.video_utils import VideoFrame, encode_video_frames
 
+DEFAULT_FPS = 50
+
+
+# features of the dataset -> datasets of the hdf5 files
+RAW_KEYS = {
+    "observation.state": "/observations/qpos",
+    "observation.velocity": "/observations/qvel",
+    "observation.effort": "/observations/effort",
+    "action": "/action",
+}
+
 
 def get_cameras(hdf5_data):
     # ignore depth channel, not currently handled
@@ -48,10 +60,20 @@ def get_cameras(hdf5_data):
     return rgb_cameras
 
 
-def check_format(raw_dir) -> bool:
-    # only frames from simulation are uncompressed
-    compressed_images = "sim" not in raw_dir.name
+def is_compressed(images: h5py.Dataset) -> bool:
+    """Images are either stored as is, with a (b,h,w,c) shape, or encoded one by one (e.g. as jpeg like on
+    the real robots) in buffers of bytes, padded to the same length or of variable length."""
+    return images.ndim != 4
+
 
+def decode_images(buffers: np.ndarray) -> np.ndarray:
+    import cv2
+
+    # decode one compressed image after the other
+    return np.stack([cv2.imdecode(data, 1) for data in buffers])
+
+
+def check_format(raw_dir) -> bool:
     hdf5_paths = list(raw_dir.glob("episode_*.hdf5"))
     assert len(hdf5_paths) != 0
     for hdf5_path in hdf5_paths:
@@ -68,14 +90,70 @@ def check_format(raw_dir) -> bool:
             for camera in get_cameras(data):
                 assert num_frames == data[f"/observations/images/{camera}"].shape[0]
 
-                if compressed_images:
-                    assert data[f"/observations/images/{camera}"].ndim == 2
+                if is_compressed(data[f"/observations/images/{camera}"]):
+                    assert data[f"/observations/images/{camera}"].ndim in [1, 2]
                 else:
                     assert data[f"/observations/images/{camera}"].ndim == 4
                     b, h, w, c = data[f"/observations/images/{camera}"].shape
                     assert c < h and c < w, f"Expect (h,w,c) image format but ({h=},{w=},{c=}) provided."
 
 
+def get_features(raw_dir: Path, video: bool) -> dict:
+    hdf5_path = sorted(raw_dir.glob("episode_*.hdf5"))[0]
+    with h5py.File(hdf5_path, "r") as ep:
+        features = {}
+        for camera in get_cameras(ep):
+            images = ep[f"/observations/images/{camera}"]
+            shape = decode_images(images[:1]).shape[1:] if is_compressed(images) else images.shape[1:]
+            features[f"observation.images.{camera}"] = {
+                "dtype": "video" if video else "image",
+                "shape": shape,
+                "names": ["height", "width", "channels"],
+            }
+
+        for key, raw_key in RAW_KEYS.items():
+            if raw_key in ep:
+                features[key] = {"dtype": "float32", "shape": ep[raw_key].shape[1:], "names": None}
+
+    features["next.done"] = {"dtype": "bool", "shape": (1,), "names": None}
+    return features
+
+
+def get_episodes_lengths(raw_dir: Path) -> list[int]:
+    lengths = []
+    for hdf5_path in sorted(raw_dir.glob("episode_*.hdf5")):
+        with h5py.File(hdf5_path, "r") as ep:
+            lengths.append(ep["/action"].shape[0])
+    return lengths
+
+
+def iter_raw_episode(
+    raw_dir: Path, raw_episode_index: int, chunk_size: int = 64
+) -> Iterator[dict[str, np.ndarray]]:
+    """Reads an episode by chunks of `chunk_size` frames, so that only a chunk of images is in memory at a
+    time, however long the episode and however many cameras."""
+    ep_path = sorted(raw_dir.glob("episode_*.hdf5"))[raw_episode_index]
+    with h5py.File(ep_path, "r") as ep:
+        num_frames = ep["/action"].shape[0]
+        for start in range(0, num_frames, chunk_size):
+            frames = slice(start, min(start + chunk_size, num_frames))
+            chunk = {}
+            for camera in get_cameras(ep):
+                images = ep[f"/observations/images/{camera}"]
+                if is_compressed(images):
+                    chunk[f"observation.images.{camera}"] = decode_images(images[frames])
+                else:
+                    chunk[f"observation.images.{camera}"] = images[frames]
+
+            for key, raw_key in RAW_KEYS.items():
+                if raw_key in ep:
+                    chunk[key] = ep[raw_key][frames].astype(np.float32)
+
+            # last step of demonstration is considered done
+            chunk["next.done"] = np.arange(frames.start, frames.stop) == num_frames - 1
+            yield chunk
+
+
 def load_from_raw(
     raw_dir: Path,
     videos_dir: Path,
@@ -84,9 +162,6 @@ def load_from_raw(
     episodes: list[int] | None = None,
     encoding: dict | None = None,
 ):
-    # only frames from simulation are uncompressed
-    compressed_images = "sim" not in raw_dir.name
-
     hdf5_files = sorted(raw_dir.glob("episode_*.hdf5"))
     num_episodes = len(hdf5_files)
 
@@ -113,15 +188,8 @@ def load_from_raw(
             for camera in get_cameras(ep):
                 img_key = f"observation.images.{camera}"
 
-                if compressed_images:
-                    import cv2
-
-                    # load one compressed image after the other in RAM and uncompress
-                    imgs_array = []
-                    for data in ep[f"/observations/images/{camera}"]:
-                        imgs_array.append(cv2.imdecode(data, 1))
-                    imgs_array = np.array(imgs_array)
-
+                if is_compressed(ep[f"/observations/images/{camera}"]):
+                    imgs_array = decode_images(ep[f"/observations/images/{camera}"])
                 else:
                     # load all images in RAM
                     imgs_array = ep[f"/observations/images/{camera}"][:]
@@ -217,7 +285,7 @@ def from_raw_to_lerobot_format(
     check_format(raw_dir)
 
     if fps is None:
-        fps = 50
+        fps = DEFAULT_FPS
 
     data_dict = load_from_raw(raw_dir, videos_dir, fps, video, episodes, encoding)
     hf_dataset = to_hf_dataset(data_dict, video)
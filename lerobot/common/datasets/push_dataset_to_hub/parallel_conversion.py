@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Converts raw datasets to the LeRobotDataset format (v2.1 layout) with a pool of processes.
+
+Each episode is converted on its own by a worker: it is loaded from the raw files, its frames are encoded
+into its mp4 videos as they go (see `StreamingVideoEncoder`), and its parquet file and stats are written
+directly at their place in the chunked layout. Only the stats of the episodes are sent back to the main
+process, which writes the metadata of the episodes in order. The memory used is thus bounded by one
+episode per worker, or one chunk of frames for the raw formats which can be read by chunks, instead of the
+whole dataset.
+
+The raw formats supported are the ones whose module defines:
+    - `DEFAULT_FPS`, the frame rate used when none is provided,
+    - `get_features(raw_dir, video)`, the features of the dataset (see `LeRobotDatasetMetadata.create`),
+    - `get_episodes_lengths(raw_dir)`, the number of frames of each raw episode, read without loading them,
+    - `load_raw_episode(raw_dir, raw_episode_index)`, the frames of a raw episode, as a dictionary mapping
+      each feature to an array with one item per frame (images are uint8 and channel last), or
+      `iter_raw_episode(raw_dir, raw_episode_index, chunk_size)`, which yields them by chunks of at most
+      `chunk_size` frames, so that a worker never holds more than a chunk of images in memory,
+and optionally `DEFAULT_TASK`, the task of the episodes when none is provided.
+"""
+
+import copy
+import importlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import ModuleType
+from typing import Iterator
+
+import datasets
+import numpy as np
+import pyarrow.parquet as pq
+import tqdm
+
+from lerobot.common.datasets.compute_stats import (
+    auto_downsample_height_width,
+    compute_episode_stats,
+    sample_indices,
+)
+from lerobot.common.datasets.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+from lerobot.common.datasets.utils import embed_images, get_hf_features_from_features
+from lerobot.common.datasets.video_utils import StreamingVideoEncoder
+
+PARALLEL_RAW_FORMATS = {
+    "aloha_hdf5": "lerobot.common.datasets.push_dataset_to_hub.aloha_hdf5_format",
+    "pusht_zarr": "lerobot.common.datasets.push_dataset_to_hub.pusht_zarr_format",
+    "umi_zarr": "lerobot.common.datasets.push_dataset_to_hub.umi_zarr_format",
+    "xarm_pkl": "lerobot.common.datasets.push_dataset_to_hub.xarm_pkl_format",
+}
+
+
+def get_raw_format_module(raw_format: str) -> ModuleType:
+    if raw_format not in PARALLEL_RAW_FORMATS:
+        raise ValueError(
+            f"The raw format '{raw_format}' can't be converted in parallel. Available raw formats: "
+            f"{list(PARALLEL_RAW_FORMATS)}."
+        )
+    return importlib.import_module(PARALLEL_RAW_FORMATS[raw_format])
+
+
+def iter_raw_episode_chunks(
+    module: ModuleType, raw_dir: Path, raw_episode_index: int, chunk_size: int
+) -> Iterator[dict[str, np.ndarray]]:
+    if hasattr(module, "iter_raw_episode"):
+        yield from module.iter_raw_episode(raw_dir, raw_episode_index, chunk_size)
+    else:
+        yield module.load_raw_episode(raw_dir, raw_episode_index)
+
+
+def convert_raw_episode(
+    raw_format: str,
+    raw_dir: Path,
+    raw_episode_index: int,
+    root: Path,
+    features: dict,
+    fps: int,
+    data_path: str,
+    video_paths: dict[str, str],
+    episode_index: int,
+    episode_length: int,
+    from_index: int,
+    task_index: int,
+    encoding: dict | None = None,
+    chunk_size: int = 64,
+) -> dict:
+    """Converts a raw episode: writes its parquet file and its videos, and returns its stats. Only plain
+    values are given rather than the metadata of the dataset, which the main process updates meanwhile.
+
+    The frames are processed by chunks of `chunk_size` if the raw format can read them so (see
+    `iter_raw_episode`): each chunk is streamed to the video encoders and appended to the parquet file, and
+    only the numerical features and the images sampled for the stats are kept until the end of the episode.
+    """
+    module = get_raw_format_module(raw_format)
+    hf_features = get_hf_features_from_features(features)
+    image_keys = [key for key, ft in features.items() if ft["dtype"] == "image"]
+    sampled = np.array(sample_indices(episode_length))
+
+    encoders = {}
+    for key, video_path in video_paths.items():
+        # The queue holds about a chunk, so that the encoder doesn't keep more chunks alive
+        encoders[key] = StreamingVideoEncoder(fps, **(encoding or {}), max_queue_size=chunk_size)
+        encoders[key].start(root / video_path)
+
+    ep_data_path = root / data_path
+    ep_data_path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    ep_dict = {key: [] for key in features if key not in image_keys and key not in video_paths}
+    sampled_images = {key: [] for key in image_keys}
+    num_frames = 0
+    try:
+        for chunk in iter_raw_episode_chunks(module, raw_dir, raw_episode_index, chunk_size):
+            chunk_length = len(next(iter(chunk.values())))
+            frame_index = np.arange(num_frames, num_frames + chunk_length, dtype=np.int64)
+            chunk["frame_index"] = frame_index
+            chunk["timestamp"] = (frame_index / fps).astype(np.float32)
+            chunk["episode_index"] = np.full(chunk_length, episode_index, dtype=np.int64)
+            chunk["index"] = from_index + frame_index
+            chunk["task_index"] = np.full(chunk_length, task_index, dtype=np.int64)
+
+            for key, encoder in encoders.items():
+                for frame in chunk.pop(key):
+                    encoder.add_frame(frame)
+
+            chunk_sampled = sampled[(sampled >= num_frames) & (sampled < num_frames + chunk_length)]
+            for key in image_keys:
+                for idx in chunk_sampled:
+                    image = chunk[key][idx - num_frames].transpose(2, 0, 1)
+                    sampled_images[key].append(auto_downsample_height_width(image))
+
+            for key in ep_dict:
+                ep_dict[key].append(chunk[key])
+
+            chunk_dataset = datasets.Dataset.from_dict(
+                {key: chunk[key] for key in hf_features}, features=hf_features
+            )
+            table = embed_images(chunk_dataset).data.table
+            if writer is None:
+                writer = pq.ParquetWriter(ep_data_path, table.schema)
+            writer.write_table(table)
+            num_frames += chunk_length
+
+        if num_frames != episode_length:
+            raise ValueError(
+                f"Episode {raw_episode_index} has {num_frames} frames instead of {episode_length}."
+            )
+
+        ep_stats = {}
+        for key, encoder in encoders.items():
+            encoder.finish()
+            ep_stats[key] = encoder.stats
+    except Exception:
+        # The files of the episode are removed, so that no partial episode is left in the dataset
+        for encoder in encoders.values():
+            encoder.cancel()
+        if writer is not None:
+            writer.close()
+            writer = None
+        ep_data_path.unlink(missing_ok=True)
+        for video_path in video_paths.values():
+            (root / video_path).unlink(missing_ok=True)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    ep_dict = {key: np.concatenate(chunks) for key, chunks in ep_dict.items()}
+    ep_dict.update({key: np.stack(images) for key, images in sampled_images.items()})
+    ep_stats.update(compute_episode_stats(ep_dict, features))
+    return ep_stats
+
+
+def convert_raw_dataset(
+    raw_dir: Path,
+    raw_format: str,
+    repo_id: str,
+    root: Path | None = None,
+    fps: int | None = None,
+    video: bool = True,
+    episodes: list[int] | None = None,
+    single_task: str | None = None,
+    robot_type: str | None = None,
+    num_workers: int = 4,
+    encoding: dict | None = None,
+    chunk_size: int = 64,
+) -> LeRobotDataset:
+    """Converts the raw dataset in `raw_dir` to a LeRobotDataset in `root`, with `num_workers` processes
+    converting the episodes concurrently (or the main process if it is 0), by chunks of `chunk_size` frames
+    when the raw format supports it. The dataset isn't pushed to the hub, see `LeRobotDataset.push_to_hub`.
+    """
+    raw_dir = Path(raw_dir)
+    module = get_raw_format_module(raw_format)
+    task = single_task if single_task is not None else getattr(module, "DEFAULT_TASK", None)
+    if task is None:
+        raise ValueError(f"The raw format '{raw_format}' has no default task, please provide one.")
+
+    meta = LeRobotDatasetMetadata.create(
+        repo_id,
+        fps if fps is not None else module.DEFAULT_FPS,
+        root=root,
+        robot_type=robot_type,
+        features=module.get_features(raw_dir, video),
+        use_videos=video,
+    )
+    meta.add_task(task)
+    task_index = meta.get_task_index(task)
+    # A copy, since the info of the videos is added to the features of `meta` as the episodes are saved
+    features = copy.deepcopy(meta.features)
+
+    episodes_lengths = module.get_episodes_lengths(raw_dir)
+    raw_ep_indices = episodes if episodes is not None else list(range(len(episodes_lengths)))
+    from_indices = np.cumsum([0] + [episodes_lengths[raw_idx] for raw_idx in raw_ep_indices]).tolist()
+
+    def get_episode_args(ep_idx: int) -> tuple:
+        data_path = str(meta.get_data_file_path(ep_idx))
+        video_paths = {key: str(meta.get_video_file_path(ep_idx, key)) for key in meta.video_keys}
+        return (
+            raw_format,
+            raw_dir,
+            raw_ep_indices[ep_idx],
+            meta.root,
+            features,
+            meta.fps,
+            data_path,
+            video_paths,
+            ep_idx,
+            episodes_lengths[raw_ep_indices[ep_idx]],
+            from_indices[ep_idx],
+            task_index,
+            encoding,
+            chunk_size,
+        )
+
+    # The metadata of the episodes is written in order, as soon as all the previous episodes are converted
+    converted = {}
+    next_ep_idx = 0
+
+    def save_converted_episodes():
+        nonlocal next_ep_idx
+        while next_ep_idx in converted:
+            ep_length = episodes_lengths[raw_ep_indices[next_ep_idx]]
+            meta.save_episode(next_ep_idx, ep_length, [task], converted.pop(next_ep_idx))
+            next_ep_idx += 1
+
+    if num_workers > 0:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(convert_raw_episode, *get_episode_args(ep_idx)): ep_idx
+                for ep_idx in range(len(raw_ep_indices))
+            }
+            for future in tqdm.tqdm(as_completed(futures), total=len(futures)):
+                converted[futures[future]] = future.result()
+                save_converted_episodes()
+    else:
+        for ep_idx in tqdm.tqdm(range(len(raw_ep_indices))):
+            converted[ep_idx] = convert_raw_episode(*get_episode_args(ep_idx))
+            save_converted_episodes()
+
+    logging.info(f"Converted {meta.total_episodes} episodes ({meta.total_frames} frames) to {meta.root}.")
+    return LeRobotDataset(repo_id, root=meta.root)
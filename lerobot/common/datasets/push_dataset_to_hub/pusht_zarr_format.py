@@ -37,6 +37,9 @@ from lerobot.common.datasets.utils import (
 )
 from lerobot.common.datasets.video_utils import VideoFrame, encode_video_frames
 
+DEFAULT_FPS = 10
+DEFAULT_TASK = "Push the T-shaped block onto the T-shaped target."
+
 
 def check_format(raw_dir):
     zarr_path = raw_dir / "pusht_cchi_v7_replay.zarr"
@@ -59,6 +62,104 @@ def check_format(raw_dir):
     assert all(nb_frames == zarr_data[dataset].shape[0] for dataset in required_datasets)
 
 
+def compute_reward_success(
+    block_pos: np.ndarray, block_angle: np.ndarray, keypoints_instead_of_image: bool = False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """Places the T block at each of its poses in the environment to compute the reward and success of each
+    frame, from the coverage of the goal, as well as the keypoints of the block if requested."""
+    try:
+        import pymunk
+        from gym_pusht.envs.pusht import PushTEnv, pymunk_to_shapely
+    except ModuleNotFoundError as e:
+        print("`gym_pusht` is not installed. Please install it with `pip install 'lerobot[gym_pusht]'`")
+        raise e
+    # as define in gmy-pusht env: https://github.com/huggingface/gym-pusht/blob/e0684ff988d223808c0a9dcfaba9dc4991791370/gym_pusht/envs/pusht.py#L174
+    success_threshold = 0.95  # 95% coverage,
+
+    # TODO(rcadene): verify that goal pose is expected to be fixed
+    goal_pos_angle = np.array([256, 256, np.pi / 4])  # x, y, theta (in radians)
+    goal_body = PushTEnv.get_goal_pose_body(goal_pos_angle)
+
+    num_frames = len(block_pos)
+    reward = np.zeros(num_frames, dtype=np.float32)
+    success = np.zeros(num_frames, dtype=bool)
+    keypoints = np.zeros((num_frames, 16), dtype=np.float32) if keypoints_instead_of_image else None
+    for i in range(num_frames):
+        space = pymunk.Space()
+        space.gravity = 0, 0
+        space.damping = 0
+
+        # Add walls.
+        walls = [
+            PushTEnv.add_segment(space, (5, 506), (5, 5), 2),
+            PushTEnv.add_segment(space, (5, 5), (506, 5), 2),
+            PushTEnv.add_segment(space, (506, 5), (506, 506), 2),
+            PushTEnv.add_segment(space, (5, 506), (506, 506), 2),
+        ]
+        space.add(*walls)
+
+        block_body, block_shapes = PushTEnv.add_tee(space, block_pos[i].tolist(), block_angle[i].item())
+        goal_geom = pymunk_to_shapely(goal_body, block_body.shapes)
+        block_geom = pymunk_to_shapely(block_body, block_body.shapes)
+        intersection_area = goal_geom.intersection(block_geom).area
+        goal_area = goal_geom.area
+        coverage = intersection_area / goal_area
+        reward[i] = np.clip(coverage / success_threshold, 0, 1)
+        success[i] = coverage > success_threshold
+        if keypoints_instead_of_image:
+            # 8 keypoints each with 2 coords
+            keypoints[i] = PushTEnv.get_keypoints(block_shapes).flatten()
+
+    return reward, success, keypoints
+
+
+def get_features(raw_dir: Path, video: bool) -> dict:
+    zarr_data = zarr.open(raw_dir / "pusht_cchi_v7_replay.zarr", mode="r")
+    return {
+        "observation.image": {
+            "dtype": "video" if video else "image",
+            "shape": zarr_data["data/img"].shape[1:],
+            "names": ["height", "width", "channels"],
+        },
+        "observation.state": {"dtype": "float32", "shape": (2,), "names": None},
+        "action": {"dtype": "float32", "shape": zarr_data["data/action"].shape[1:], "names": None},
+        "next.reward": {"dtype": "float32", "shape": (1,), "names": None},
+        "next.done": {"dtype": "bool", "shape": (1,), "names": None},
+        "next.success": {"dtype": "bool", "shape": (1,), "names": None},
+    }
+
+
+def get_episodes_lengths(raw_dir: Path) -> list[int]:
+    zarr_data = zarr.open(raw_dir / "pusht_cchi_v7_replay.zarr", mode="r")
+    return np.diff(zarr_data["meta/episode_ends"][:], prepend=0).tolist()
+
+
+def load_raw_episode(raw_dir: Path, raw_episode_index: int) -> dict[str, np.ndarray]:
+    zarr_data = zarr.open(raw_dir / "pusht_cchi_v7_replay.zarr", mode="r")
+    episode_ends = zarr_data["meta/episode_ends"][:]
+    from_idx = episode_ends[raw_episode_index - 1] if raw_episode_index > 0 else 0
+    to_idx = episode_ends[raw_episode_index]
+
+    image = zarr_data["data/img"][from_idx:to_idx]
+    assert image.min() >= 0.0
+    assert image.max() <= 255.0
+    state = zarr_data["data/state"][from_idx:to_idx]
+    reward, success, _ = compute_reward_success(state[:, 2:4], state[:, 4])
+    # last step of demonstration is considered done
+    done = np.zeros(len(state), dtype=bool)
+    done[-1] = True
+
+    # TODO(rcadene)] = verify that reward and done are aligned with image and agent_pos
+    return {
+        "observation.image": image.astype(np.uint8),
+        "observation.state": state[:, :2].astype(np.float32),
+        "action": zarr_data["data/action"][from_idx:to_idx].astype(np.float32),
+        "next.reward": np.concatenate([reward[1:], reward[[-1]]]),
+        "next.done": np.concatenate([done[1:], done[[-1]]]),
+        "next.success": np.concatenate([success[1:], success[[-1]]]),
+    }
+
+
 def load_from_raw(
     raw_dir: Path,
     videos_dir: Path,
@@ -68,18 +169,9 @@ def load_from_raw(
     keypoints_instead_of_image: bool = False,
     encoding: dict | None = None,
 ):
-    try:
-        import pymunk
-        from gym_pusht.envs.pusht import PushTEnv, pymunk_to_shapely
-
-        from lerobot.common.datasets.push_dataset_to_hub._diffusion_policy_replay_buffer import (
-            ReplayBuffer as DiffusionPolicyReplayBuffer,
-        )
-    except ModuleNotFoundError as e:
-        print("`gym_pusht` is not installed. Please install it with `pip install 'lerobot[gym_pusht]'`")
-        raise e
-    # as define in gmy-pusht env: https://github.com/huggingface/gym-pusht/blob/e0684ff988d223808c0a9dcfaba9dc4991791370/gym_pusht/envs/pusht.py#L174
-    success_threshold = 0.95  # 95% coverage,
+    from lerobot.common.datasets.push_dataset_to_hub._diffusion_policy_replay_buffer import (
+        ReplayBuffer as DiffusionPolicyReplayBuffer,
+    )
 
     zarr_path = raw_dir / "pusht_cchi_v7_replay.zarr"
     zarr_data = DiffusionPolicyReplayBuffer.copy_from_path(zarr_path)
@@ -89,10 +181,6 @@ def load_from_raw(
         {zarr_data[key].shape[0] for key in zarr_data.keys()}  # noqa: SIM118
     ), "Some data type dont have the same number of total frames."
 
-    # TODO(rcadene): verify that goal pose is expected to be fixed
-    goal_pos_angle = np.array([256, 256, np.pi / 4])  # x, y, theta (in radians)
-    goal_body = PushTEnv.get_goal_pose_body(goal_pos_angle)
-
     imgs = torch.from_numpy(zarr_data["img"])  # b h w c
     states = torch.from_numpy(zarr_data["state"])
     actions = torch.from_numpy(zarr_data["action"])
@@ -131,35 +219,13 @@ def load_from_raw(
         block_angle = state[:, 4]
 
         # get reward, success, done, and (maybe) keypoints
-        reward = torch.zeros(num_frames)
-        success = torch.zeros(num_frames, dtype=torch.bool)
+        reward, success, keypoints = compute_reward_success(
+            block_pos.numpy(), block_angle.numpy(), keypoints_instead_of_image
+        )
+        reward, success = torch.from_numpy(reward), torch.from_numpy(success)
         if keypoints_instead_of_image:
-            keypoints = torch.zeros(num_frames, 16)  # 8 keypoints each with 2 coords
+            keypoints = torch.from_numpy(keypoints)
         done = torch.zeros(num_frames, dtype=torch.bool)
-        for i in range(num_frames):
-            space = pymunk.Space()
-            space.gravity = 0, 0
-            space.damping = 0
-
-            # Add walls.
-            walls = [
-                PushTEnv.add_segment(space, (5, 506), (5, 5), 2),
-                PushTEnv.add_segment(space, (5, 5), (506, 5), 2),
-                PushTEnv.add_segment(space, (506, 5), (506, 506), 2),
-                PushTEnv.add_segment(space, (5, 506), (506, 506), 2),
-            ]
-            space.add(*walls)
-
-            block_body, block_shapes = PushTEnv.add_tee(space, block_pos[i].tolist(), block_angle[i].item())
-            goal_geom = pymunk_to_shapely(goal_body, block_body.shapes)
-            block_geom = pymunk_to_shapely(block_body, block_body.shapes)
-            intersection_area = goal_geom.intersection(block_geom).area
-            goal_area = goal_geom.area
-            coverage = intersection_area / goal_area
-            reward[i] = np.clip(coverage / success_threshold, 0, 1)
-            success[i] = coverage > success_threshold
-            if keypoints_instead_of_image:
-                keypoints[i] = torch.from_numpy(PushTEnv.get_keypoints(block_shapes).flatten())
 
         # last step of demonstration is considered done
         done[-1] = True
@@ -259,7 +325,7 @@ def from_raw_to_lerobot_format(
     check_format(raw_dir)
 
     if fps is None:
-        fps = 10
+        fps = DEFAULT_FPS
 
     data_dict = load_from_raw(raw_dir, videos_dir, fps, video, episodes, keypoints_instead_of_image, encoding)
     hf_dataset = to_hf_dataset(data_dict, video, keypoints_instead_of_image)
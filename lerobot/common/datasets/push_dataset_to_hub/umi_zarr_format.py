@@ -19,6 +19,7 @@ import logging
 import shutil
 from pathlib import Path
 
+import numpy as np
 import torch
 import tqdm
 import zarr
@@ -38,6 +39,10 @@ from lerobot.common.datasets.utils import (
 )
 from lerobot.common.datasets.video_utils import VideoFrame, encode_video_frames
 
+# For umi cup in the wild: https://arxiv.org/pdf/2402.10329#table.caption.16
+DEFAULT_FPS = 10
+DEFAULT_TASK = "Put the cup on the saucer, with its handle facing left."
+
 
 def check_format(raw_dir) -> bool:
     zarr_path = raw_dir / "cup_in_the_wild.zarr"
@@ -64,6 +69,67 @@ def check_format(raw_dir) -> bool:
     assert all(nb_frames == zarr_data[dataset].shape[0] for dataset in required_datasets)
 
 
+def get_features(raw_dir: Path, video: bool) -> dict:
+    zarr_data = zarr.open(raw_dir / "cup_in_the_wild.zarr", mode="r")
+    # `start_pos` and `end_pos` respectively represent the positions of the end-effector at the beginning and
+    # the end of the episode. `gripper_width` is the distance between the grippers, and is also included in
+    # the state vector, which concatenates the position and rotation of the end-effector and gripper width.
+    state_dim = sum(
+        zarr_data[f"data/{key}"].shape[1]
+        for key in ["robot0_eef_pos", "robot0_eef_rot_axis_angle", "robot0_gripper_width"]
+    )
+    return {
+        "observation.image": {
+            "dtype": "video" if video else "image",
+            "shape": zarr_data["data/camera0_rgb"].shape[1:],
+            "names": ["height", "width", "channels"],
+        },
+        "observation.state": {"dtype": "float32", "shape": (state_dim,), "names": None},
+        "end_pose": {
+            "dtype": "float32",
+            "shape": zarr_data["data/robot0_demo_end_pose"].shape[1:],
+            "names": None,
+        },
+        "start_pos": {
+            "dtype": "float32",
+            "shape": zarr_data["data/robot0_demo_start_pose"].shape[1:],
+            "names": None,
+        },
+        "gripper_width": {
+            "dtype": "float32",
+            "shape": zarr_data["data/robot0_gripper_width"].shape[1:],
+            "names": None,
+        },
+    }
+
+
+def get_episodes_lengths(raw_dir: Path) -> list[int]:
+    zarr_data = zarr.open(raw_dir / "cup_in_the_wild.zarr", mode="r")
+    return np.diff(zarr_data["meta/episode_ends"][:], prepend=0).tolist()
+
+
+def load_raw_episode(raw_dir: Path, raw_episode_index: int) -> dict[str, np.ndarray]:
+    # mandatory to access the images
+    register_codecs()
+    zarr_data = zarr.open(raw_dir / "cup_in_the_wild.zarr", mode="r")
+    episode_ends = zarr_data["meta/episode_ends"][:]
+    from_idx = episode_ends[raw_episode_index - 1] if raw_episode_index > 0 else 0
+    to_idx = episode_ends[raw_episode_index]
+
+    def load(key: str) -> np.ndarray:
+        return zarr_data[f"data/{key}"][from_idx:to_idx]
+
+    gripper_width = load("robot0_gripper_width").astype(np.float32)
+    state = np.concatenate([load("robot0_eef_pos"), load("robot0_eef_rot_axis_angle"), gripper_width], axis=1)
+    return {
+        "observation.image": load("camera0_rgb"),
+        "observation.state": state.astype(np.float32),
+        "end_pose": load("robot0_demo_end_pose").astype(np.float32),
+        "start_pos": load("robot0_demo_start_pose").astype(np.float32),
+        "gripper_width": gripper_width,
+    }
+
+
 def load_from_raw(
     raw_dir: Path,
     videos_dir: Path,
@@ -212,8 +278,7 @@ def from_raw_to_lerobot_format(
     check_format(raw_dir)
 
     if fps is None:
-        # For umi cup in the wild: https://arxiv.org/pdf/2402.10329#table.caption.16
-        fps = 10
+        fps = DEFAULT_FPS
 
     if not video:
         logging.warning(
@@ -17,9 +17,11 @@
 
 import pickle
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
 import einops
+import numpy as np
 import torch
 import tqdm
 from datasets import Dataset, Features, Image, Sequence, Value
@@ -37,6 +39,9 @@ from lerobot.common.datasets.utils import (
 )
 from lerobot.common.datasets.video_utils import VideoFrame, encode_video_frames
 
+DEFAULT_FPS = 15
+DEFAULT_TASK = "Pick up the cube and lift it."
+
 
 def check_format(raw_dir):
     keys = {"actions", "rewards", "dones"}
@@ -60,6 +65,57 @@ def check_format(raw_dir):
         assert all(len(nested_dict[subkey]) == expected_len for subkey in subkeys if subkey in nested_dict)
 
 
+@lru_cache(maxsize=1)
+def load_buffer(pkl_path: Path) -> dict:
+    # The whole buffer is in a single pickle file, it is loaded once per process
+    with open(pkl_path, "rb") as f:
+        return pickle.load(f)
+
+
+def get_episodes_ranges(dones: np.ndarray) -> list[tuple[int, int]]:
+    to_ids = (np.flatnonzero(dones) + 1).tolist()
+    return list(zip([0] + to_ids[:-1], to_ids, strict=True))
+
+
+def get_features(raw_dir: Path, video: bool) -> dict:
+    pkl_data = load_buffer(raw_dir / "buffer.pkl")
+    c, h, w = pkl_data["observations"]["rgb"].shape[1:]
+    return {
+        "observation.image": {
+            "dtype": "video" if video else "image",
+            "shape": (h, w, c),
+            "names": ["height", "width", "channels"],
+        },
+        "observation.state": {
+            "dtype": "float32",
+            "shape": pkl_data["observations"]["state"].shape[1:],
+            "names": None,
+        },
+        "action": {"dtype": "float32", "shape": pkl_data["actions"].shape[1:], "names": None},
+        "next.reward": {"dtype": "float32", "shape": (1,), "names": None},
+        "next.done": {"dtype": "bool", "shape": (1,), "names": None},
+    }
+
+
+def get_episodes_lengths(raw_dir: Path) -> list[int]:
+    pkl_data = load_buffer(raw_dir / "buffer.pkl")
+    return [to_idx - from_idx for from_idx, to_idx in get_episodes_ranges(pkl_data["dones"])]
+
+
+def load_raw_episode(raw_dir: Path, raw_episode_index: int) -> dict[str, np.ndarray]:
+    pkl_data = load_buffer(raw_dir / "buffer.pkl")
+    from_idx, to_idx = get_episodes_ranges(pkl_data["dones"])[raw_episode_index]
+    return {
+        "observation.image": einops.rearrange(
+            np.asarray(pkl_data["observations"]["rgb"][from_idx:to_idx]), "b c h w -> b h w c"
+        ),
+        "observation.state": np.asarray(pkl_data["observations"]["state"][from_idx:to_idx], dtype=np.float32),
+        "action": np.asarray(pkl_data["actions"][from_idx:to_idx], dtype=np.float32),
+        "next.reward": np.asarray(pkl_data["rewards"][from_idx:to_idx], dtype=np.float32),
+        "next.done": np.asarray(pkl_data["dones"][from_idx:to_idx], dtype=bool),
+    }
+
+
 def load_from_raw(
     raw_dir: Path,
     videos_dir: Path,
@@ -184,7 +240,7 @@ def from_raw_to_lerobot_format(
     check_format(raw_dir)
 
     if fps is None:
-        fps = 15
+        fps = DEFAULT_FPS
 
     data_dict = load_from_raw(raw_dir, videos_dir, fps, video, episodes, encoding)
     hf_dataset = to_hf_dataset(data_dict, video)
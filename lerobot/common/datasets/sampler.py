@@ -13,6 +13,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import math
 from typing import Iterator, Union
 
 import torch
@@ -59,3 +60,184 @@ class EpisodeAwareSampler:
 
     def __len__(self) -> int:
         return len(self.indices)
+
+
+class DistributedEpisodeAwareSampler(EpisodeAwareSampler):
+    def __init__(
+        self,
+        episode_data_index: dict,
+        num_replicas: int,
+        rank: int,
+        episode_indices_to_use: Union[list, None] = None,
+        drop_n_first_frames: int = 0,
+        drop_n_last_frames: int = 0,
+        shuffle: bool = False,
+        seed: int = 0,
+    ):
+        """`EpisodeAwareSampler` for distributed training, which yields the share of the indices of the
+        process of rank `rank` out of `num_replicas` processes.
+
+        All the processes shuffle the indices in the same order, drawn from `seed` and the number of times
+        the sampler has been iterated over, and then take every `num_replicas`-th index from `rank` on. The
+        first indices are repeated so that all the processes get the same number of indices, and thus do the
+        same number of steps per epoch.
+
+        Args:
+            episode_data_index: Dictionary with keys 'from' and 'to' containing the start and end indices of each episode.
+            num_replicas: Number of processes the indices are split between.
+            rank: Rank of the current process.
+            episode_indices_to_use: List of episode indices to use. If None, all episodes are used.
+                                    Assumes that episodes are indexed from 0 to N-1.
+            drop_n_first_frames: Number of frames to drop from the start of each episode.
+            drop_n_last_frames: Number of frames to drop from the end of each episode.
+            shuffle: Whether to shuffle the indices.
+            seed: Seed of the shuffling, which must be the same on all the processes.
+        """
+        if not 0 <= rank < num_replicas:
+            raise ValueError(f"`rank` must be in [0, {num_replicas - 1}] ({rank=}).")
+        super().__init__(
+            episode_data_index,
+            episode_indices_to_use=episode_indices_to_use,
+            drop_n_first_frames=drop_n_first_frames,
+            drop_n_last_frames=drop_n_last_frames,
+            shuffle=shuffle,
+        )
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+        self.num_samples = math.ceil(len(self.indices) / num_replicas)
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[int]:
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            order = torch.randperm(len(self.indices), generator=generator).tolist()
+        else:
+            order = list(range(len(self.indices)))
+        # The next iteration (e.g. with `cycle`) is shuffled differently, in the same way on all the processes
+        self.epoch += 1
+
+        total_size = self.num_samples * self.num_replicas
+        order = (order * math.ceil(total_size / max(len(order), 1)))[:total_size]
+        for i in order[self.rank : total_size : self.num_replicas]:
+            yield self.indices[i]
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+
+class EpisodeBlockSampler:
+    def __init__(
+        self,
+        episode_data_index: dict,
+        episode_indices_to_use: Union[list, None] = None,
+        drop_n_first_frames: int = 0,
+        drop_n_last_frames: int = 0,
+        shuffle: bool = False,
+        block_size: int = 8,
+        shuffle_buffer_size: int = 0,
+    ):
+        """Sampler that yields blocks of consecutive frames from the same episode, so that the frames of a
+        batch only come from a few contiguous spans of video. With `LeRobotDataset.__getitems__`, each span is
+        decoded once (one seek to the previous key frame) instead of once per sample.
+
+        Args:
+            episode_data_index: Dictionary with keys 'from' and 'to' containing the start and end indices of each episode.
+            episode_indices_to_use: List of episode indices to use. If None, all episodes are used.
+                                    Assumes that episodes are indexed from 0 to N-1.
+            drop_n_first_frames: Number of frames to drop from the start of each episode.
+            drop_n_last_frames: Number of frames to drop from the end of each episode.
+            shuffle: Whether to shuffle the order of the blocks.
+            block_size: Maximum number of consecutive frames in a block. Episodes are split into blocks of
+                this size (the last block of each episode may be shorter).
+            shuffle_buffer_size: When shuffling, frames are also shuffled within consecutive windows of this
+                many frames of the shuffled blocks stream. Values <= 1 keep the frames ordered inside blocks.
+        """
+        if block_size < 1:
+            raise ValueError(f"`block_size` must be at least 1 ({block_size=}).")
+
+        blocks = []
+        for episode_idx, (start_index, end_index) in enumerate(
+            zip(episode_data_index["from"], episode_data_index["to"], strict=True)
+        ):
+            if episode_indices_to_use is None or episode_idx in episode_indices_to_use:
+                start = start_index.item() + drop_n_first_frames
+                end = end_index.item() - drop_n_last_frames
+                blocks.extend(range(i, min(i + block_size, end)) for i in range(start, end, block_size))
+
+        self.blocks = blocks
+        self.indices = [i for block in blocks for i in block]
+        self.shuffle = shuffle
+        self.shuffle_buffer_size = shuffle_buffer_size
+
+    def __iter__(self) -> Iterator[int]:
+        if not self.shuffle:
+            yield from self.indices
+            return
+
+        indices = [i for block_idx in torch.randperm(len(self.blocks)) for i in self.blocks[block_idx]]
+        if self.shuffle_buffer_size <= 1:
+            yield from indices
+            return
+
+        for window_start in range(0, len(indices), self.shuffle_buffer_size):
+            window = indices[window_start : window_start + self.shuffle_buffer_size]
+            for i in torch.randperm(len(window)):
+                yield window[i]
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+class WeightedDatasetSampler:
+    def __init__(
+        self,
+        cumulative_frames: list[int],
+        weights: list[float] | None = None,
+        num_samples: int | None = None,
+        generator: torch.Generator | None = None,
+        chunk_size: int = 65536,
+    ):
+        """Sampler of a `MultiLeRobotDataset` that first draws a dataset according to `weights`, then a frame
+        uniformly within this dataset. Indices are drawn (with replacement) by chunks, without materializing
+        the indices of the concatenated datasets.
+
+        Args:
+            cumulative_frames: Index of the first frame of each dataset in the concatenation, followed by the
+                total number of frames (see `MultiLeRobotDataset.cumulative_frames`).
+            weights: Sampling weight of each dataset, which don't need to sum to one. If None, datasets are
+                weighted by their number of frames, i.e. all the frames are equally likely.
+            num_samples: Number of indices drawn per iteration. Defaults to the total number of frames.
+            generator: Generator used for sampling.
+            chunk_size: Number of indices drawn at once.
+        """
+        self.offsets = torch.tensor(cumulative_frames[:-1], dtype=torch.int64)
+        self.sizes = torch.tensor(cumulative_frames[1:], dtype=torch.int64) - self.offsets
+        if weights is None:
+            weights = self.sizes.tolist()
+        if len(weights) != len(self.sizes):
+            raise ValueError(f"Expected one weight per dataset ({len(self.sizes)}), got {len(weights)}.")
+        self.weights = torch.tensor(weights, dtype=torch.float64)
+        # Empty datasets can't be sampled from
+        self.weights[self.sizes == 0] = 0
+        if self.weights.sum() <= 0:
+            raise ValueError(f"At least one non-empty dataset must have a positive weight ({weights=}).")
+        self.num_samples = num_samples if num_samples is not None else cumulative_frames[-1]
+        self.generator = generator
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[int]:
+        for chunk_start in range(0, self.num_samples, self.chunk_size):
+            n = min(self.chunk_size, self.num_samples - chunk_start)
+            dataset_indices = torch.multinomial(self.weights, n, replacement=True, generator=self.generator)
+            frames = (
+                torch.rand(n, generator=self.generator, dtype=torch.float64) * self.sizes[dataset_indices]
+            )
+            yield from (self.offsets[dataset_indices] + frames.long()).tolist()
+
+    def __len__(self) -> int:
+        return self.num_samples
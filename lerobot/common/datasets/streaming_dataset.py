@@ -0,0 +1,489 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator
+
+import datasets
+import packaging.version
+import pyarrow.parquet as pq
+import requests
+import torch
+import torch.distributed as dist
+from huggingface_hub import hf_hub_download
+from huggingface_hub.errors import EntryNotFoundError
+
+from lerobot.common.constants import HF_LEROBOT_HOME
+from lerobot.common.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDatasetMetadata
+from lerobot.common.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    INFO_PATH,
+    STATS_PATH,
+    STREAM_CACHE_DIR,
+    TASKS_PATH,
+    VIDEO_INDEX_PATH,
+    check_delta_timestamps,
+    get_delta_indices,
+    hf_transform_to_torch,
+    load_info,
+)
+from lerobot.common.datasets.video_utils import VideoDecoderCache, decode_video_frames_by_spans
+
+
+class FileFetcher:
+    """Base class of the fetchers used by `StreamingLeRobotDataset` to get the files of a dataset from
+    wherever it is stored. `fetch` writes the file at `relpath` (relative to the root of the dataset, e.g.
+    'data/chunk-000/episode_000000.parquet') to `dest`, and raises a `FileNotFoundError` if it doesn't exist.
+    """
+
+    def fetch(self, relpath: str, dest: Path) -> None:
+        raise NotImplementedError
+
+
+class DirectoryFetcher(FileFetcher):
+    """Copies the files from a local directory, e.g. a mirror of the dataset on a network file system."""
+
+    def __init__(self, source_dir: str | Path):
+        self.source_dir = Path(source_dir)
+
+    def fetch(self, relpath: str, dest: Path) -> None:
+        shutil.copyfile(self.source_dir / relpath, dest)
+
+
+class HTTPFetcher(FileFetcher):
+    """Downloads the files from '{base_url}/{relpath}', e.g. a dataset served by an object storage."""
+
+    def __init__(self, base_url: str, timeout_s: float = 60):
+        if not base_url.startswith(("http://", "https://")):
+            raise ValueError(f"Only http(s) urls are supported ({base_url=}).")
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+
+    def fetch(self, relpath: str, dest: Path) -> None:
+        url = f"{self.base_url}/{relpath}"
+        with requests.get(url, stream=True, timeout=self.timeout_s) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(url)
+            response.raise_for_status()
+            with open(dest, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024**2):
+                    f.write(chunk)
+
+
+class HubFetcher(FileFetcher):
+    """Downloads the files from a dataset repository of the Hugging Face hub."""
+
+    def __init__(self, repo_id: str, revision: str | None = None):
+        self.repo_id = repo_id
+        self.revision = revision if revision else CODEBASE_VERSION
+
+    def fetch(self, relpath: str, dest: Path) -> None:
+        with tempfile.TemporaryDirectory(dir=dest.parent) as tmp_dir:
+            try:
+                path = hf_hub_download(
+                    self.repo_id, relpath, repo_type="dataset", revision=self.revision, local_dir=tmp_dir
+                )
+            except EntryNotFoundError as e:
+                raise FileNotFoundError(f"{self.repo_id}/{relpath}") from e
+            shutil.move(path, dest)
+
+
+def make_file_fetcher(source: str | None, repo_id: str, revision: str | None = None) -> FileFetcher:
+    """Returns a `HTTPFetcher` if `source` is an http(s) url, a `DirectoryFetcher` if it is a path, and a
+    `HubFetcher` of `repo_id` if it is None."""
+    if source is None:
+        return HubFetcher(repo_id, revision)
+    if source.startswith(("http://", "https://")):
+        return HTTPFetcher(source)
+    return DirectoryFetcher(source)
+
+
+class StreamingFileCache:
+    """Local cache of the files fetched by a `FileFetcher`, stored in `cache_dir` with the same layout as the
+    dataset and bounded to `max_size_mb` (no limit if None).
+
+    The least recently used files are deleted when the cache exceeds its size, except the ones which are
+    pinned (i.e. fetched with `get` and not released yet), such as the files of the episodes being iterated
+    over or prefetched. Each process only accounts for (and deletes) the files it fetched itself, so that
+    dataloader workers never delete a file another worker is reading: the size of the cache should thus be
+    split between processes by the caller.
+    """
+
+    def __init__(self, cache_dir: str | Path, fetcher: FileFetcher, max_size_mb: float | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.fetcher = fetcher
+        self.max_size_mb = max_size_mb
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._pinned: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_files"], state["_pinned"], state["_lock"] = OrderedDict(), Counter(), None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def size_mb(self) -> float:
+        return sum(self._files.values()) / 1024**2
+
+    def get(self, relpath: str) -> Path:
+        """Returns the local path of a file, fetching it if needed, and pins it until `release` is called."""
+        if self._pid != os.getpid():
+            # Inherited from the parent process, which owns these files
+            self._files, self._pinned, self._pid = OrderedDict(), Counter(), os.getpid()
+
+        path = self.cache_dir / relpath
+        with self._lock:
+            self._pinned[relpath] += 1
+            if relpath in self._files:
+                self._files.move_to_end(relpath)
+                return path
+
+        if not path.is_file():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                self.fetcher.fetch(relpath, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                self.release(relpath)
+                raise
+
+        with self._lock:
+            self._files[relpath] = path.stat().st_size
+            self._evict()
+        return path
+
+    def release(self, relpath: str) -> None:
+        with self._lock:
+            self._pinned[relpath] -= 1
+            if self._pinned[relpath] <= 0:
+                del self._pinned[relpath]
+                self._evict()
+
+    def _evict(self) -> None:
+        if self.max_size_mb is None:
+            return
+        for relpath in list(self._files):
+            if self.size_mb <= self.max_size_mb:
+                break
+            if relpath in self._pinned:
+                continue
+            del self._files[relpath]
+            (self.cache_dir / relpath).unlink(missing_ok=True)
+
+
+class StreamingLeRobotDataset(torch.utils.data.IterableDataset):
+    def __init__(
+        self,
+        repo_id: str,
+        root: str | Path | None = None,
+        episodes: list[int] | None = None,
+        image_transforms: Callable | None = None,
+        delta_timestamps: dict[list[float]] | None = None,
+        tolerance_s: float = 1e-4,
+        revision: str | None = None,
+        video_backend: str | None = None,
+        fetcher: FileFetcher | None = None,
+        cache_dir: str | Path | None = None,
+        cache_size_mb: float | None = 10240,
+        prefetch_episodes: int = 2,
+        shuffle: bool = False,
+        shuffle_buffer_size: int = 0,
+        seed: int = 0,
+        uint8_images: bool = False,
+        drop_n_last_frames: int = 0,
+    ):
+        """Iterable version of `LeRobotDataset`, which streams the episodes from a remote or shared storage
+        instead of downloading the whole dataset before training.
+
+        Only the metadata is stored in 'root/meta' up front (see `LeRobotDatasetMetadata`). The data and video
+        files of the episodes are then fetched on demand with `fetcher` while iterating, into a local cache
+        of at most `cache_size_mb` in 'root/cache/stream' (or `cache_dir`). Files which already exist in
+        'root' (e.g. from a previous download) are read from there and never fetched.
+
+        The episodes are split between the DataLoader workers and the distributed (DDP) ranks, each worker of
+        each rank iterating over its own shard of episodes. The files of the next `prefetch_episodes`
+        episodes of the shard are fetched in the background while the current one is being iterated over.
+        Note that shards can have different numbers of frames: training loops should thus be bounded by a
+        number of steps rather than rely on all the ranks reaching the end of their shard at the same time.
+
+        Args:
+            repo_id (str): This is the repo id that will be used to fetch the dataset.
+            root (Path | None, optional): Local directory where the metadata is stored, defaults to
+                '$HF_LEROBOT_HOME/repo_id' like `LeRobotDataset`.
+            episodes (list[int] | None, optional): If specified, only these episodes are streamed.
+            image_transforms (Callable | None, optional): Same as `LeRobotDataset`.
+            delta_timestamps (dict[list[float]] | None, optional): Same as `LeRobotDataset`.
+            tolerance_s (float, optional): Same as `LeRobotDataset`.
+            revision (str, optional): Revision of the metadata (and of the files with the default fetcher).
+            video_backend (str | None, optional): Same as `LeRobotDataset`.
+            fetcher (FileFetcher | None, optional): Fetcher of the files of the dataset: `DirectoryFetcher`,
+                `HTTPFetcher`, or a custom `FileFetcher`. Defaults to a `HubFetcher` of 'repo_id'.
+            cache_dir (str | Path | None, optional): Directory of the cache of fetched files. Defaults to
+                'root/cache/stream'.
+            cache_size_mb (float | None, optional): Size of the cache of fetched files, split evenly between
+                the workers of all the ranks. No limit if None. Defaults to 10GB.
+            prefetch_episodes (int, optional): Number of episodes fetched ahead of the current one.
+                Defaults to 2.
+            shuffle (bool, optional): Shuffles the order of the episodes of each shard, as well as the frames
+                within each episode. Call `set_epoch` at each epoch to get a different order (e.g. with the
+                `set_epoch` argument of `cycle`), since the DataLoader workers iterate over copies of the
+                dataset. Defaults to False.
+            shuffle_buffer_size (int, optional): If `shuffle`, frames are sampled at random from a buffer of
+                this size, which mixes frames of consecutive episodes. Defaults to 0 (no buffer).
+            seed (int, optional): Seed of the shuffling, which must be the same on all the ranks.
+            uint8_images (bool, optional): Same as `LeRobotDataset`.
+            drop_n_last_frames (int, optional): Number of frames at the end of each episode which are never
+                yielded, like with `EpisodeAwareSampler`. Defaults to 0.
+        """
+        super().__init__()
+        self.repo_id = repo_id
+        self.root = Path(root) if root else HF_LEROBOT_HOME / repo_id
+        self.image_transforms = image_transforms
+        self.delta_timestamps = delta_timestamps
+        self.tolerance_s = tolerance_s
+        self.revision = revision if revision else CODEBASE_VERSION
+        self.video_backend = video_backend if video_backend else "pyav"
+        self.fetcher = fetcher if fetcher is not None else HubFetcher(repo_id, self.revision)
+        self.cache_size_mb = cache_size_mb
+        self.prefetch_episodes = prefetch_episodes
+        self.shuffle = shuffle
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.seed = seed
+        self.uint8_images = uint8_images
+        self.drop_n_last_frames = drop_n_last_frames
+        self.epoch = 0
+        self.video_decoder_cache = VideoDecoderCache()
+        self.delta_indices = None
+
+        self.fetch_metadata()
+        self.meta = LeRobotDatasetMetadata(self.repo_id, self.root, self.revision)
+        self.episodes = episodes if episodes is not None else list(range(self.meta.total_episodes))
+        self.file_cache = StreamingFileCache(
+            cache_dir if cache_dir is not None else self.root / STREAM_CACHE_DIR, self.fetcher, cache_size_mb
+        )
+
+        if self.delta_timestamps is not None:
+            check_delta_timestamps(self.delta_timestamps, self.fps, self.tolerance_s)
+            self.delta_indices = get_delta_indices(self.delta_timestamps, self.fps)
+
+    def fetch_metadata(self) -> None:
+        """Fetches the metadata files which are missing from 'root/meta'."""
+        (self.root / "meta").mkdir(parents=True, exist_ok=True)
+        if not (self.root / INFO_PATH).is_file():
+            self.fetcher.fetch(INFO_PATH, self.root / INFO_PATH)
+
+        # v2.0 datasets have a single stats file while v2.1 datasets have per-episode stats
+        version = packaging.version.parse(load_info(self.root)["codebase_version"])
+        stats_path = STATS_PATH if version < packaging.version.parse("v2.1") else EPISODES_STATS_PATH
+        for relpath in [EPISODES_PATH, TASKS_PATH, stats_path, VIDEO_INDEX_PATH]:
+            if (self.root / relpath).is_file():
+                continue
+            try:
+                self.fetcher.fetch(relpath, self.root / relpath)
+            except FileNotFoundError:
+                if relpath != VIDEO_INDEX_PATH:
+                    raise
+                logging.info(f"No video index in {self.repo_id}, seeks won't be planned from key frames.")
+
+    @property
+    def fps(self) -> int:
+        """Frames per second used during data collection."""
+        return self.meta.fps
+
+    @property
+    def num_frames(self) -> int:
+        """Number of frames in selected episodes."""
+        return sum(self.meta.episodes[ep_idx]["length"] for ep_idx in self.episodes)
+
+    @property
+    def num_episodes(self) -> int:
+        """Number of episodes selected."""
+        return len(self.episodes)
+
+    @property
+    def features(self) -> dict[str, dict]:
+        return self.meta.features
+
+    def __len__(self):
+        return self.num_frames
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch used to seed the shuffling, so that each epoch gets a different order."""
+        self.epoch = epoch
+
+    def get_shard(self) -> tuple[int, int]:
+        """Returns the index of the shard of the current process and the total number of shards, one shard
+        being assigned to each DataLoader worker of each distributed rank."""
+        rank, world_size = 0, 1
+        if dist.is_available() and dist.is_initialized():
+            rank, world_size = dist.get_rank(), dist.get_world_size()
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info else (0, 1)
+        return rank * num_workers + worker_id, world_size * num_workers
+
+    def get_shard_episodes(self) -> list[int]:
+        shard_id, num_shards = self.get_shard()
+        episodes = list(self.episodes)
+        if self.shuffle:
+            # Same permutation on all the shards, so that they are disjoint
+            random.Random(self.seed + self.epoch).shuffle(episodes)
+        return episodes[shard_id::num_shards]
+
+    def get_episode_file_paths(self, ep_idx: int) -> list[str]:
+        fpaths = [str(self.meta.get_data_file_path(ep_idx))]
+        fpaths += [str(self.meta.get_video_file_path(ep_idx, vid_key)) for vid_key in self.meta.video_keys]
+        return fpaths
+
+    def _get_episode_files(self, ep_idx: int) -> dict[str, Path]:
+        """Returns the local path of each file of an episode, fetching the ones which are not in 'root'."""
+        paths = {}
+        for relpath in self.get_episode_file_paths(ep_idx):
+            local_path = self.root / relpath
+            paths[relpath] = local_path if local_path.is_file() else self.file_cache.get(relpath)
+        return paths
+
+    def _release_episode_files(self, paths: dict[str, Path]) -> None:
+        for relpath, path in paths.items():
+            if path != self.root / relpath:
+                self.file_cache.release(relpath)
+
+    def __iter__(self) -> Iterator[dict]:
+        episodes = self.get_shard_episodes()
+        if self.cache_size_mb is not None:
+            self.file_cache.max_size_mb = self.cache_size_mb / self.get_shard()[1]
+        rng = random.Random(self.seed + self.epoch + 1 + self.get_shard()[0])
+
+        items = self._iter_episodes(episodes, rng)
+        if not (self.shuffle and self.shuffle_buffer_size > 0):
+            yield from items
+            return
+
+        buffer = []
+        for item in items:
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(item)
+                continue
+            pos = rng.randrange(len(buffer))
+            yield buffer[pos]
+            buffer[pos] = item
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _iter_episodes(self, episodes: list[int], rng: random.Random) -> Iterator[dict]:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            prefetched: OrderedDict[int, Future] = OrderedDict()
+            try:
+                for i, ep_idx in enumerate(episodes):
+                    for next_ep_idx in episodes[i : i + 1 + self.prefetch_episodes]:
+                        if next_ep_idx not in prefetched:
+                            prefetched[next_ep_idx] = executor.submit(self._get_episode_files, next_ep_idx)
+
+                    paths = prefetched.pop(ep_idx).result()
+                    try:
+                        yield from self._iter_episode(ep_idx, paths, rng)
+                    finally:
+                        self._release_episode_files(paths)
+            finally:
+                for future in prefetched.values():
+                    if not future.cancel() and future.exception() is None:
+                        self._release_episode_files(future.result())
+
+    def load_episode(self, data_path: Path) -> dict[str, torch.Tensor | list]:
+        """Loads all the frames of an episode as a dict of tensors (or of lists for strings)."""
+        hf_dataset = datasets.Dataset(pq.read_table(data_path))
+        columns = hf_transform_to_torch(hf_dataset[:], uint8_images=self.uint8_images)
+        return {
+            key: torch.stack(val) if len(val) > 0 and isinstance(val[0], torch.Tensor) else val
+            for key, val in columns.items()
+        }
+
+    def _iter_episode(self, ep_idx: int, paths: dict[str, Path], rng: random.Random) -> Iterator[dict]:
+        episode = self.load_episode(paths[str(self.meta.get_data_file_path(ep_idx))])
+        ep_length = len(episode["timestamp"])
+        frame_indices = list(range(max(ep_length - self.drop_n_last_frames, 0)))
+        if self.shuffle:
+            rng.shuffle(frame_indices)
+
+        for frame_idx in frame_indices:
+            item = {key: val[frame_idx] for key, val in episode.items()}
+
+            query_indices = None
+            if self.delta_indices is not None:
+                query_indices = {
+                    key: [max(0, min(ep_length - 1, frame_idx + delta)) for delta in delta_idx]
+                    for key, delta_idx in self.delta_indices.items()
+                }
+                for key, delta_idx in self.delta_indices.items():
+                    item[f"{key}_is_pad"] = torch.BoolTensor(
+                        [(frame_idx + delta < 0) | (frame_idx + delta >= ep_length) for delta in delta_idx]
+                    )
+                    if key not in self.meta.video_keys:
+                        item[key] = episode[key][query_indices[key]]
+
+            video_frames = {}
+            for vid_key in self.meta.video_keys:
+                if query_indices is not None and vid_key in query_indices:
+                    query_ts = episode["timestamp"][query_indices[vid_key]].tolist()
+                else:
+                    query_ts = [item["timestamp"].item()]
+                video_path = paths[str(self.meta.get_video_file_path(ep_idx, vid_key))]
+                frames = decode_video_frames_by_spans(
+                    video_path,
+                    query_ts,
+                    self.tolerance_s,
+                    self.video_backend,
+                    decoder_cache=self.video_decoder_cache,
+                    return_uint8=self.uint8_images,
+                    frames_index=self.meta.video_index.get(ep_idx, {}).get(vid_key),
+                )
+                video_frames[vid_key] = frames.squeeze(0)
+            item = {**video_frames, **item}
+
+            if self.image_transforms is not None:
+                for cam in self.meta.camera_keys:
+                    item[cam] = self.image_transforms(item[cam])
+
+            # Add task as a string
+            item["task"] = self.meta.tasks[item["task_index"].item()]
+            yield item
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({{\n"
+            f"    Repository ID: '{self.repo_id}',\n"
+            f"    Number of selected episodes: '{self.num_episodes}',\n"
+            f"    Number of selected samples: '{self.num_frames}',\n"
+            f"    Features: '{list(self.features)}',\n"
+            f"    Fetcher: '{self.fetcher.__class__.__name__}',\n"
+            "})',\n"
+        )
@@ -14,20 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import contextlib
+import hashlib
 import importlib.resources
 import json
 import logging
+import os
+import shutil
 from collections.abc import Iterator
 from itertools import accumulate
 from pathlib import Path
 from pprint import pformat
 from types import SimpleNamespace
-from typing import Any
+from typing import Any, Callable
 
 import datasets
 import jsonlines
 import numpy as np
 import packaging.version
+import pyarrow as pa
 import torch
 from datasets.table import embed_table_storage
 from huggingface_hub import DatasetCard, DatasetCardData, HfApi
@@ -51,6 +55,11 @@ EPISODES_PATH = "meta/episodes.jsonl"
 STATS_PATH = "meta/stats.json"
 EPISODES_STATS_PATH = "meta/episodes_stats.jsonl"
 TASKS_PATH = "meta/tasks.jsonl"
+VIDEO_INDEX_PATH = "meta/video_index.jsonl"
+VALIDATION_PATH = "meta/validation.json"
+COLUMNAR_CACHE_DIR = "cache/columns"
+FRAME_CACHE_DIR = "cache/frames"
+STREAM_CACHE_DIR = "cache/stream"
 
 DEFAULT_VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
 DEFAULT_PARQUET_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
@@ -229,6 +238,30 @@ def write_episode_stats(episode_index: int, episode_stats: dict, local_dir: Path
     append_jsonlines(episode_stats, local_dir / EPISODES_STATS_PATH)
 
 
+def write_video_index(episode_index: int, video_key: str, frames_index: dict, local_dir: Path):
+    frames_index = {
+        "episode_index": episode_index,
+        "video_key": video_key,
+        **{key: val.tolist() if isinstance(val, np.ndarray) else val for key, val in frames_index.items()},
+    }
+    append_jsonlines(frames_index, local_dir / VIDEO_INDEX_PATH)
+
+
+def load_video_index(local_dir: Path) -> dict[int, dict[str, dict]]:
+    if not (local_dir / VIDEO_INDEX_PATH).is_file():
+        return {}
+
+    video_index = {}
+    for item in load_jsonlines(local_dir / VIDEO_INDEX_PATH):
+        frames_index = {
+            "time_base": item["time_base"],
+            "pts": np.array(item["pts"], dtype=np.int64),
+            "keyframes": np.array(item["keyframes"], dtype=np.int64),
+        }
+        video_index.setdefault(item["episode_index"], {})[item["video_key"]] = frames_index
+    return video_index
+
+
 def load_episodes_stats(local_dir: Path) -> dict:
     episodes_stats = load_jsonlines(local_dir / EPISODES_STATS_PATH)
     return {
@@ -237,6 +270,56 @@ def load_episodes_stats(local_dir: Path) -> dict:
     }
 
 
+def get_columnar_cache_dir(local_dir: Path, cache_key: dict) -> Path:
+    """Each cache lives in its own directory named after a hash of `cache_key` (e.g. the dataset version and
+    the selected episodes), so that a new cache is built whenever one of them changes.
+    """
+    return local_dir / COLUMNAR_CACHE_DIR / hash_key(cache_key)
+
+
+def get_frame_cache_dir(local_dir: Path, cache_key: dict) -> Path:
+    """Like the columnar caches, each cache of decoded frames lives in its own directory named after a hash of
+    `cache_key` (e.g. the dataset revision, the video backend and the resolution of the frames).
+    """
+    return local_dir / FRAME_CACHE_DIR / hash_key(cache_key)
+
+
+def hash_key(key: dict) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def is_validated(local_dir: Path, validation_key: dict) -> bool:
+    """Whether the checks identified by `validation_key` (e.g. the check, the dataset version and the selected
+    episodes) already passed, as recorded in 'meta/validation.json' by `write_validated`."""
+    fpath = local_dir / VALIDATION_PATH
+    return fpath.is_file() and hash_key(validation_key) in load_json(fpath)
+
+
+def write_validated(local_dir: Path, validation_key: dict) -> None:
+    fpath = local_dir / VALIDATION_PATH
+    validated = load_json(fpath) if fpath.is_file() else []
+    if hash_key(validation_key) not in validated:
+        write_json(validated + [hash_key(validation_key)], fpath)
+
+
+def write_columnar_cache(columns: dict[str, np.ndarray], cache_dir: Path) -> None:
+    # Write in a temporary directory first so that a partially written cache is never loaded
+    tmp_dir = cache_dir.parent / f"{cache_dir.name}.tmp-{os.getpid()}"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    for key, array in columns.items():
+        np.save(tmp_dir / f"{key}.npy", array)
+
+    try:
+        tmp_dir.rename(cache_dir)
+    except OSError:
+        # The same cache has already been written by another process
+        shutil.rmtree(tmp_dir)
+
+
+def load_columnar_cache(cache_dir: Path) -> dict[str, np.ndarray]:
+    return {fpath.stem: np.load(fpath, mmap_mode="r") for fpath in sorted(cache_dir.glob("*.npy"))}
+
+
 def backward_compatible_episodes_stats(
     stats: dict[str, dict[str, np.ndarray]], episodes: list[int]
 ) -> dict[str, dict[str, np.ndarray]]:
@@ -246,8 +329,12 @@ def backward_compatible_episodes_stats(
 def load_image_as_numpy(
     fpath: str | Path, dtype: np.dtype = np.float32, channel_first: bool = True
 ) -> np.ndarray:
-    img = PILImage.open(fpath).convert("RGB")
-    img_array = np.array(img, dtype=dtype)
+    if Path(fpath).suffix == ".npy":
+        # Raw (H, W, C) uint8 frames, see `IMAGE_FORMATS`
+        img_array = np.load(fpath).astype(dtype)
+    else:
+        img = PILImage.open(fpath).convert("RGB")
+        img_array = np.array(img, dtype=dtype)
     if channel_first:  # (H, W, C) -> (C, H, W)
         img_array = np.transpose(img_array, (2, 0, 1))
     if np.issubdtype(dtype, np.floating):
@@ -255,16 +342,16 @@ def load_image_as_numpy(
     return img_array
 
 
-def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
+def hf_transform_to_torch(items_dict: dict[torch.Tensor | None], uint8_images: bool = False):
     """Get a transform function that convert items from Hugging Face dataset (pyarrow)
     to torch tensors. Importantly, images are converted from PIL, which corresponds to
     a channel last representation (h w c) of uint8 type, to a torch image representation
-    with channel first (c h w) of float32 type in range [0,1].
+    with channel first (c h w) of float32 type in range [0,1], or of uint8 type if `uint8_images`.
     """
     for key in items_dict:
         first_item = items_dict[key][0]
         if isinstance(first_item, PILImage.Image):
-            to_tensor = transforms.ToTensor()
+            to_tensor = transforms.PILToTensor() if uint8_images else transforms.ToTensor()
             items_dict[key] = [to_tensor(img) for img in items_dict[key]]
         elif first_item is None:
             pass
@@ -273,6 +360,81 @@ def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
     return items_dict
 
 
+def arrow_column_to_numpy(
+    column: pa.ChunkedArray | pa.Array, feature: datasets.features.features.FeatureType
+) -> np.ndarray | list:
+    """Converts a whole pyarrow column of numerical values to a single numpy array of shape
+    (num_rows, *feature_shape). Booleans are kept as is, integers are cast to int64 and floats to float32 to
+    match the dtypes produced by `hf_transform_to_torch`. Strings are returned as a python list.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        return column.to_pylist()
+
+    if isinstance(feature, datasets.Sequence):
+        array = column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), -1)
+    else:
+        array = column.to_numpy(zero_copy_only=False)
+
+    if np.issubdtype(array.dtype, np.integer):
+        array = array.astype(np.int64, copy=False)
+    elif np.issubdtype(array.dtype, np.floating):
+        array = array.astype(np.float32, copy=False)
+
+    return array
+
+
+def arrow_column_to_torch(
+    column: pa.ChunkedArray | pa.Array,
+    feature: datasets.features.features.FeatureType,
+    uint8_images: bool = False,
+) -> torch.Tensor | list:
+    """Batched counterpart of `hf_transform_to_torch` which converts a whole pyarrow column at once instead
+    of row by row. Numerical columns are converted to a single stacked tensor with the same dtypes that
+    `hf_transform_to_torch` would produce. Images are decoded to channel first (c h w) float32 tensors in
+    range [0,1] (or uint8 tensors if `uint8_images`) and stacked. Strings and null columns are returned as
+    python lists.
+    """
+    if column.null_count == len(column):
+        return column.to_pylist()
+
+    if isinstance(feature, datasets.Image):
+        to_tensor = transforms.PILToTensor() if uint8_images else transforms.ToTensor()
+        return torch.stack([to_tensor(feature.decode_example(img)) for img in column.to_pylist()])
+
+    array = arrow_column_to_numpy(column, feature)
+    if isinstance(array, list):
+        return array
+    if np.issubdtype(array.dtype, np.floating):
+        return torch.tensor(array, dtype=torch.get_default_dtype())
+    return torch.tensor(array)
+
+
+def take_hf_dataset_rows(
+    hf_dataset: datasets.Dataset, rows: np.ndarray, columns: list[str] | None = None
+) -> pa.Table:
+    """Reads the given rows of `hf_dataset` as a pyarrow table, without applying its transform.
+
+    The rows are taken at once from the arrow table backing the dataset, through its indices mapping if it has
+    one (e.g. after `select`). As these are internals of `datasets`, the public (but several times slower)
+    arrow formatting of the dataset is used instead when they aren't as expected.
+    """
+    table = getattr(getattr(hf_dataset, "data", None), "table", None)
+    indices = getattr(hf_dataset, "_indices", ...)
+    if indices is not None:
+        indices = getattr(indices, "table", None)
+    if not isinstance(table, pa.Table) or not (indices is None or isinstance(indices, pa.Table)):
+        return hf_dataset.with_format("arrow", columns=columns)[rows]
+
+    if indices is not None:
+        rows = indices.column(0).to_numpy()[rows]
+    if columns is not None:
+        table = table.select(columns)
+    return table.take(rows)
+
+
 def is_valid_version(version: str) -> bool:
     try:
         packaging.version.parse(version)
@@ -499,34 +661,30 @@ def check_timestamps_sync(
             f"Found {timestamps.shape=} and {episode_indices.shape=}."
         )
 
+    timestamps = np.asarray(timestamps)
+    episode_indices = np.asarray(episode_indices)
+
     # Consecutive differences
     diffs = np.diff(timestamps)
-    within_tolerance = np.abs(diffs - (1.0 / fps)) <= tolerance_s
+    outside_tolerance = np.abs(diffs - (1.0 / fps)) > tolerance_s
 
-    # Mask to ignore differences at the boundaries between episodes
-    mask = np.ones(len(diffs), dtype=bool)
+    # Ignore differences at the boundaries between episodes
     ignored_diffs = episode_data_index["to"][:-1] - 1  # indices at the end of each episode
-    mask[ignored_diffs] = False
-    filtered_within_tolerance = within_tolerance[mask]
+    outside_tolerance[ignored_diffs] = False
 
     # Check if all remaining diffs are within tolerance
-    if not np.all(filtered_within_tolerance):
-        # Track original indices before masking
-        original_indices = np.arange(len(diffs))
-        filtered_indices = original_indices[mask]
-        outside_tolerance_filtered_indices = np.nonzero(~filtered_within_tolerance)[0]
-        outside_tolerance_indices = filtered_indices[outside_tolerance_filtered_indices]
-
-        outside_tolerances = []
-        for idx in outside_tolerance_indices:
-            entry = {
-                "timestamps": [timestamps[idx], timestamps[idx + 1]],
-                "diff": diffs[idx],
-                "episode_index": episode_indices[idx].item()
-                if hasattr(episode_indices[idx], "item")
-                else episode_indices[idx],
-            }
-            outside_tolerances.append(entry)
+    if outside_tolerance.any():
+        outside_tolerance_indices = np.flatnonzero(outside_tolerance)
+        outside_tolerances = [
+            {"timestamps": [ts, next_ts], "diff": diff, "episode_index": ep_idx}
+            for ts, next_ts, diff, ep_idx in zip(
+                timestamps[outside_tolerance_indices].tolist(),
+                timestamps[outside_tolerance_indices + 1].tolist(),
+                diffs[outside_tolerance_indices].tolist(),
+                episode_indices[outside_tolerance_indices].tolist(),
+                strict=True,
+            )
+        ]
 
         if raise_value_error:
             raise ValueError(
@@ -577,19 +735,48 @@ def get_delta_indices(delta_timestamps: dict[str, list[float]], fps: int) -> dic
     return delta_indices
 
 
-def cycle(iterable):
+def cycle(iterable, set_epoch: Callable[[int], None] | None = None):
     """The equivalent of itertools.cycle, but safe for Pytorch dataloaders.
 
     See https://github.com/pytorch/pytorch/issues/23900 for information on why itertools.cycle is not safe.
+
+    If given, `set_epoch` is called with the index of each pass over `iterable` before it starts, e.g. so that
+    a dataset iterated by the workers of a dataloader, which get a new copy of it at each pass, is reshuffled.
     """
+    epoch = 0
+    if set_epoch is not None:
+        set_epoch(epoch)
     iterator = iter(iterable)
     while True:
         try:
             yield next(iterator)
         except StopIteration:
+            epoch += 1
+            if set_epoch is not None:
+                set_epoch(epoch)
             iterator = iter(iterable)
 
 
+def get_batch_size(batch: dict) -> int:
+    """Returns the number of samples of a batch, i.e. the first dimension of its tensors."""
+    return len(next(value for value in batch.values() if isinstance(value, torch.Tensor)))
+
+
+def split_batch(batch: dict, micro_batch_size: int) -> list[dict]:
+    """Splits a batch into consecutive micro-batches of `micro_batch_size` samples (the last one may be
+    smaller). Tensors are split along their first dimension and lists (e.g. the tasks) are sliced, other
+    values are shared by all the micro-batches."""
+    if micro_batch_size < 1:
+        raise ValueError(f"`micro_batch_size` must be at least 1 ({micro_batch_size=}).")
+    return [
+        {
+            key: value[start : start + micro_batch_size] if isinstance(value, (torch.Tensor, list)) else value
+            for key, value in batch.items()
+        }
+        for start in range(0, get_batch_size(batch), micro_batch_size)
+    ]
+
+
 def create_branch(repo_id, *, branch: str, repo_type: str | None = None) -> None:
     """Create a branch on a existing Hugging Face repo. Delete the branch if it already
     exists before creating it.
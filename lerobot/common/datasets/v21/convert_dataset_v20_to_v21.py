@@ -16,7 +16,8 @@
 This script will help you convert any LeRobot dataset already pushed to the hub from codebase version 2.0 to
 2.1. It will:
 
-- Generate per-episodes stats and writes them in `episodes_stats.jsonl`
+- Generate per-episodes stats and writes them in `episodes_stats.jsonl` (see `compute_dataset_stats.py`,
+  use `--resume` to continue an interrupted conversion)
 - Check consistency between these new stats and the old ones.
 - Remove the deprecated `stats.json`.
 - Update codebase_version in `info.json`.
@@ -57,14 +58,15 @@ def convert_dataset(
     repo_id: str,
     branch: str | None = None,
     num_workers: int = 4,
+    resume: bool = False,
 ):
     with SuppressWarnings():
         dataset = LeRobotDataset(repo_id, revision=V20, force_cache_sync=True)
 
-    if (dataset.root / EPISODES_STATS_PATH).is_file():
+    if not resume and (dataset.root / EPISODES_STATS_PATH).is_file():
         (dataset.root / EPISODES_STATS_PATH).unlink()
 
-    convert_stats(dataset, num_workers=num_workers)
+    convert_stats(dataset, num_workers=num_workers, resume=resume)
     ref_stats = load_stats(dataset.root)
     check_aggregate_stats(dataset, ref_stats)
 
@@ -109,6 +111,11 @@ if __name__ == "__main__":
         default=4,
         help="Number of workers for parallelizing stats compute. Defaults to 4.",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the stats compute from the episodes already in `episodes_stats.jsonl`.",
+    )
 
     args = parser.parse_args()
     convert_dataset(**vars(args))
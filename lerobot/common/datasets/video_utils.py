@@ -15,30 +15,55 @@
 # limitations under the License.
 import json
 import logging
+import os
+import queue
 import subprocess
+import threading
 import warnings
 from collections import OrderedDict
 from dataclasses import dataclass, field
+from fractions import Fraction
 from pathlib import Path
 from typing import Any, ClassVar
 
+import av
+import numpy as np
 import pyarrow as pa
 import torch
 import torchvision
 from datasets.features.features import register_feature
 from PIL import Image
 
+from lerobot.common.datasets.compute_stats import ImageStats
+from lerobot.common.datasets.image_writer import image_array_to_pil_image
+from lerobot.common.datasets.utils import load_image_as_numpy
 
-def decode_video_frames_torchvision(
-    video_path: Path | str,
-    timestamps: list[float],
-    tolerance_s: float,
-    backend: str = "pyav",
-    log_loaded_timestamps: bool = False,
-) -> torch.Tensor:
-    """Loads frames associated to the requested timestamps of a video
 
-    The backend can be either "pyav" (default) or "video_reader".
+class VideoBackend:
+    """Base class of the video decoding backends, registered by name in `VIDEO_BACKENDS`.
+
+    A backend opens a reader for a video file (which can be kept open by a `VideoDecoderCache`) and loads
+    the frames from the key frame preceding the first requested timestamp up to the last requested one.
+    Selecting the closest frames and checking the tolerance is left to `decode_video_frames`.
+    """
+
+    def open(self, video_path: str) -> Any:
+        raise NotImplementedError
+
+    def close(self, reader: Any) -> None:
+        raise NotImplementedError
+
+    def load_frames(
+        self, reader: Any, timestamps: list[float], tolerance_s: float
+    ) -> tuple[torch.Tensor, list[float]]:
+        """Returns the loaded frames as a uint8 (n, c, h, w) tensor along with their timestamps. Frames that
+        are at least `tolerance_s` away from all the requested timestamps may be skipped."""
+        raise NotImplementedError
+
+
+class TorchvisionVideoBackend(VideoBackend):
+    """Decodes with `torchvision.io.VideoReader`, using either torchvision's "pyav" or "video_reader" backend.
+
     "video_reader" requires installing torchvision from source, see:
     https://github.com/pytorch/vision/blob/main/torchvision/csrc/io/decoder/gpu/README.rst
     (note that you need to compile against ffmpeg<4.3)
@@ -48,6 +73,199 @@ def decode_video_frames_torchvision(
 
     See torchvision doc for more info on these two backends:
     https://pytorch.org/vision/0.18/index.html?highlight=backend#torchvision.set_video_backend
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+
+    def open(self, video_path: str) -> torchvision.io.VideoReader:
+        torchvision.set_video_backend(self.backend)
+        # TODO(rcadene): also load audio stream at the same time
+        return torchvision.io.VideoReader(video_path, "video")
+
+    def close(self, reader: torchvision.io.VideoReader) -> None:
+        # Only the pyav backend keeps a python container open, "video_reader" is handled by torchvision
+        if self.backend == "pyav":
+            reader.container.close()
+
+    def load_frames(
+        self, reader: torchvision.io.VideoReader, timestamps: list[float], tolerance_s: float
+    ) -> tuple[torch.Tensor, list[float]]:
+        # set the first and last requested timestamps
+        # Note: previous timestamps are usually loaded, since we need to access the previous key frame
+        first_ts = min(timestamps)
+        last_ts = max(timestamps)
+
+        # access closest key frame of the first requested frame
+        # Note: closest key frame timestamp is usually smaller than `first_ts` (e.g. key frame can be the first frame of the video)
+        # for details on what `seek` is doing see: https://pyav.basswood-io.com/docs/stable/api/container.html?highlight=inputcontainer#av.container.InputContainer.seek
+        keyframes_only = self.backend == "pyav"  # pyav doesnt support accuracte seek
+        reader.seek(first_ts, keyframes_only=keyframes_only)
+
+        # load all frames until last requested frame
+        loaded_frames = []
+        loaded_ts = []
+        for frame in reader:
+            current_ts = frame["pts"]
+            loaded_frames.append(frame["data"])
+            loaded_ts.append(current_ts)
+            if current_ts >= last_ts:
+                break
+
+        return torch.stack(loaded_frames), loaded_ts
+
+
+class PyAVVideoBackend(VideoBackend):
+    """Decodes with PyAV directly. It seeks to the key frame preceding the first requested timestamp, then
+    decodes forward and only converts the frames within `tolerance_s` of the requested span, which are
+    written into a preallocated numpy buffer. The codec decodes with multiple threads (`thread_type="AUTO"`),
+    `thread_count=0` letting ffmpeg choose the number of threads.
+    """
+
+    def __init__(self, thread_count: int = 0):
+        self.thread_count = thread_count
+
+    def open(self, video_path: str) -> av.container.InputContainer:
+        container = av.open(video_path)
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = self.thread_count
+        return container
+
+    def close(self, reader: av.container.InputContainer) -> None:
+        reader.close()
+
+    def load_frames(
+        self, reader: av.container.InputContainer, timestamps: list[float], tolerance_s: float
+    ) -> tuple[torch.Tensor, list[float]]:
+        stream = reader.streams.video[0]
+        first_ts = min(timestamps)
+        last_ts = max(timestamps)
+
+        # `seek` goes to the closest key frame before the given position, expressed in `stream.time_base` units
+        reader.seek(max(0, int(first_ts / stream.time_base)), stream=stream)
+
+        height, width = stream.codec_context.height, stream.codec_context.width
+        fps = float(stream.average_rate or stream.guessed_rate)
+        num_frames = int(np.ceil((last_ts - first_ts + 2 * tolerance_s) * fps)) + 2
+        buffer = np.empty((num_frames, height, width, 3), dtype=np.uint8)
+
+        query_ts = np.asarray(timestamps)
+        loaded_ts = []
+        for frame in reader.decode(stream):
+            current_ts = frame.time
+            if current_ts > last_ts + tolerance_s:
+                # past the requested span, even if no frame was close enough to the last timestamp
+                break
+            if np.abs(query_ts - current_ts).min() >= tolerance_s:
+                # decoded to reach the requested frames, but too far to be one of them
+                continue
+            if len(loaded_ts) == len(buffer):
+                buffer = np.concatenate([buffer, np.empty_like(buffer)])
+            plane = frame.reformat(format="rgb24").planes[0]
+            rows = np.frombuffer(plane, dtype=np.uint8).reshape(height, plane.line_size)
+            buffer[len(loaded_ts)] = rows[:, : width * 3].reshape(height, width, 3)
+            loaded_ts.append(current_ts)
+            if current_ts >= last_ts:
+                break
+
+        return torch.from_numpy(buffer[: len(loaded_ts)]).permute(0, 3, 1, 2), loaded_ts
+
+
+VIDEO_BACKENDS: dict[str, VideoBackend] = {}
+
+
+def register_video_backend(name: str, backend: VideoBackend) -> None:
+    """Makes a backend available to `decode_video_frames`, and thus to the `video_backend` of LeRobotDataset."""
+    VIDEO_BACKENDS[name] = backend
+
+
+register_video_backend("pyav", TorchvisionVideoBackend("pyav"))
+register_video_backend("video_reader", TorchvisionVideoBackend("video_reader"))
+register_video_backend("pyav_native", PyAVVideoBackend())
+
+
+class VideoDecoderCache:
+    """LRU cache of opened video readers, keyed by (video_path, backend), so that a video container is
+    opened and parsed once and then reused by the following decoding calls.
+
+    At most `max_open_readers` readers (and their file handles) are kept open, the least recently used one
+    being closed when a new one has to be opened. The cache is local to a process: readers opened in a parent
+    process are never reused in its (forked) dataloader workers, and they are not pickled either. Each worker
+    thus opens its own readers the first time it needs them.
+    """
+
+    def __init__(self, max_open_readers: int = 32):
+        if max_open_readers < 1:
+            raise ValueError(f"`max_open_readers` must be at least 1 ({max_open_readers=}).")
+        self.max_open_readers = max_open_readers
+        self._readers: OrderedDict[tuple[str, str], Any] = OrderedDict()
+        self._pid = os.getpid()
+
+    def __len__(self) -> int:
+        return len(self._readers)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._readers
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_readers"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._pid = os.getpid()
+
+    def get(self, video_path: Path | str, backend: str = "pyav") -> Any:
+        if self._pid != os.getpid():
+            # Inherited from the parent process: don't touch these readers, the parent still owns them.
+            self._readers = OrderedDict()
+            self._pid = os.getpid()
+
+        key = (str(video_path), backend)
+        if key in self._readers:
+            self._readers.move_to_end(key)
+            return self._readers[key]
+
+        reader = VIDEO_BACKENDS[backend].open(key[0])
+        self._readers[key] = reader
+        while len(self._readers) > self.max_open_readers:
+            (_, lru_backend), lru_reader = self._readers.popitem(last=False)
+            VIDEO_BACKENDS[lru_backend].close(lru_reader)
+
+        return reader
+
+    def clear(self) -> None:
+        if self._pid == os.getpid():
+            for (_, backend), reader in self._readers.items():
+                VIDEO_BACKENDS[backend].close(reader)
+        self._readers = OrderedDict()
+
+
+def decode_video_frames(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+    backend: str = "pyav",
+    log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    return_uint8: bool = False,
+    frames_index: dict | None = None,
+) -> torch.Tensor:
+    """Loads frames associated to the requested timestamps of a video, with one of the `VIDEO_BACKENDS`:
+    "pyav" (default) and "video_reader" decode with torchvision (see `TorchvisionVideoBackend`), while
+    "pyav_native" uses PyAV directly with accurate seeks and threaded decoding (see `PyAVVideoBackend`).
+
+    If a `decoder_cache` is provided, the video reader is taken from it and left open for the next calls
+    instead of being opened and closed every time.
+
+    Frames are returned as float32 in [0,1] range (channel first), or as uint8 if `return_uint8` is set, in
+    which case the conversion is left to the caller (e.g. after the transfer to the GPU).
+
+    If the `frames_index` of the video is provided (see `get_video_frames_index`), the tolerance is checked
+    against the timestamps of the frames before decoding anything, and only the closest frames are decoded:
+    they are grouped by their preceding key frame, and each group is decoded with its own seek.
 
     Note: Video benefits from inter-frame compression. Instead of storing every frame individually,
     the encoder stores a reference frame (or a key frame) and subsequent frames as differences relative to
@@ -55,51 +273,86 @@ def decode_video_frames_torchvision(
     and all subsequent frames until reaching the requested frame. The number of key frames in a video
     can be adjusted during encoding to take into account decoding time and video size in bytes.
     """
+    if backend not in VIDEO_BACKENDS:
+        raise ValueError(f"Unknown video backend '{backend}'. Available backends: {list(VIDEO_BACKENDS)}.")
+
     video_path = str(video_path)
+    if frames_index is not None:
+        frames_ts = get_frames_timestamps(frames_index)
+        closest = np.unique(find_closest_frames(timestamps, frames_ts, tolerance_s, video_path, backend))
+        # frames closer than the tolerance to the target frames are of no use, don't decode them
+        load_tolerance_s = (
+            min(tolerance_s, np.diff(frames_ts).min() / 2) if len(frames_ts) > 1 else tolerance_s
+        )
+        groups = np.searchsorted(frames_index["keyframes"], closest, side="right") - 1
+        spans = [span.tolist() for span in np.split(frames_ts[closest], np.flatnonzero(np.diff(groups)) + 1)]
+    else:
+        load_tolerance_s = tolerance_s
+        spans = [timestamps]
 
-    # set backend
-    keyframes_only = False
-    torchvision.set_video_backend(backend)
-    if backend == "pyav":
-        keyframes_only = True  # pyav doesnt support accuracte seek
-
-    # set a video stream reader
-    # TODO(rcadene): also load audio stream at the same time
-    reader = torchvision.io.VideoReader(video_path, "video")
-
-    # set the first and last requested timestamps
-    # Note: previous timestamps are usually loaded, since we need to access the previous key frame
-    first_ts = min(timestamps)
-    last_ts = max(timestamps)
-
-    # access closest key frame of the first requested frame
-    # Note: closest key frame timestamp is usually smaller than `first_ts` (e.g. key frame can be the first frame of the video)
-    # for details on what `seek` is doing see: https://pyav.basswood-io.com/docs/stable/api/container.html?highlight=inputcontainer#av.container.InputContainer.seek
-    reader.seek(first_ts, keyframes_only=keyframes_only)
-
-    # load all frames until last requested frame
-    loaded_frames = []
-    loaded_ts = []
-    for frame in reader:
-        current_ts = frame["pts"]
-        if log_loaded_timestamps:
-            logging.info(f"frame loaded at timestamp={current_ts:.4f}")
-        loaded_frames.append(frame["data"])
-        loaded_ts.append(current_ts)
-        if current_ts >= last_ts:
-            break
+    video_backend = VIDEO_BACKENDS[backend]
+    if decoder_cache is not None:
+        reader = decoder_cache.get(video_path, backend)
+    else:
+        reader = video_backend.open(video_path)
+
+    loaded = [video_backend.load_frames(reader, span, load_tolerance_s) for span in spans]
+    loaded_frames = torch.cat([frames for frames, _ in loaded])
+    loaded_ts = [ts for _, span_ts in loaded for ts in span_ts]
+    if len(loaded) > 1:
+        # the spans may overlap if a backend seeks further back than the preceding key frame
+        order = np.argsort(loaded_ts, kind="stable")
+        loaded_frames, loaded_ts = (
+            loaded_frames[torch.from_numpy(order)],
+            np.asarray(loaded_ts)[order].tolist(),
+        )
 
-    if backend == "pyav":
-        reader.container.close()
+    if decoder_cache is None:
+        video_backend.close(reader)
 
     reader = None
 
-    query_ts = torch.tensor(timestamps)
-    loaded_ts = torch.tensor(loaded_ts)
+    if log_loaded_timestamps:
+        for current_ts in loaded_ts:
+            logging.info(f"frame loaded at timestamp={current_ts:.4f}")
+
+    # get closest frames to the query timestamps
+    argmin_ = find_closest_frames(timestamps, loaded_ts, tolerance_s, video_path, backend)
+    closest_frames = loaded_frames[torch.from_numpy(argmin_)]
+    closest_ts = np.asarray(loaded_ts)[argmin_]
 
-    # compute distances between each query timestamp and timestamps of all loaded frames
-    dist = torch.cdist(query_ts[:, None], loaded_ts[:, None], p=1)
-    min_, argmin_ = dist.min(1)
+    if log_loaded_timestamps:
+        logging.info(f"{closest_ts=}")
+
+    # convert to the pytorch format which is float32 in [0,1] range (and channel first)
+    if not return_uint8:
+        closest_frames = closest_frames.type(torch.float32) / 255
+
+    assert len(timestamps) == len(closest_frames)
+    return closest_frames
+
+
+def find_closest_frames(
+    timestamps: list[float] | np.ndarray,
+    frames_ts: list[float] | np.ndarray,
+    tolerance_s: float,
+    video_path: Path | str = "",
+    backend: str = "",
+) -> np.ndarray:
+    """Returns the index of the closest frame (in `frames_ts`, which is sorted) to each query timestamp, and
+    checks that they are all within `tolerance_s`."""
+    query_ts = np.asarray(timestamps, dtype=np.float64)
+    frames_ts = np.asarray(frames_ts, dtype=np.float64)
+    if len(frames_ts) == 0:
+        argmin_ = np.zeros(len(query_ts), dtype=np.int64)
+        min_ = np.full(len(query_ts), np.inf)
+    else:
+        right = np.minimum(np.searchsorted(frames_ts, query_ts), len(frames_ts) - 1)
+        left = np.maximum(right - 1, 0)
+        # ties go to the earliest frame
+        use_left = np.abs(query_ts - frames_ts[left]) <= np.abs(frames_ts[right] - query_ts)
+        argmin_ = np.where(use_left, left, right)
+        min_ = np.abs(query_ts - frames_ts[argmin_])
 
     is_within_tol = min_ < tolerance_s
     assert is_within_tol.all(), (
@@ -108,23 +361,250 @@ def decode_video_frames_torchvision(
         "This might be due to synchronization issues with timestamps during data collection."
         "To be safe, we advise to ignore this item during training."
         f"\nqueried timestamps: {query_ts}"
-        f"\nloaded timestamps: {loaded_ts}"
+        f"\nloaded timestamps: {frames_ts}"
         f"\nvideo: {video_path}"
         f"\nbackend: {backend}"
     )
+    return argmin_
 
-    # get closest frames to the query timestamps
-    closest_frames = torch.stack([loaded_frames[idx] for idx in argmin_])
-    closest_ts = loaded_ts[argmin_]
 
-    if log_loaded_timestamps:
-        logging.info(f"{closest_ts=}")
+def get_video_frames_index(video_path: Path | str) -> dict:
+    """Reads the presentation timestamps (pts) of the frames of a video and the positions of its key frames,
+    from the packets of the container (i.e. without decoding). The pts are sorted in presentation order and
+    expressed in `time_base` units, given as [numerator, denominator]."""
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        packets = [(pkt.pts, pkt.is_keyframe) for pkt in container.demux(stream) if pkt.pts is not None]
+        time_base = [stream.time_base.numerator, stream.time_base.denominator]
 
-    # convert to the pytorch format which is float32 in [0,1] range (and channel first)
-    closest_frames = closest_frames.type(torch.float32) / 255
+    packets.sort()
+    return {
+        "time_base": time_base,
+        "pts": [pts for pts, _ in packets],
+        "keyframes": [i for i, (_, is_keyframe) in enumerate(packets) if is_keyframe],
+    }
 
-    assert len(timestamps) == len(closest_frames)
-    return closest_frames
+
+def get_frames_timestamps(frames_index: dict) -> np.ndarray:
+    num, den = frames_index["time_base"]
+    return np.asarray(frames_index["pts"], dtype=np.float64) * num / den
+
+
+def decode_video_frames_torchvision(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+    backend: str = "pyav",
+    log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    return_uint8: bool = False,
+) -> torch.Tensor:
+    """Loads frames associated to the requested timestamps of a video with torchvision. The backend can be
+    either "pyav" (default) or "video_reader", see `TorchvisionVideoBackend` and `decode_video_frames`.
+    """
+    if backend not in ["pyav", "video_reader"]:
+        raise ValueError(f"Torchvision video backend must be either 'pyav' or 'video_reader' ({backend=}).")
+    return decode_video_frames(
+        video_path, timestamps, tolerance_s, backend, log_loaded_timestamps, decoder_cache, return_uint8
+    )
+
+
+def decode_video_frames_by_spans(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+    backend: str = "pyav",
+    decoder_cache: VideoDecoderCache | None = None,
+    max_span_gap_s: float = 0.25,
+    return_uint8: bool = False,
+    frames_index: dict | None = None,
+) -> torch.Tensor:
+    """Loads frames associated to an unordered list of timestamps, possibly with duplicates (e.g. the query
+    timestamps of all the samples of a batch that come from the same episode).
+
+    The unique timestamps are sorted and split into contiguous spans wherever two consecutive timestamps are
+    more than `max_span_gap_s` apart. Each span is then decoded once with `decode_video_frames`,
+    i.e. with a single seek to the key frame preceding its first timestamp, and the frames are scattered back
+    to the order of `timestamps`. If the `frames_index` of the video is provided, the seeks are planned from
+    the key frames instead, and all the timestamps are passed to `decode_video_frames` at once.
+    """
+    unique_ts, inverse = np.unique(np.asarray(timestamps), return_inverse=True)
+    if frames_index is not None:
+        max_span_gap_s = np.inf
+    span_starts = np.flatnonzero(np.diff(unique_ts) > max_span_gap_s) + 1
+    frames = [
+        decode_video_frames(
+            video_path,
+            span_ts.tolist(),
+            tolerance_s,
+            backend,
+            decoder_cache=decoder_cache,
+            return_uint8=return_uint8,
+            frames_index=frames_index,
+        )
+        for span_ts in np.split(unique_ts, span_starts)
+    ]
+    return torch.cat(frames)[torch.from_numpy(inverse.reshape(-1))]
+
+
+@dataclass
+class VideoFrameCacheConfig:
+    """
+    Decoded frames cache, which turns video decoding into a one-time cost over multi-epoch trainings. Frames
+    are stored as uint8 and looked up in a RAM tier shared by all dataloader workers, then in a disk tier
+    of memory-mapped files (in 'root/cache/frames') which is filled lazily the first time a frame is decoded.
+    """
+
+    # Set this flag to `true` to enable the cache
+    enable: bool = False
+    # Size of the shared memory tier, split evenly between cameras. Set it to 0 to only use the disk tier.
+    ram_size_mb: float = 1024
+    # Eviction policy of the RAM tier, either "lru" (least recently used) or "fifo" (first in, first out).
+    eviction: str = "lru"
+    # Set this flag to `false` to only use the RAM tier.
+    use_disk: bool = True
+    # Maximum size of the disk tier. Episodes get disk space allocated in order until this size is reached,
+    # frames of the following episodes are not stored on disk. No limit if None.
+    disk_size_mb: float | None = None
+    # Optional (height, width) at which frames are stored and returned, e.g. the input resolution of the policy.
+    resize: tuple[int, int] | None = None
+
+    def __post_init__(self):
+        if self.eviction not in ["lru", "fifo"]:
+            raise ValueError(f"`eviction` must be either 'lru' or 'fifo' ({self.eviction=}).")
+
+
+class VideoFrameCache:
+    """Two-tier cache of decoded uint8 video frames, indexed by camera key, episode index and frame index.
+
+    - The RAM tier is a fixed pool of frame slots per camera, allocated in shared memory along with their
+      keys and access times, and guarded by a single lock. It must be instantiated in the main process so
+      that the dataloader workers share it.
+    - The disk tier stores, for each camera and episode, every frame of the episode in a memory-mapped .npy
+      file along with a mask of the frames already written. Files are allocated (sparse) upfront so that
+      workers only ever write frames into existing files.
+    """
+
+    def __init__(
+        self,
+        config: VideoFrameCacheConfig,
+        cache_dir: Path,
+        frame_shapes: dict[str, tuple[int, int, int]],
+        episode_lengths: dict[int, int],
+    ):
+        self.config = config
+        self.cache_dir = cache_dir
+        self.frame_shapes = frame_shapes
+
+        self._lock = torch.multiprocessing.Lock()
+        self._clock = torch.zeros(1, dtype=torch.int64).share_memory_()
+        self._ram = {}
+        for key, shape in frame_shapes.items():
+            capacity = int(config.ram_size_mb * 1024**2 / len(frame_shapes) / np.prod(shape))
+            if capacity > 0:
+                self._ram[key] = {
+                    "frames": torch.zeros((capacity, *shape), dtype=torch.uint8).share_memory_(),
+                    "keys": torch.full((capacity,), -1, dtype=torch.int64).share_memory_(),
+                    "ticks": torch.zeros(capacity, dtype=torch.int64).share_memory_(),
+                }
+
+        self._disk_paths = {}
+        if config.use_disk:
+            disk_size = 0
+            max_disk_size = config.disk_size_mb * 1024**2 if config.disk_size_mb is not None else np.inf
+            for ep_idx, length in episode_lengths.items():
+                ep_size = sum(length * np.prod(shape) for shape in frame_shapes.values())
+                if disk_size + ep_size > max_disk_size:
+                    break
+                disk_size += ep_size
+                for key, shape in frame_shapes.items():
+                    self._disk_paths[(key, ep_idx)] = self._allocate_disk_files(key, ep_idx, (length, *shape))
+        self._memmaps = {}
+
+    def __getstate__(self) -> dict:
+        # Memory maps are reopened by each process rather than pickled with their content
+        state = self.__dict__.copy()
+        state["_memmaps"] = {}
+        return state
+
+    def _allocate_disk_files(self, key: str, ep_idx: int, shape: tuple[int, ...]) -> tuple[Path, Path]:
+        frames_path = self.cache_dir / key / f"episode_{ep_idx:06d}.npy"
+        mask_path = self.cache_dir / key / f"episode_{ep_idx:06d}_mask.npy"
+        if mask_path.is_file() and np.load(frames_path, mmap_mode="r").shape != shape:
+            logging.warning(
+                f"Discarding the cached frames of episode {ep_idx} of '{key}' in {self.cache_dir}, which don't "
+                f"have the expected shape {shape}."
+            )
+            mask_path.unlink()
+        if not mask_path.is_file():
+            frames_path.parent.mkdir(parents=True, exist_ok=True)
+            np.lib.format.open_memmap(frames_path, mode="w+", dtype=np.uint8, shape=shape).flush()
+            # The mask is written last so that its presence means that the frames file is complete
+            np.lib.format.open_memmap(mask_path, mode="w+", dtype=np.bool_, shape=(shape[0],)).flush()
+        return frames_path, mask_path
+
+    def _get_memmaps(self, key: str, ep_idx: int) -> tuple[np.memmap, np.memmap] | None:
+        if (key, ep_idx) not in self._disk_paths:
+            return None
+        if (key, ep_idx) not in self._memmaps:
+            frames_path, mask_path = self._disk_paths[(key, ep_idx)]
+            self._memmaps[(key, ep_idx)] = (
+                np.load(frames_path, mmap_mode="r+"),
+                np.load(mask_path, mmap_mode="r+"),
+            )
+        return self._memmaps[(key, ep_idx)]
+
+    def get(self, key: str, ep_idx: int, frame_indices: np.ndarray) -> tuple[torch.Tensor, np.ndarray]:
+        """Returns the cached frames for the requested frame indices along with a boolean mask of the ones that
+        were found. Frames missing from the cache are left as zeros."""
+        frames = torch.zeros((len(frame_indices), *self.frame_shapes[key]), dtype=torch.uint8)
+        found = np.zeros(len(frame_indices), dtype=bool)
+
+        ram_keys = torch.from_numpy(ep_idx << 32 | frame_indices)
+        if key in self._ram:
+            ram = self._ram[key]
+            with self._lock:
+                hits, slots = torch.nonzero(ram_keys[:, None] == ram["keys"][None, :], as_tuple=True)
+                frames[hits] = ram["frames"][slots]
+                if self.config.eviction == "lru":
+                    self._clock += 1
+                    ram["ticks"][slots] = self._clock
+            found[hits.numpy()] = True
+
+        memmaps = self._get_memmaps(key, ep_idx)
+        if memmaps is not None and not found.all():
+            disk_frames, disk_mask = memmaps
+            disk_hits = np.flatnonzero(~found & disk_mask[frame_indices])
+            if len(disk_hits) > 0:
+                frames[disk_hits] = torch.from_numpy(disk_frames[frame_indices[disk_hits]])
+                found[disk_hits] = True
+                self._put_ram(key, ram_keys[disk_hits], frames[disk_hits])
+
+        return frames, found
+
+    def put(self, key: str, ep_idx: int, frame_indices: np.ndarray, frames: torch.Tensor) -> None:
+        """Stores the given uint8 frames in both tiers."""
+        memmaps = self._get_memmaps(key, ep_idx)
+        if memmaps is not None:
+            disk_frames, disk_mask = memmaps
+            disk_frames[frame_indices] = frames.numpy()
+            disk_mask[frame_indices] = True
+        self._put_ram(key, torch.from_numpy(ep_idx << 32 | frame_indices), frames)
+
+    def _put_ram(self, key: str, ram_keys: torch.Tensor, frames: torch.Tensor) -> None:
+        if key not in self._ram:
+            return
+        ram = self._ram[key]
+        with self._lock:
+            for ram_key, frame in zip(ram_keys, frames, strict=True):
+                if (ram["keys"] == ram_key).any():
+                    continue
+                # Empty slots have the lowest tick and are filled first
+                slot = torch.argmin(ram["ticks"])
+                self._clock += 1
+                ram["frames"][slot] = frame
+                ram["keys"][slot] = ram_key
+                ram["ticks"][slot] = self._clock
 
 
 def encode_video_frames(
@@ -139,15 +619,38 @@ def encode_video_frames(
     log_level: str | None = "error",
     overwrite: bool = False,
 ) -> None:
-    """More info on ffmpeg arguments tuning on `benchmark/video/README.md`"""
+    """More info on ffmpeg arguments tuning on `benchmark/video/README.md`
+
+    Png frames are read by ffmpeg directly. Frames written in the other formats of `IMAGE_FORMATS` are decoded
+    here and piped to ffmpeg as raw video.
+    """
+    imgs_dir = Path(imgs_dir)
     video_path = Path(video_path)
     video_path.parent.mkdir(parents=True, exist_ok=True)
 
+    frame_paths = sorted(imgs_dir.glob("frame_*"))
+    if len(frame_paths) == 0:
+        raise FileNotFoundError(f"No frames found in {imgs_dir}.")
+
+    if frame_paths[0].suffix == ".png":
+        input_args = ["-f", "image2", "-r", str(fps), "-i", str(imgs_dir / "frame_%06d.png")]
+    else:
+        height, width, _ = load_image_as_numpy(frame_paths[0], dtype=np.uint8, channel_first=False).shape
+        input_args = [
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+        ]
+
     ffmpeg_args = OrderedDict(
         [
-            ("-f", "image2"),
-            ("-r", str(fps)),
-            ("-i", str(imgs_dir / "frame_%06d.png")),
             ("-vcodec", vcodec),
             ("-pix_fmt", pix_fmt),
         ]
@@ -171,9 +674,18 @@ def encode_video_frames(
     if overwrite:
         ffmpeg_args.append("-y")
 
-    ffmpeg_cmd = ["ffmpeg"] + ffmpeg_args + [str(video_path)]
-    # redirect stdin to subprocess.DEVNULL to prevent reading random keyboard inputs from terminal
-    subprocess.run(ffmpeg_cmd, check=True, stdin=subprocess.DEVNULL)
+    ffmpeg_cmd = ["ffmpeg"] + input_args + ffmpeg_args + [str(video_path)]
+    if frame_paths[0].suffix == ".png":
+        # redirect stdin to subprocess.DEVNULL to prevent reading random keyboard inputs from terminal
+        subprocess.run(ffmpeg_cmd, check=True, stdin=subprocess.DEVNULL)
+    else:
+        with subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE) as process:
+            for frame_path in frame_paths:
+                frame = load_image_as_numpy(frame_path, dtype=np.uint8, channel_first=False)
+                process.stdin.write(np.ascontiguousarray(frame).tobytes())
+            process.stdin.close()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, ffmpeg_cmd)
 
     if not video_path.exists():
         raise OSError(
@@ -182,6 +694,129 @@ def encode_video_frames(
         )
 
 
+class StreamingVideoEncoder:
+    """Encodes the frames of a camera into a mp4 file while they are being recorded, with PyAV, instead of
+    writing them as png images first and encoding these with `encode_video_frames` once the episode ends.
+
+    `start` begins a new video, `add_frame` queues a frame (channel first or last, uint8 or float in [0,1])
+    and returns immediately, while a background thread converts and encodes the queued frames. `finish` then
+    only has to encode the last queued frames and flush the encoder. Encoding arguments are the same as
+    `encode_video_frames`. The queue holds at most `max_queue_size` frames: `add_frame` blocks beyond that,
+    which only happens if encoding is slower than recording.
+
+    The stats of the frames are computed along the way (see `ImageStats`), since the frames aren't stored
+    anywhere else, and are available in `stats` after `finish`, in the format of `compute_episode_stats`.
+    """
+
+    def __init__(
+        self,
+        fps: int,
+        vcodec: str = "libsvtav1",
+        pix_fmt: str = "yuv420p",
+        g: int | None = 2,
+        crf: int | None = 30,
+        fast_decode: int = 0,
+        max_queue_size: int = 256,
+    ):
+        self.fps = fps
+        self.vcodec = vcodec
+        self.pix_fmt = pix_fmt
+        self.options = {}
+        if g is not None:
+            self.options["g"] = str(g)
+        if crf is not None:
+            self.options["crf"] = str(crf)
+        if fast_decode:
+            if vcodec == "libsvtav1":
+                self.options["svtav1-params"] = f"fast-decode={fast_decode}"
+            else:
+                self.options["tune"] = "fastdecode"
+
+        self.video_path = None
+        self.stats = None
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._error = None
+        self._cancelled = False
+
+    def start(self, video_path: Path | str) -> None:
+        if self._thread is not None:
+            raise RuntimeError(f"The encoding of {self.video_path} has not been finished or cancelled.")
+        self.video_path = Path(video_path)
+        self.video_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats = None
+        self._error = None
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._encode_loop, args=(self.video_path,), daemon=True)
+        self._thread.start()
+
+    def add_frame(self, image: np.ndarray | Image.Image) -> None:
+        if self._thread is None:
+            raise RuntimeError("`start` must be called before adding frames.")
+        if self._error is not None:
+            raise RuntimeError(f"Encoding of {self.video_path} failed.") from self._error
+        self._queue.put(image)
+
+    def finish(self) -> Path:
+        """Waits for the queued frames to be encoded and closes the video, then returns its path."""
+        video_path = self._join()
+        if self._error is not None:
+            raise RuntimeError(f"Encoding of {video_path} failed.") from self._error
+        if not video_path.exists():
+            raise OSError(f"Video encoding did not work. File not found: {video_path}.")
+        return video_path
+
+    def cancel(self) -> None:
+        """Stops the encoding of the current video, if any, and deletes it."""
+        if self._thread is None:
+            return
+        self._cancelled = True
+        self._join().unlink(missing_ok=True)
+
+    def _join(self) -> Path:
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        video_path, self.video_path = self.video_path, None
+        return video_path
+
+    def _encode_loop(self, video_path: Path) -> None:
+        container = stream = None
+        stats = ImageStats()
+        num_frames = 0
+        try:
+            while (image := self._queue.get()) is not None:
+                if self._cancelled:
+                    continue
+                if not isinstance(image, Image.Image):
+                    image = image_array_to_pil_image(image)
+                if container is None:
+                    container = av.open(str(video_path), "w")
+                    stream = container.add_stream(self.vcodec, rate=self.fps)
+                    stream.width, stream.height = image.size
+                    stream.pix_fmt = self.pix_fmt
+                    stream.options = self.options
+                frame = av.VideoFrame.from_image(image)
+                frame.pts, frame.time_base = num_frames, Fraction(1, self.fps)
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+                num_frames += 1
+                stats.add_image(image)
+
+            if container is not None and not self._cancelled:
+                for packet in stream.encode():
+                    container.mux(packet)
+                self.stats = stats.get_stats()
+        except Exception as e:
+            self._error = e
+            # keep consuming the frames so that `add_frame` never blocks
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if container is not None:
+                container.close()
+
+
 @dataclass
 class VideoFrame:
     # TODO(rcadene, lhoestq): move to Hugging Face `datasets` repo
@@ -106,6 +106,11 @@ class ACTPolicy(PreTrainedPolicy):
         else:
             self._action_queue = deque([], maxlen=self.config.n_action_steps)
 
+    def _compile(self, **compile_kwargs) -> None:
+        # The transformer encoder and decoder, used by both `forward` and `select_action`
+        self.model.encoder.compile(**compile_kwargs)
+        self.model.decoder.compile(**compile_kwargs)
+
     @torch.no_grad
     def select_action(self, batch: dict[str, Tensor]) -> Tensor:
         """Select a single action given environment observations.
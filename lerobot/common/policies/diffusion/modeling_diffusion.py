@@ -99,6 +99,10 @@ class DiffusionPolicy(PreTrainedPolicy):
         if self.config.env_state_feature:
             self._queues["observation.environment_state"] = deque(maxlen=self.config.n_obs_steps)
 
+    def _compile(self, **compile_kwargs) -> None:
+        # The denoising network, called by `compute_loss` and at each step of `conditional_sample`
+        self.diffusion.unet.compile(**compile_kwargs)
+
     @torch.no_grad
     def select_action(self, batch: dict[str, Tensor]) -> Tensor:
         """Select a single action given environment observations.
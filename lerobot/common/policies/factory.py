@@ -145,6 +145,7 @@ def make_policy(
     policy.to(cfg.device)
     assert isinstance(policy, nn.Module)
 
-    # policy = torch.compile(policy, mode="reduce-overhead")
+    if cfg.compile:
+        policy.compile_model()
 
     return policy
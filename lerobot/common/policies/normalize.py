@@ -157,6 +157,10 @@ class Normalize(nn.Module):
                 # FIXME(aliberts, rcadene): This might lead to silent fail!
                 continue
 
+            if ft.type is FeatureType.VISUAL and batch[key].dtype == torch.uint8:
+                # Images can be kept as uint8 up to here to reduce host to device transfers
+                batch[key] = batch[key].type(torch.float32) / 255
+
             norm_mode = self.norm_map.get(ft.type, NormalizationMode.IDENTITY)
             if norm_mode is NormalizationMode.IDENTITY:
                 continue
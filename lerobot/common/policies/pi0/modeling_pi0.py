@@ -65,6 +65,7 @@ from lerobot.common.policies.pi0.paligemma_with_expert import (
     PaliGemmaWithExpertModel,
 )
 from lerobot.common.policies.pretrained import PreTrainedPolicy
+from lerobot.common.policies.utils import compile_method
 from lerobot.common.utils.utils import get_safe_dtype
 
 
@@ -223,6 +224,7 @@ class PI0Policy(PreTrainedPolicy):
 
     config_class = PI0Config
     name = "pi0"
+    language_conditioned = True
 
     def __init__(
         self,
@@ -260,6 +262,11 @@ class PI0Policy(PreTrainedPolicy):
     def get_optim_params(self) -> dict:
         return self.parameters()
 
+    def _compile(self, **compile_kwargs) -> None:
+        # The training forward pass, and the denoising step called `num_steps` times by `sample_actions`
+        compile_method(self.model, "forward", **compile_kwargs)
+        compile_method(self.model, "denoise_step", **compile_kwargs)
+
     @torch.no_grad
     def select_action(self, batch: dict[str, Tensor], noise: Tensor | None = None) -> Tensor:
         """Select a single action given environment observations.
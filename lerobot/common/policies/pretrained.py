@@ -14,11 +14,13 @@
 import abc
 import logging
 import os
+import time
 from pathlib import Path
 from typing import Type, TypeVar
 
 import packaging
 import safetensors
+import torch
 from huggingface_hub import hf_hub_download
 from huggingface_hub.constants import SAFETENSORS_SINGLE_FILE
 from huggingface_hub.errors import HfHubHTTPError
@@ -26,7 +28,9 @@ from safetensors.torch import load_model as load_model_as_safetensor
 from safetensors.torch import save_model as save_model_as_safetensor
 from torch import Tensor, nn
 
+from lerobot.common.policies.utils import get_device_from_parameters, make_dummy_batch
 from lerobot.common.utils.hub import HubMixin
+from lerobot.common.utils.random_utils import get_rng_state, set_rng_state
 from lerobot.configs.policies import PreTrainedConfig
 
 T = TypeVar("T", bound="PreTrainedPolicy")
@@ -50,6 +54,8 @@ class PreTrainedPolicy(nn.Module, HubMixin, abc.ABC):
 
     config_class: None
     name: None
+    # Whether `select_action` reads the language instruction of each item in `batch["task"]`
+    language_conditioned: bool = False
 
     def __init__(self, config: PreTrainedConfig, *inputs, **kwargs):
         super().__init__()
@@ -175,6 +181,44 @@ class PreTrainedPolicy(nn.Module, HubMixin, abc.ABC):
         """
         raise NotImplementedError
 
+    def compile_model(self) -> None:
+        """Compiles the hot modules of the policy with `torch.compile`, in place and according to
+        `config.compile_mode` (see `_compile`).
+
+        Only the modules doing the heavy computations are compiled, while the caching logic of `select_action`
+        (e.g. the action queue, whose length varies from one call to the next) keeps running eagerly: it
+        never ends up in a compiled graph, which thus isn't recompiled as the queue fills and empties. The
+        compilation itself happens at the first call of each module, see `warmup` to trigger it ahead of time.
+        """
+        self._compile(mode=self.config.compile_mode)
+
+    def _compile(self, **compile_kwargs) -> None:
+        """Compiles the hot modules of the policy with `torch.compile(**compile_kwargs)`, in a way that leaves
+        the state dict unchanged (e.g. with `nn.Module.compile`). To be overridden by the policies."""
+        logging.warning(f"The policy '{self.name}' doesn't define modules to compile, it runs eagerly.")
+
+    @torch.no_grad()
+    def warmup(self, batch_size: int = 1, batch: dict | None = None) -> float:
+        """Runs `select_action` on a batch of zeros (see `make_dummy_batch`), with an empty task for the
+        policies conditioned on language, or on `batch` if given, so that
+        the compilation of the policy (see `compile_model`) happens now rather than on the first actual call,
+        e.g. for the first action on a robot. Returns the time it took.
+
+        The random state is restored afterwards and the policy is reset, so this must be called before the
+        policy is used. `batch_size` should match the one used afterwards to avoid a recompilation.
+        """
+        if batch is None:
+            task = "" if self.language_conditioned else None
+            batch = make_dummy_batch(self.config, batch_size, get_device_from_parameters(self), task=task)
+        random_state_dict = get_rng_state()
+        start_time = time.perf_counter()
+        self.reset()
+        self.select_action(batch)
+        self.reset()
+        duration = time.perf_counter() - start_time
+        set_rng_state(random_state_dict)
+        return duration
+
     # TODO(aliberts, rcadene): split into 'forward' and 'compute_loss'?
     @abc.abstractmethod
     def forward(self, batch: dict[str, Tensor]) -> tuple[Tensor, dict | None]:
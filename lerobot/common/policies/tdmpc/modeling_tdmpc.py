@@ -39,7 +39,12 @@ from lerobot.common.constants import OBS_ENV, OBS_ROBOT
 from lerobot.common.policies.normalize import Normalize, Unnormalize
 from lerobot.common.policies.pretrained import PreTrainedPolicy
 from lerobot.common.policies.tdmpc.configuration_tdmpc import TDMPCConfig
-from lerobot.common.policies.utils import get_device_from_parameters, get_output_shape, populate_queues
+from lerobot.common.policies.utils import (
+    compile_method,
+    get_device_from_parameters,
+    get_output_shape,
+    populate_queues,
+)
 
 
 class TDMPCPolicy(PreTrainedPolicy):
@@ -110,6 +115,12 @@ class TDMPCPolicy(PreTrainedPolicy):
         # CEM for the next step.
         self._prev_mean: torch.Tensor | None = None
 
+    def _compile(self, **compile_kwargs) -> None:
+        # The observation encoder, used by both `forward` and `select_action`, and the rollout of the latent
+        # dynamics with which `plan` estimates the value of each candidate trajectory
+        self.model._encoder.compile(**compile_kwargs)
+        compile_method(self, "estimate_value", **compile_kwargs)
+
     @torch.no_grad()
     def select_action(self, batch: dict[str, Tensor]) -> Tensor:
         """Select a single action given environment observations."""
@@ -17,6 +17,8 @@
 import torch
 from torch import nn
 
+from lerobot.configs.policies import PreTrainedConfig
+
 
 def populate_queues(queues, batch):
     for key in batch:
@@ -50,6 +52,28 @@ def get_dtype_from_parameters(module: nn.Module) -> torch.dtype:
     return next(iter(module.parameters())).dtype
 
 
+def compile_method(obj: object, name: str, **compile_kwargs) -> None:
+    """Replaces the method `name` of `obj` with its compiled version, for this instance only.
+
+    Unlike wrapping a module with `torch.compile`, this leaves its state dict unchanged. For modules called
+    through `__call__`, prefer `nn.Module.compile`, which does the same.
+    """
+    setattr(obj, name, torch.compile(getattr(obj, name), **compile_kwargs))
+
+
+def make_dummy_batch(
+    config: PreTrainedConfig, batch_size: int, device: torch.device, task: str | None = None
+) -> dict:
+    """Makes a batch of observations filled with zeros for the input features of a policy, e.g. to warm it up.
+    If `task` is given, the batch also has it for each item, for the policies conditioned on language (e.g. pi0)."""
+    batch = {
+        key: torch.zeros(batch_size, *ft.shape, device=device) for key, ft in config.input_features.items()
+    }
+    if task is not None:
+        batch["task"] = [task] * batch_size
+    return batch
+
+
 def get_output_shape(module: nn.Module, input_shape: tuple) -> tuple:
     """
     Calculates the output shape of a PyTorch module given an input shape.
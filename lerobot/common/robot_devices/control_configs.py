@@ -17,6 +17,7 @@ from pathlib import Path
 
 import draccus
 
+from lerobot.common.datasets.image_writer import IMAGE_FORMATS
 from lerobot.common.robot_devices.robots.configs import RobotConfig
 from lerobot.configs import parser
 from lerobot.configs.policies import PreTrainedConfig
@@ -81,6 +82,21 @@ class RecordControlConfig(ControlConfig):
     # Too many threads might cause unstable teleoperation fps due to main thread being blocked.
     # Not enough threads might cause low camera fps.
     num_image_writer_threads_per_camera: int = 4
+    # Number of shared memory slots per camera through which frames are handed to the image writer
+    # subprocesses, instead of being pickled through a queue. Only used with `num_image_writer_processes>0`.
+    num_image_writer_shared_memory_slots: int = 0
+    # Drop the frames which don't fit in the shared memory slots instead of waiting for a free one, so that the
+    # recording never stalls. An episode with dropped frames can't be saved and has to be recorded again.
+    drop_images_when_full: bool = False
+    # Format of the frames written while recording, before being encoded or stored as png in the dataset:
+    # "png", "png_fast", "png_uncompressed", "webp" or "npy". The faster formats take more disk space.
+    image_format: str = "png"
+    # Encode the videos while recording, instead of writing the frames as png images and encoding them at the
+    # end of each episode. Requires `video=true`.
+    streaming_encoding: bool = False
+    # Save the episodes in the background, so that the environment can be reset and the next episode recorded
+    # while the previous one is still being written and encoded.
+    async_saving: bool = False
     # Display all cameras on screen
     display_cameras: bool = True
     # Use vocal synthesis to read events.
@@ -96,6 +112,11 @@ class RecordControlConfig(ControlConfig):
             self.policy = PreTrainedConfig.from_pretrained(policy_path, cli_overrides=cli_overrides)
             self.policy.pretrained_path = policy_path
 
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"Unsupported image format '{self.image_format}', choose from {list(IMAGE_FORMATS)}."
+            )
+
 
 @ControlConfig.register_subclass("replay")
 @dataclass
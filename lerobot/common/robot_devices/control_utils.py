@@ -128,6 +128,17 @@ def predict_action(observation, policy, device, use_amp):
     return action
 
 
+def warmup_policy(policy: PreTrainedPolicy, device: torch.device, use_amp: bool) -> None:
+    """Compiles the policy ahead of the first episode (see `PreTrainedPolicy.warmup`), in the same conditions
+    as `predict_action`, so that its first actions aren't delayed by the compilation."""
+    with (
+        torch.inference_mode(),
+        torch.autocast(device_type=device.type) if device.type == "cuda" and use_amp else nullcontext(),
+    ):
+        duration = policy.warmup(batch_size=1)
+    logging.info(f"Compiled the policy in {duration:.1f}s")
+
+
 def init_keyboard_listener():
     # Allow to exit early while recording an episode or resetting the environment,
     # by tapping the right arrow key '->'. This might require a sudo permission
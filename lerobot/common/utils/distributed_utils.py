@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import os
+from contextlib import contextmanager
+from typing import Any, Generator
+
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    return get_rank() == 0
+
+
+def init_distributed(device: torch.device, timeout_s: float | None = None) -> torch.device:
+    """Initializes the process group when the script is launched with several processes by `torchrun`, and
+    returns the device of the current process.
+
+    On CUDA, each process uses the GPU of its local rank and the processes communicate with NCCL. On other
+    devices (e.g. to test on CPU), they communicate with gloo. Nothing is done for a single process.
+
+    `timeout_s` is how long a process waits for the others in a collective operation (e.g. while the main
+    process evaluates the policy or saves a checkpoint) before failing. It defaults to the one of PyTorch.
+    """
+    if int(os.environ.get("WORLD_SIZE", 1)) <= 1:
+        return device
+
+    if device.type == "cuda":
+        device = torch.device("cuda", int(os.environ["LOCAL_RANK"]))
+        # So that the policies created on "cuda" are on the GPU of this process
+        torch.cuda.set_device(device)
+        backend = "nccl"
+    else:
+        backend = "gloo"
+    timeout = datetime.timedelta(seconds=timeout_s) if timeout_s is not None else None
+    dist.init_process_group(backend=backend, timeout=timeout)
+    return device
+
+
+def cleanup_distributed() -> None:
+    if is_distributed():
+        dist.destroy_process_group()
+
+
+def barrier() -> None:
+    if is_distributed():
+        dist.barrier()
+
+
+def broadcast_object(obj: Any, src: int = 0) -> Any:
+    """Returns the `obj` of the process of rank `src` on all the processes (it must be picklable)."""
+    if not is_distributed():
+        return obj
+    objects = [obj]
+    dist.broadcast_object_list(objects, src=src)
+    return objects[0]
+
+
+@contextmanager
+def main_process_first() -> Generator[None, None, None]:
+    """Runs the block on the main process first, then on the other processes, e.g. so that a dataset is
+    downloaded once and then loaded from the cache by the others."""
+    if not is_main_process():
+        barrier()
+    yield None
+    if is_main_process():
+        barrier()
+
+
+def unwrap_policy(policy: torch.nn.Module) -> torch.nn.Module:
+    """Returns the policy wrapped by `DistributedDataParallel`, if it is."""
+    return policy.module if isinstance(policy, DistributedDataParallel) else policy
@@ -172,6 +172,17 @@ def set_seed(seed) -> None:
         torch.cuda.manual_seed_all(seed)
 
 
+def set_rank_seed(rank: int) -> None:
+    """Gives each process of a distributed run its own random streams for `random`, `numpy`, and `torch` (e.g.
+    for dropout or the noise of diffusion policies), while keeping the run reproducible.
+
+    All the processes must have the same random state beforehand (e.g. after `set_seed` or `load_rng_state`):
+    a seed is drawn from it, which is thus the same for all of them, and offset by `rank`.
+    """
+    seed = torch.randint(0, 2**31, (1,)).item()
+    set_seed(seed + rank)
+
+
 @contextmanager
 def seeded_context(seed: int) -> Generator[None, None, None]:
     """Set the seed when entering a context, and restore the prior random state at exit.
@@ -13,9 +13,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
 import logging
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Callable
 
+import torch
+from huggingface_hub.constants import SAFETENSORS_SINGLE_FILE
+from safetensors.torch import save_file
+from safetensors.torch import save_model as save_model_as_safetensor
 from termcolor import colored
 from torch.optim import Optimizer
 from torch.optim.lr_scheduler import LRScheduler
@@ -24,14 +32,15 @@ from lerobot.common.constants import (
     CHECKPOINTS_DIR,
     LAST_CHECKPOINT_LINK,
     PRETRAINED_MODEL_DIR,
+    RNG_STATE,
     TRAINING_STATE_DIR,
     TRAINING_STEP,
 )
-from lerobot.common.datasets.utils import load_json, write_json
+from lerobot.common.datasets.utils import flatten_dict, load_json, write_json
 from lerobot.common.optim.optimizers import load_optimizer_state, save_optimizer_state
 from lerobot.common.optim.schedulers import load_scheduler_state, save_scheduler_state
 from lerobot.common.policies.pretrained import PreTrainedPolicy
-from lerobot.common.utils.random_utils import load_rng_state, save_rng_state
+from lerobot.common.utils.random_utils import load_rng_state, save_rng_state, serialize_rng_state
 from lerobot.configs.train import TrainPipelineConfig
 
 
@@ -67,6 +76,35 @@ def update_last_checkpoint(checkpoint_dir: Path) -> Path:
     last_checkpoint_dir.symlink_to(relative_target)
 
 
+def prune_checkpoints(
+    checkpoints_dir: Path, keep_last: int | None = None, keep_every: int | None = None
+) -> list[Path]:
+    """Removes the step checkpoints in `checkpoints_dir` except the `keep_last` most recent ones, those whose
+    step is a multiple of `keep_every` and the one `last` links to. Nothing is removed if `keep_last` is None.
+
+    Returns:
+        list[Path]: The checkpoint directories removed.
+    """
+    if keep_last is None:
+        return []
+
+    last_checkpoint_dir = checkpoints_dir / LAST_CHECKPOINT_LINK
+    last_target = last_checkpoint_dir.resolve() if last_checkpoint_dir.is_symlink() else None
+    step_dirs = sorted(
+        (path for path in checkpoints_dir.iterdir() if path.name.isdigit() and not path.is_symlink()),
+        key=lambda path: int(path.name),
+    )
+    removed = []
+    for step_dir in step_dirs[: max(len(step_dirs) - keep_last, 0)]:
+        if keep_every is not None and int(step_dir.name) % keep_every == 0:
+            continue
+        if step_dir.resolve() == last_target:
+            continue
+        shutil.rmtree(step_dir)
+        removed.append(step_dir)
+    return removed
+
+
 def save_checkpoint(
     checkpoint_dir: Path,
     step: int,
@@ -159,3 +197,144 @@ def load_training_state(
         scheduler = load_scheduler_state(scheduler, training_state_dir)
 
     return step, optimizer, scheduler
+
+
+class _StateDictSnapshot:
+    """Stands for a policy, an optimizer or a scheduler whose state dict was copied, in the functions saving
+    them (e.g. `save_optimizer_state`), which only call `state_dict()`."""
+
+    def __init__(self, state_dict: dict):
+        self._state_dict = state_dict
+
+    def state_dict(self) -> dict:
+        # A shallow copy, since the param groups are popped from the state dict of the optimizer when saved
+        return dict(self._state_dict)
+
+
+class AsyncCheckpointer:
+    """
+    This class saves checkpoints (see `save_checkpoint`) in a background thread, so that the training only
+    stops for the time it takes to copy the state dicts of the policy, the optimizer and the scheduler to CPU
+    memory. The tensors on CUDA are copied asynchronously to pinned memory, which is allocated at the first
+    checkpoint and reused by the next ones, and the background thread waits for the copies before writing.
+
+    A checkpoint is first written to a temporary directory next to `checkpoint_dir`, which is then renamed, so
+    that a checkpoint directory is never left half written. Only then the `last` link is updated, the old
+    checkpoints are pruned (see `prune_checkpoints`) and `on_saved` is called with the checkpoint directory.
+
+    A checkpoint is copied once the previous one is written, so that at most one copy is held in memory.
+    If a checkpoint fails to save, its error is raised by the next call to `save` or `wait_until_done`.
+    """
+
+    def __init__(self, keep_last: int | None = None, keep_every: int | None = None):
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpointer")
+        self._future = None
+        # Name of the tensor in the state dicts -> its buffer in CPU memory, reused across checkpoints
+        self._buffers = {}
+
+    def save(
+        self,
+        checkpoint_dir: Path,
+        step: int,
+        cfg: TrainPipelineConfig,
+        policy: PreTrainedPolicy,
+        optimizer: Optimizer,
+        scheduler: LRScheduler | None = None,
+        on_saved: Callable[[Path], None] | None = None,
+    ) -> Future:
+        # The buffers hold the previous checkpoint until it is written
+        self.wait_until_done()
+
+        copies = {}
+        snapshot = {
+            "cfg": copy.deepcopy(cfg),
+            "policy_config": copy.deepcopy(policy.config),
+            "policy": _StateDictSnapshot(self._copy_to_cpu(policy.state_dict(), "policy", copies)),
+            "optimizer": _StateDictSnapshot(self._copy_to_cpu(optimizer.state_dict(), "optimizer", copies)),
+            "rng_state": flatten_dict(serialize_rng_state()),
+        }
+        if scheduler is not None:
+            snapshot["scheduler"] = _StateDictSnapshot(copy.deepcopy(scheduler.state_dict()))
+
+        event = None
+        if any(tensor.is_pinned() for tensor in copies.values()):
+            event = torch.cuda.Event()
+            event.record()
+
+        self._future = self._executor.submit(self._write, checkpoint_dir, step, snapshot, event, on_saved)
+        return self._future
+
+    def _copy_to_cpu(self, state: Any, name: str, copies: dict) -> Any:
+        if isinstance(state, dict):
+            return {key: self._copy_to_cpu(value, f"{name}.{key}", copies) for key, value in state.items()}
+        if isinstance(state, (list, tuple)):
+            return type(state)(
+                self._copy_to_cpu(value, f"{name}.{i}", copies) for i, value in enumerate(state)
+            )
+        if not isinstance(state, torch.Tensor):
+            return copy.deepcopy(state)
+
+        # Tensors sharing their memory (e.g. tied weights) share their copy, so that they are saved only once
+        key = (state.untyped_storage().data_ptr(), state.storage_offset(), state.shape, state.stride())
+        if state.numel() == 0:
+            key = name
+        if key not in copies:
+            buffer = self._buffers.get(name)
+            if buffer is None or buffer.shape != state.shape or buffer.dtype != state.dtype:
+                buffer = torch.empty(state.shape, dtype=state.dtype, pin_memory=state.is_cuda)
+                self._buffers[name] = buffer
+            copies[key] = buffer.copy_(state.detach(), non_blocking=state.is_cuda)
+        return copies[key]
+
+    def _write(
+        self,
+        checkpoint_dir: Path,
+        step: int,
+        snapshot: dict,
+        event: torch.cuda.Event | None,
+        on_saved: Callable[[Path], None] | None,
+    ) -> None:
+        if event is not None:
+            event.synchronize()
+
+        tmp_dir = checkpoint_dir.parent / f".{checkpoint_dir.name}.tmp"
+        if tmp_dir.exists():
+            # Left by an interrupted run
+            shutil.rmtree(tmp_dir)
+
+        pretrained_dir = tmp_dir / PRETRAINED_MODEL_DIR
+        pretrained_dir.mkdir(parents=True)
+        snapshot["policy_config"]._save_pretrained(pretrained_dir)
+        save_model_as_safetensor(snapshot["policy"], str(pretrained_dir / SAFETENSORS_SINGLE_FILE))
+        snapshot["cfg"].save_pretrained(pretrained_dir)
+
+        save_dir = tmp_dir / TRAINING_STATE_DIR
+        save_dir.mkdir()
+        save_training_step(step, save_dir)
+        save_file(snapshot["rng_state"], save_dir / RNG_STATE)
+        save_optimizer_state(snapshot["optimizer"], save_dir)
+        if "scheduler" in snapshot:
+            save_scheduler_state(snapshot["scheduler"], save_dir)
+
+        if checkpoint_dir.exists():
+            shutil.rmtree(checkpoint_dir)
+        tmp_dir.rename(checkpoint_dir)
+
+        update_last_checkpoint(checkpoint_dir)
+        prune_checkpoints(checkpoint_dir.parent, self.keep_last, self.keep_every)
+        if on_saved is not None:
+            on_saved(checkpoint_dir)
+
+    def wait_until_done(self) -> None:
+        """Waits for the checkpoint being written, if any, and raises its error if it failed to save."""
+        future, self._future = self._future, None
+        if future is not None:
+            future.result()
+
+    def stop(self) -> None:
+        try:
+            self.wait_until_done()
+        finally:
+            self._executor.shutdown(wait=True)
@@ -20,6 +20,7 @@ from lerobot.common import (
     policies,  # noqa: F401
 )
 from lerobot.common.datasets.transforms import ImageTransformsConfig
+from lerobot.common.datasets.video_utils import VideoFrameCacheConfig
 
 
 @dataclass
@@ -36,6 +37,25 @@ class DatasetConfig:
     revision: str | None = None
     use_imagenet_stats: bool = True
     video_backend: str = "pyav"
+    frame_cache: VideoFrameCacheConfig = field(default_factory=VideoFrameCacheConfig)
+    # Keep camera frames as uint8 through the dataloader, they are converted to float32 by the policy
+    # normalization once on the device (see `Normalize`).
+    uint8_images: bool = False
+    # Load the low-dimensional columns once into memory-mapped numpy arrays (see `LeRobotDataset`).
+    use_columnar_cache: bool = False
+    # Sample blocks of this many consecutive frames from the same episode (see `EpisodeBlockSampler`), so that
+    # each span of video is decoded once per batch. Frames are shuffled within windows of `shuffle_buffer_size`.
+    episode_block_size: int | None = None
+    shuffle_buffer_size: int = 0
+    # Stream the episodes during training instead of downloading the dataset first (see
+    # `StreamingLeRobotDataset`), from `stream_source`: a local directory, an http(s) url or the hub if None.
+    # Fetched files are kept in a local cache of at most `stream_cache_size_mb`.
+    streaming: bool = False
+    stream_source: str | None = None
+    stream_cache_size_mb: float | None = 10240
+    # Sampling weight of each of the datasets provided in `repo_id`, which don't need to sum to one (see
+    # `WeightedDatasetSampler`). If None, the datasets are weighted by their number of frames.
+    sampling_weights: list[float] | None = None
 
 
 @dataclass
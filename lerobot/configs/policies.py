@@ -59,6 +59,11 @@ class PreTrainedConfig(draccus.ChoiceRegistry, HubMixin, abc.ABC):
     # `use_amp` determines whether to use Automatic Mixed Precision (AMP) for training and evaluation. With AMP,
     # automatic gradient scaling is used.
     use_amp: bool = False
+    # `compile` determines whether the hot modules of the policy are compiled with `torch.compile`, for both
+    # training and inference (see `PreTrainedPolicy.compile_model`). `compile_mode` is passed to
+    # `torch.compile`, e.g. "reduce-overhead" to lower the inference latency with CUDA graphs.
+    compile: bool = False
+    compile_mode: str | None = None
 
     def __post_init__(self):
         self.pretrained_path = None
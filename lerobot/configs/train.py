@@ -51,6 +51,13 @@ class TrainPipelineConfig(HubMixin):
     seed: int | None = 1000
     # Number of workers for the dataloader.
     num_workers: int = 4
+    # `batch_size` is the number of samples of each optimization step. Set `micro_batch_size` to split the batches
+    # into micro-batches of this size, whose gradients are accumulated before the step, to bound the memory
+    # used by the forward and backward passes.
+    micro_batch_size: int | None = None
+    # Number of batches moved to the device ahead of the training step by a background thread (and on a side
+    # stream on CUDA), so that the copy overlaps with the previous steps. Set to 0 to copy them in the step.
+    prefetch_batches: int = 2
     batch_size: int = 8
     steps: int = 100_000
     eval_freq: int = 20_000
@@ -58,7 +65,20 @@ class TrainPipelineConfig(HubMixin):
     save_checkpoint: bool = True
     # Checkpoint is saved every `save_freq` training iterations and after the last training step.
     save_freq: int = 20_000
+    # Write the checkpoints in a background thread, from a copy of the training state in CPU memory, so that
+    # the training only stops for the time of the copy.
+    async_checkpoint: bool = False
+    # Keep only the last `keep_last_checkpoints` checkpoints, as well as those of the steps which are a
+    # multiple of `keep_checkpoint_every`. All the checkpoints are kept when it is None.
+    keep_last_checkpoints: int | None = None
+    keep_checkpoint_every: int | None = None
     use_policy_training_preset: bool = True
+    # When launched with several processes by `torchrun`, the policy is trained with DistributedDataParallel.
+    # Set to true if some parameters of the policy don't get gradients at each step.
+    ddp_find_unused_parameters: bool = False
+    # How long the other processes wait for the main one while it evaluates the policy or saves a checkpoint,
+    # before failing. It must be longer than the evaluation and the checkpoint take.
+    ddp_timeout_s: int = 3600
     optimizer: OptimizerConfig | None = None
     scheduler: LRSchedulerConfig | None = None
     eval: EvalConfig = field(default_factory=EvalConfig)
@@ -105,8 +125,19 @@ class TrainPipelineConfig(HubMixin):
             train_dir = f"{now:%Y-%m-%d}/{now:%H-%M-%S}_{self.job_name}"
             self.output_dir = Path("outputs/train") / train_dir
 
+        if self.micro_batch_size is not None and self.micro_batch_size < 1:
+            raise ValueError(f"`micro_batch_size` must be at least 1 ({self.micro_batch_size=}).")
+        if self.ddp_timeout_s <= 0:
+            raise ValueError(f"`ddp_timeout_s` must be positive ({self.ddp_timeout_s=}).")
+        if self.keep_last_checkpoints is not None and self.keep_last_checkpoints < 1:
+            raise ValueError(f"At least one checkpoint must be kept ({self.keep_last_checkpoints=}).")
+        if self.keep_checkpoint_every is not None and self.keep_checkpoint_every < 1:
+            raise ValueError(f"`keep_checkpoint_every` must be at least 1 ({self.keep_checkpoint_every=}).")
+
         if isinstance(self.dataset.repo_id, list):
             raise NotImplementedError("LeRobotMultiDataset is not currently implemented.")
+        if self.dataset.sampling_weights is not None and not isinstance(self.dataset.repo_id, list):
+            raise ValueError("`dataset.sampling_weights` can only be given along with several datasets.")
 
         if not self.use_policy_training_preset and (self.optimizer is None or self.scheduler is None):
             raise ValueError("Optimizer and Scheduler must be set when the policy presets are not used.")
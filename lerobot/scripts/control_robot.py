@@ -159,11 +159,12 @@ from lerobot.common.robot_devices.control_utils import (
     sanity_check_dataset_name,
     sanity_check_dataset_robot_compatibility,
     stop_recording,
+    warmup_policy,
     warmup_record,
 )
 from lerobot.common.robot_devices.robots.utils import Robot, make_robot_from_config
 from lerobot.common.robot_devices.utils import busy_wait, safe_disconnect
-from lerobot.common.utils.utils import has_method, init_logging, log_say
+from lerobot.common.utils.utils import get_safe_torch_device, has_method, init_logging, log_say
 from lerobot.configs import parser
 
 ########################################################################################
@@ -247,11 +248,18 @@ def record(
             cfg.repo_id,
             root=cfg.root,
         )
+        dataset.image_format = cfg.image_format
         if len(robot.cameras) > 0:
             dataset.start_image_writer(
                 num_processes=cfg.num_image_writer_processes,
                 num_threads=cfg.num_image_writer_threads_per_camera * len(robot.cameras),
+                num_shared_memory_slots=cfg.num_image_writer_shared_memory_slots,
+                drop_images_when_full=cfg.drop_images_when_full,
             )
+        if cfg.streaming_encoding:
+            dataset.start_video_encoders()
+        if cfg.async_saving:
+            dataset.start_episode_saver()
         sanity_check_dataset_robot_compatibility(dataset, robot, cfg.fps, cfg.video)
     else:
         # Create empty dataset or load existing saved episodes
@@ -264,10 +272,17 @@ def record(
             use_videos=cfg.video,
             image_writer_processes=cfg.num_image_writer_processes,
             image_writer_threads=cfg.num_image_writer_threads_per_camera * len(robot.cameras),
+            image_writer_shared_memory_slots=cfg.num_image_writer_shared_memory_slots,
+            drop_images_when_full=cfg.drop_images_when_full,
+            image_format=cfg.image_format,
+            streaming_encoding=cfg.streaming_encoding,
+            async_saving=cfg.async_saving,
         )
 
     # Load pretrained policy
     policy = None if cfg.policy is None else make_policy(cfg.policy, ds_meta=dataset.meta)
+    if policy is not None and policy.config.compile:
+        warmup_policy(policy, get_safe_torch_device(policy.config.device), policy.config.use_amp)
 
     if not robot.is_connected:
         robot.connect()
@@ -327,6 +342,7 @@ def record(
 
     log_say("Stop recording", cfg.play_sounds, blocking=True)
     stop_recording(robot, listener, cfg.display_cameras)
+    dataset.stop_episode_saver()
 
     if cfg.push_to_hub:
         dataset.push_to_hub(tags=cfg.tags, private=cfg.private)
@@ -478,6 +478,10 @@ def eval_main(cfg: EvalPipelineConfig):
     policy.eval()
 
     with torch.no_grad(), torch.autocast(device_type=device.type) if cfg.policy.use_amp else nullcontext():
+        if cfg.policy.compile:
+            # So that the compilation isn't counted in the duration of the first episodes
+            duration = policy.warmup(batch_size=cfg.eval.batch_size)
+            logging.info(f"Compiled the policy in {duration:.1f}s")
         info = eval_policy(
             env,
             policy,
@@ -40,6 +40,20 @@ python lerobot/scripts/push_dataset_to_hub.py \
 --raw-format umi_zarr \
 --repo-id lerobot/umi_cup_in_the_wild
 ```
+
+The `aloha_hdf5`, `pusht_zarr`, `umi_zarr` and `xarm_pkl` formats are converted to the current LeRobotDataset
+format, with `--num-workers` processes converting episodes concurrently (see `parallel_conversion.py`). The
+conversion runs offline when `--push-to-hub 0` is used:
+```
+python lerobot/scripts/push_dataset_to_hub.py \
+--raw-dir data/aloha_sim_insertion_human_raw \
+--raw-format aloha_hdf5 \
+--repo-id lerobot/aloha_sim_insertion_human \
+--local-dir data/lerobot/aloha_sim_insertion_human \
+--single-task "Insert the peg into the socket." \
+--num-workers 8 \
+--push-to-hub 0
+```
 """
 
 import argparse
@@ -55,6 +69,10 @@ from safetensors.torch import save_file
 
 from lerobot.common.datasets.compute_stats import compute_stats
 from lerobot.common.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDataset
+from lerobot.common.datasets.push_dataset_to_hub.parallel_conversion import (
+    PARALLEL_RAW_FORMATS,
+    convert_raw_dataset,
+)
 from lerobot.common.datasets.push_dataset_to_hub.utils import check_repo_id
 from lerobot.common.datasets.utils import create_branch, create_lerobot_dataset_card, flatten_dict
 
@@ -159,6 +177,7 @@ def push_dataset_to_hub(
     cache_dir: Path = Path("/tmp"),
     tests_data_dir: Path | None = None,
     encoding: dict | None = None,
+    single_task: str | None = None,
 ):
     check_repo_id(repo_id)
     user_id, dataset_id = repo_id.split("/")
@@ -171,6 +190,9 @@ def push_dataset_to_hub(
             f"`python lerobot/common/datasets/push_dataset_to_hub/_download_raw.py --raw-dir your/raw/dir --repo-id your/repo/id_raw`"
         )
 
+    if raw_format in PARALLEL_RAW_FORMATS and tests_data_dir:
+        raise ValueError(f"`tests_data_dir` isn't supported by the parallel conversion of '{raw_format}'.")
+
     if local_dir:
         # Robustify when `local_dir` is str instead of Path
         local_dir = Path(local_dir)
@@ -189,6 +211,9 @@ def push_dataset_to_hub(
             elif not resume:
                 raise ValueError(f"`local_dir` already exists ({local_dir}). Use `--force-override 1`.")
 
+        if raw_format in PARALLEL_RAW_FORMATS and resume:
+            raise ValueError(f"The conversion of '{raw_format}' can't be resumed.")
+
         meta_data_dir = local_dir / "meta_data"
         videos_dir = local_dir / "videos"
     else:
@@ -201,6 +226,23 @@ def push_dataset_to_hub(
         raise NotImplementedError()
         # raw_format = auto_find_raw_format(raw_dir)
 
+    if raw_format in PARALLEL_RAW_FORMATS:
+        lerobot_dataset = convert_raw_dataset(
+            raw_dir,
+            raw_format,
+            repo_id,
+            root=local_dir,
+            fps=fps,
+            video=video,
+            episodes=episodes,
+            single_task=single_task,
+            num_workers=num_workers,
+            encoding=encoding,
+        )
+        if push_to_hub:
+            lerobot_dataset.push_to_hub()
+        return lerobot_dataset
+
     # convert dataset from original raw format to LeRobot format
     from_raw_to_lerobot_format = get_from_raw_to_lerobot_format_fn(raw_format)
 
@@ -320,7 +362,8 @@ def main():
         "--num-workers",
         type=int,
         default=8,
-        help="Number of processes of Dataloader for computing the dataset statistics.",
+        help="Number of processes converting the episodes concurrently, or of the Dataloader computing the "
+        "dataset statistics for the formats which aren't converted in parallel.",
     )
     parser.add_argument(
         "--episodes",
@@ -328,6 +371,11 @@ def main():
         nargs="*",
         help="When provided, only converts the provided episodes (e.g `--episodes 2 3 4`). Useful to test the code on 1 episode.",
     )
+    parser.add_argument(
+        "--single-task",
+        type=str,
+        help="Task of all the episodes (e.g. `Insert the peg into the socket.`). Defaults to the task of the raw format, if any.",
+    )
     parser.add_argument(
         "--force-override",
         type=int,
@@ -352,7 +400,8 @@ def main():
         type=Path,
         help=(
             "When provided, save tests artifacts into the given directory "
-            "(e.g. `--tests-data-dir tests/data` will save to tests/data/{--repo-id})."
+            "(e.g. `--tests-data-dir tests/data` will save to tests/data/{--repo-id}). Not supported for the "
+            "formats converted in parallel."
         ),
     )
 
@@ -22,22 +22,44 @@ from typing import Any
 import torch
 from termcolor import colored
 from torch.amp import GradScaler
+from torch.nn.parallel import DistributedDataParallel
 from torch.optim import Optimizer
 
 from lerobot.common.datasets.factory import make_dataset
-from lerobot.common.datasets.sampler import EpisodeAwareSampler
-from lerobot.common.datasets.utils import cycle
+from lerobot.common.datasets.lerobot_dataset import MultiLeRobotDataset
+from lerobot.common.datasets.prefetcher import DevicePrefetcher, batch_to_device
+from lerobot.common.datasets.sampler import (
+    DistributedEpisodeAwareSampler,
+    EpisodeAwareSampler,
+    EpisodeBlockSampler,
+    WeightedDatasetSampler,
+)
+from lerobot.common.datasets.utils import cycle, get_batch_size, split_batch
 from lerobot.common.envs.factory import make_env
 from lerobot.common.optim.factory import make_optimizer_and_scheduler
 from lerobot.common.policies.factory import make_policy
 from lerobot.common.policies.pretrained import PreTrainedPolicy
 from lerobot.common.policies.utils import get_device_from_parameters
+from lerobot.common.utils.distributed_utils import (
+    barrier,
+    broadcast_object,
+    cleanup_distributed,
+    get_rank,
+    get_world_size,
+    init_distributed,
+    is_distributed,
+    is_main_process,
+    main_process_first,
+    unwrap_policy,
+)
 from lerobot.common.utils.logging_utils import AverageMeter, MetricsTracker
-from lerobot.common.utils.random_utils import set_seed
+from lerobot.common.utils.random_utils import set_rank_seed, set_seed
 from lerobot.common.utils.train_utils import (
+    AsyncCheckpointer,
     get_step_checkpoint_dir,
     get_step_identifier,
     load_training_state,
+    prune_checkpoints,
     save_checkpoint,
     update_last_checkpoint,
 )
@@ -63,14 +85,36 @@ def update_policy(
     lr_scheduler=None,
     use_amp: bool = False,
     lock=None,
+    micro_batch_size: int | None = None,
 ) -> tuple[MetricsTracker, dict]:
     start_time = time.perf_counter()
     device = get_device_from_parameters(policy)
     policy.train()
-    with torch.autocast(device_type=device.type) if use_amp else nullcontext():
-        loss, output_dict = policy.forward(batch)
-        # TODO(rcadene): policy.unnormalize_outputs(out_dict)
-    grad_scaler.scale(loss).backward()
+
+    # The gradients of the micro-batches are accumulated, weighted by their share of the batch, so that they
+    # sum to the gradients of the loss over the whole batch
+    batch_size = get_batch_size(batch)
+    micro_batches = [batch] if micro_batch_size is None else split_batch(batch, micro_batch_size)
+    loss = 0.0
+    output_dict = {}
+    for i, micro_batch in enumerate(micro_batches):
+        weight = get_batch_size(micro_batch) / batch_size
+        # A `DistributedDataParallel` policy only needs to sync the gradients after the last micro-batch
+        is_last = i == len(micro_batches) - 1
+        no_sync = isinstance(policy, DistributedDataParallel) and not is_last
+        with policy.no_sync() if no_sync else nullcontext():
+            with torch.autocast(device_type=device.type) if use_amp else nullcontext():
+                # Called rather than `policy.forward`, for `DistributedDataParallel` to sync the gradients
+                micro_loss, micro_output_dict = policy(micro_batch)
+                # TODO(rcadene): policy.unnormalize_outputs(out_dict)
+            grad_scaler.scale(micro_loss * weight).backward()
+
+        loss += micro_loss.detach() * weight
+        for key, value in (micro_output_dict or {}).items():
+            if isinstance(value, (int, float)):
+                output_dict[key] = output_dict.get(key, 0.0) + value * weight
+            else:
+                output_dict[key] = value
 
     # Unscale the gradient of the optimizer's assigned params in-place **prior to gradient clipping**.
     grad_scaler.unscale_(optimizer)
@@ -90,13 +134,13 @@ def update_policy(
 
     optimizer.zero_grad()
 
-    # Step through pytorch scheduler at every batch instead of epoch
+    # Step through pytorch scheduler at every optimization step instead of epoch
     if lr_scheduler is not None:
         lr_scheduler.step()
 
-    if has_method(policy, "update"):
+    if has_method(unwrap_policy(policy), "update"):
         # To possibly update an internal buffer (for instance an Exponential Moving Average like in TDMPC).
-        policy.update()
+        unwrap_policy(policy).update()
 
     train_metrics.loss = loss.item()
     train_metrics.grad_norm = grad_norm.item()
@@ -105,12 +149,64 @@ def update_policy(
     return train_metrics, output_dict
 
 
+def make_sampler(
+    cfg: TrainPipelineConfig, dataset: torch.utils.data.Dataset
+) -> torch.utils.data.Sampler | None:
+    """Returns the sampler of the training frames, or None if the dataloader can simply shuffle them."""
+    if cfg.dataset.streaming:
+        # the streaming dataset shuffles and shards its episodes itself
+        return None
+    elif isinstance(dataset, MultiLeRobotDataset):
+        # Frames are drawn with replacement, from each process's own random stream in distributed training
+        return WeightedDatasetSampler(dataset.cumulative_frames, weights=cfg.dataset.sampling_weights)
+    elif is_distributed():
+        if cfg.dataset.episode_block_size is not None:
+            logging.warning("`episode_block_size` isn't supported in distributed training, it is ignored.")
+        return DistributedEpisodeAwareSampler(
+            dataset.episode_data_index,
+            num_replicas=get_world_size(),
+            rank=get_rank(),
+            drop_n_last_frames=getattr(cfg.policy, "drop_n_last_frames", 0),
+            shuffle=True,
+            seed=cfg.seed if cfg.seed is not None else 0,
+        )
+    elif cfg.dataset.episode_block_size is not None:
+        return EpisodeBlockSampler(
+            dataset.episode_data_index,
+            drop_n_last_frames=getattr(cfg.policy, "drop_n_last_frames", 0),
+            shuffle=True,
+            block_size=cfg.dataset.episode_block_size,
+            shuffle_buffer_size=cfg.dataset.shuffle_buffer_size,
+        )
+    elif hasattr(cfg.policy, "drop_n_last_frames"):
+        return EpisodeAwareSampler(
+            dataset.episode_data_index,
+            drop_n_last_frames=cfg.policy.drop_n_last_frames,
+            shuffle=True,
+        )
+    else:
+        return None
+
+
 @parser.wrap()
 def train(cfg: TrainPipelineConfig):
     cfg.validate()
+
+    # Check device is available
+    device = get_safe_torch_device(cfg.policy.device, log=True)
+    # With several processes launched by torchrun, each one trains the policy on its share of the batches and
+    # the gradients are averaged across processes. Only the main process logs, evaluates and saves checkpoints.
+    device = init_distributed(device, cfg.ddp_timeout_s)
+    if is_distributed():
+        # The output dir may be named after the time at which each process validated the config
+        cfg.output_dir = broadcast_object(cfg.output_dir)
+        if not is_main_process():
+            logging.getLogger().setLevel(logging.WARNING)
+        logging.info(f"Distributed training on {get_world_size()} processes")
+
     logging.info(pformat(cfg.to_dict()))
 
-    if cfg.wandb.enable and cfg.wandb.project:
+    if is_main_process() and cfg.wandb.enable and cfg.wandb.project:
         wandb_logger = WandBLogger(cfg)
     else:
         wandb_logger = None
@@ -119,19 +215,18 @@ def train(cfg: TrainPipelineConfig):
     if cfg.seed is not None:
         set_seed(cfg.seed)
 
-    # Check device is available
-    device = get_safe_torch_device(cfg.policy.device, log=True)
     torch.backends.cudnn.benchmark = True
     torch.backends.cuda.matmul.allow_tf32 = True
 
     logging.info("Creating dataset")
-    dataset = make_dataset(cfg)
+    with main_process_first():
+        dataset = make_dataset(cfg)
 
     # Create environment used for evaluating checkpoints during training on simulation data.
     # On real-world data, no need to create an environment as evaluations are done outside train.py,
     # using the eval.py instead, with gym_dora environment and dora-rs.
     eval_env = None
-    if cfg.eval_freq > 0 and cfg.env is not None:
+    if is_main_process() and cfg.eval_freq > 0 and cfg.env is not None:
         logging.info("Creating env")
         eval_env = make_env(cfg.env, n_envs=cfg.eval.batch_size)
 
@@ -150,6 +245,16 @@ def train(cfg: TrainPipelineConfig):
     if cfg.resume:
         step, optimizer, lr_scheduler = load_training_state(cfg.checkpoint_path, optimizer, lr_scheduler)
 
+    train_policy = policy
+    if is_distributed():
+        # All the processes have the same random state at this point, from the seed or the checkpoint
+        set_rank_seed(get_rank())
+        train_policy = DistributedDataParallel(
+            policy,
+            device_ids=[device.index] if device.type == "cuda" else None,
+            find_unused_parameters=cfg.ddp_find_unused_parameters,
+        )
+
     num_learnable_params = sum(p.numel() for p in policy.parameters() if p.requires_grad)
     num_total_params = sum(p.numel() for p in policy.parameters())
 
@@ -163,17 +268,9 @@ def train(cfg: TrainPipelineConfig):
     logging.info(f"{num_total_params=} ({format_big_number(num_total_params)})")
 
     # create dataloader for offline training
-    if hasattr(cfg.policy, "drop_n_last_frames"):
-        shuffle = False
-        sampler = EpisodeAwareSampler(
-            dataset.episode_data_index,
-            drop_n_last_frames=cfg.policy.drop_n_last_frames,
-            shuffle=True,
-        )
-    else:
-        shuffle = True
-        sampler = None
-
+    sampler = make_sampler(cfg, dataset)
+    # the streaming dataset shuffles and shards its episodes itself
+    shuffle = sampler is None and not cfg.dataset.streaming
     dataloader = torch.utils.data.DataLoader(
         dataset,
         num_workers=cfg.num_workers,
@@ -183,42 +280,66 @@ def train(cfg: TrainPipelineConfig):
         pin_memory=device.type != "cpu",
         drop_last=False,
     )
-    dl_iter = cycle(dataloader)
+    # The streaming dataset is reshuffled at each pass, its workers can't advance the epoch themselves
+    dl_iter = cycle(dataloader, set_epoch=dataset.set_epoch if cfg.dataset.streaming else None)
+    prefetcher = None
+    if cfg.prefetch_batches > 0:
+        prefetcher = DevicePrefetcher(dl_iter, device, num_batches=cfg.prefetch_batches)
+        dl_iter = prefetcher
 
-    policy.train()
+    train_policy.train()
+
+    checkpointer = None
+    if is_main_process() and cfg.save_checkpoint and cfg.async_checkpoint:
+        checkpointer = AsyncCheckpointer(cfg.keep_last_checkpoints, cfg.keep_checkpoint_every)
 
     train_metrics = {
         "loss": AverageMeter("loss", ":.3f"),
         "grad_norm": AverageMeter("grdn", ":.3f"),
         "lr": AverageMeter("lr", ":0.1e"),
         "update_s": AverageMeter("updt_s", ":.3f"),
-        "dataloading_s": AverageMeter("data_s", ":.3f"),
+        "dataloading_wait_s": AverageMeter("data_wait_s", ":.3f"),
+        "dataloading_copy_s": AverageMeter("data_copy_s", ":.3f"),
     }
 
+    # Each step consumes a batch on each process
     train_tracker = MetricsTracker(
-        cfg.batch_size, dataset.num_frames, dataset.num_episodes, train_metrics, initial_step=step
+        cfg.batch_size * get_world_size(),
+        dataset.num_frames,
+        dataset.num_episodes,
+        train_metrics,
+        initial_step=step,
     )
 
     logging.info("Start offline training on a fixed dataset")
+    first_step = step
     for _ in range(step, cfg.steps):
         start_time = time.perf_counter()
         batch = next(dl_iter)
-        train_tracker.dataloading_s = time.perf_counter() - start_time
+        train_tracker.dataloading_wait_s = time.perf_counter() - start_time
 
-        for key in batch:
-            if isinstance(batch[key], torch.Tensor):
-                batch[key] = batch[key].to(device, non_blocking=True)
+        if prefetcher is not None:
+            # The batch was copied to the device in the background
+            train_tracker.dataloading_copy_s = prefetcher.copy_s
+        else:
+            start_time = time.perf_counter()
+            batch = batch_to_device(batch, device, non_blocking=True)
+            train_tracker.dataloading_copy_s = time.perf_counter() - start_time
 
         train_tracker, output_dict = update_policy(
             train_tracker,
-            policy,
+            train_policy,
             batch,
             optimizer,
             cfg.optimizer.grad_clip_norm,
             grad_scaler=grad_scaler,
             lr_scheduler=lr_scheduler,
             use_amp=cfg.policy.use_amp,
+            micro_batch_size=cfg.micro_batch_size,
         )
+        if cfg.policy.compile and step == first_step:
+            # The policy is compiled during the first step, which the following steps don't wait for
+            logging.info(f"Compiled the policy in the first step, in {train_tracker.update_s.val:.1f}s")
 
         # Note: eval and checkpoint happens *after* the `step`th training update has completed, so we
         # increment `step` here.
@@ -237,15 +358,22 @@ def train(cfg: TrainPipelineConfig):
                 wandb_logger.log_dict(wandb_log_dict, step)
             train_tracker.reset_averages()
 
-        if cfg.save_checkpoint and is_saving_step:
+        if is_main_process() and cfg.save_checkpoint and is_saving_step:
             logging.info(f"Checkpoint policy after step {step}")
             checkpoint_dir = get_step_checkpoint_dir(cfg.output_dir, cfg.steps, step)
-            save_checkpoint(checkpoint_dir, step, cfg, policy, optimizer, lr_scheduler)
-            update_last_checkpoint(checkpoint_dir)
-            if wandb_logger:
-                wandb_logger.log_policy(checkpoint_dir)
-
-        if cfg.env and is_eval_step:
+            log_policy = wandb_logger.log_policy if wandb_logger else None
+            if checkpointer is not None:
+                start_time = time.perf_counter()
+                checkpointer.save(checkpoint_dir, step, cfg, policy, optimizer, lr_scheduler, log_policy)
+                logging.info(f"Checkpoint copied in {time.perf_counter() - start_time:.2f}s, writing it")
+            else:
+                save_checkpoint(checkpoint_dir, step, cfg, policy, optimizer, lr_scheduler)
+                update_last_checkpoint(checkpoint_dir)
+                prune_checkpoints(checkpoint_dir.parent, cfg.keep_last_checkpoints, cfg.keep_checkpoint_every)
+                if log_policy:
+                    log_policy(checkpoint_dir)
+
+        if eval_env and is_eval_step:
             step_id = get_step_identifier(step, cfg.steps)
             logging.info(f"Eval policy at step {step}")
             with (
@@ -278,8 +406,18 @@ def train(cfg: TrainPipelineConfig):
                 wandb_logger.log_dict(wandb_log_dict, step, mode="eval")
                 wandb_logger.log_video(eval_info["video_paths"][0], step, mode="eval")
 
+        if is_saving_step or is_eval_step:
+            # The other processes wait here for the main one to save and evaluate, instead of in the all-reduce
+            # of the gradients of the next step
+            barrier()
+
+    if prefetcher is not None:
+        prefetcher.close()
+    if checkpointer is not None:
+        checkpointer.stop()
     if eval_env:
         eval_env.close()
+    cleanup_distributed()
     logging.info("End of training")
 
 
@@ -17,8 +17,15 @@ from unittest.mock import patch
 
 import numpy as np
 import pytest
+import torch
 
+from lerobot.common.datasets.compute_dataset_stats import (
+    compute_dataset_stats,
+    compute_episode_stats_from_files,
+)
 from lerobot.common.datasets.compute_stats import (
+    ImageStats,
+    RunningStats,
     _assert_type_and_shape,
     aggregate_feature_stats,
     aggregate_stats,
@@ -27,7 +34,12 @@ from lerobot.common.datasets.compute_stats import (
     get_feature_stats,
     sample_images,
     sample_indices,
+    tree_aggregate_stats,
 )
+from lerobot.common.datasets.image_writer import write_image
+from lerobot.common.datasets.lerobot_dataset import LeRobotDatasetMetadata
+from lerobot.common.datasets.utils import EPISODES_STATS_PATH, load_episodes_stats
+from tests.fixtures.constants import DUMMY_CHW
 
 
 def mock_load_image_as_numpy(path, dtype, channel_first):
@@ -134,6 +146,41 @@ def test_get_feature_stats_single_value():
     np.testing.assert_equal(result["count"], np.array([1]))
 
 
+@pytest.mark.parametrize("axis, keepdims", [(0, False), ((0, 2, 3), True)])
+def test_running_stats(axis, keepdims):
+    rng = np.random.default_rng(0)
+    batches = [rng.integers(0, 256, size=(n, 3, 4, 5), dtype=np.uint8) for n in [1, 4, 2]]
+    running_stats = RunningStats(axis=axis, keepdims=keepdims)
+    for batch in batches:
+        running_stats.update(batch)
+
+    result = running_stats.get_stats()
+    expected = get_feature_stats(np.concatenate(batches), axis=axis, keepdims=keepdims)
+    for key, val in expected.items():
+        assert result[key].shape == val.shape, key
+        np.testing.assert_allclose(result[key], val, err_msg=key)
+
+
+@pytest.mark.parametrize("channel_first", [True, False])
+def test_image_stats(tmp_path, channel_first):
+    rng = np.random.default_rng(0)
+    # Large enough to be downsampled
+    images = [rng.random((480, 640, 3), dtype=np.float32) for _ in range(5)]
+    image_stats = ImageStats()
+    for image in images:
+        image_stats.add_image(image.transpose(2, 0, 1) if channel_first else image)
+
+    paths = []
+    for i, image in enumerate(images):
+        paths.append(tmp_path / f"frame_{i:06d}.png")
+        write_image(image, paths[-1])
+    expected = compute_episode_stats({"image": paths}, {"image": {"dtype": "image"}})["image"]
+    result = image_stats.get_stats()
+    for key, val in expected.items():
+        assert result[key].shape == val.shape, key
+        np.testing.assert_allclose(result[key], val, err_msg=key)
+
+
 def test_compute_episode_stats():
     episode_data = {
         "observation.image": [f"image_{i}.jpg" for i in range(100)],
@@ -309,3 +356,82 @@ def test_aggregate_stats():
             results[fkey]["std"], expected_agg_stats[fkey]["std"], atol=1e-04, rtol=1e-04
         )
         np.testing.assert_allclose(results[fkey]["count"], expected_agg_stats[fkey]["count"])
+
+
+def test_tree_aggregate_stats():
+    rng = np.random.default_rng(0)
+    all_stats = []
+    for _ in range(11):
+        data = rng.normal(size=(rng.integers(2, 20), 2))
+        all_stats.append({"observation.state": get_feature_stats(data, axis=0, keepdims=False)})
+
+    expected = aggregate_stats(all_stats)
+    results = tree_aggregate_stats(all_stats, fan_in=3)
+    for k in expected["observation.state"]:
+        np.testing.assert_allclose(results["observation.state"][k], expected["observation.state"][k])
+
+    with pytest.raises(ValueError):
+        tree_aggregate_stats(all_stats, fan_in=1)
+
+
+@pytest.fixture
+def stats_dataset(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "dataset", features=features)
+    for ep_length in [5, 7, 4, 6]:
+        for _ in range(ep_length):
+            dataset.add_frame(
+                {"state": torch.randn(2), "image": np.random.rand(*DUMMY_CHW), "task": "Dummy task"}
+            )
+        dataset.save_episode()
+    return dataset
+
+
+def assert_episodes_stats_close(episodes_stats, expected_episodes_stats):
+    assert list(episodes_stats) == list(expected_episodes_stats)
+    for ep_idx, ep_stats in expected_episodes_stats.items():
+        for key in ["state", "index", "timestamp"]:
+            for k, v in ep_stats[key].items():
+                np.testing.assert_allclose(episodes_stats[ep_idx][key][k], v, rtol=1e-6)
+        # images are sampled
+        for k in ["mean", "std"]:
+            np.testing.assert_allclose(episodes_stats[ep_idx]["image"][k], ep_stats["image"][k], atol=0.1)
+
+
+def test_compute_dataset_stats(stats_dataset):
+    expected_episodes_stats = stats_dataset.meta.episodes_stats
+    meta = LeRobotDatasetMetadata(stats_dataset.repo_id, root=stats_dataset.root)
+
+    stats = compute_dataset_stats(meta, num_workers=2, resume=False)
+
+    assert_episodes_stats_close(meta.episodes_stats, expected_episodes_stats)
+    assert_episodes_stats_close(load_episodes_stats(meta.root), expected_episodes_stats)
+    np.testing.assert_allclose(stats["state"]["mean"], stats_dataset.meta.stats["state"]["mean"], rtol=1e-6)
+    assert stats["index"]["count"] == 22
+
+
+def test_compute_dataset_stats_resume(stats_dataset):
+    meta = LeRobotDatasetMetadata(stats_dataset.repo_id, root=stats_dataset.root)
+    expected_episodes_stats = meta.episodes_stats
+    stats_path = meta.root / EPISODES_STATS_PATH
+    # Simulates a crash while writing the stats of the third episode
+    lines = stats_path.read_text().splitlines(keepends=True)
+    stats_path.write_text("".join(lines[:2]) + lines[2][:20])
+
+    computed = []
+
+    def compute_episode_stats_from_files_spy(root, features, data_path, *args):
+        computed.append(data_path)
+        return compute_episode_stats_from_files(root, features, data_path, *args)
+
+    with patch(
+        "lerobot.common.datasets.compute_dataset_stats.compute_episode_stats_from_files",
+        compute_episode_stats_from_files_spy,
+    ):
+        compute_dataset_stats(meta, num_workers=0)
+
+    assert computed == [str(meta.get_data_file_path(2)), str(meta.get_data_file_path(3))]
+    assert_episodes_stats_close(load_episodes_stats(meta.root), expected_episodes_stats)
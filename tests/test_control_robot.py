@@ -55,6 +55,11 @@ from tests.test_robots import make_robot
 from tests.utils import TEST_ROBOT_TYPES, mock_calibration_dir, require_robot
 
 
+def test_record_config_invalid_image_format():
+    with pytest.raises(ValueError, match="Unsupported image format 'jpg'"):
+        RecordControlConfig(repo_id="lerobot/debug", single_task="Do something.", image_format="jpg")
+
+
 @pytest.mark.parametrize("robot_type, mock", TEST_ROBOT_TYPES)
 @require_robot
 def test_teleoperate(tmp_path, request, robot_type, mock):
@@ -15,11 +15,16 @@
 # limitations under the License.
 import json
 import logging
+import pickle
 import re
+import shutil
+import threading
 from copy import deepcopy
 from itertools import chain
 from pathlib import Path
+from unittest.mock import patch
 
+import datasets
 import numpy as np
 import pytest
 import torch
@@ -29,21 +34,31 @@ from safetensors.torch import load_file
 
 import lerobot
 from lerobot.common.datasets.factory import make_dataset
-from lerobot.common.datasets.image_writer import image_array_to_pil_image
+from lerobot.common.datasets.image_writer import SharedImageRing, image_array_to_pil_image
 from lerobot.common.datasets.lerobot_dataset import (
     LeRobotDataset,
     MultiLeRobotDataset,
 )
+from lerobot.common.datasets.sampler import WeightedDatasetSampler
 from lerobot.common.datasets.utils import (
+    INFO_PATH,
+    VALIDATION_PATH,
+    VIDEO_INDEX_PATH,
+    check_timestamps_sync,
     create_branch,
     flatten_dict,
+    hf_transform_to_torch,
+    take_hf_dataset_rows,
     unflatten_dict,
+    write_info,
 )
+from lerobot.common.datasets.video_utils import StreamingVideoEncoder, VideoFrameCacheConfig
 from lerobot.common.envs.factory import make_env_config
 from lerobot.common.policies.factory import make_policy_config
 from lerobot.common.robot_devices.robots.utils import make_robot
 from lerobot.configs.default import DatasetConfig
 from lerobot.configs.train import TrainPipelineConfig
+from lerobot.scripts.train import make_sampler
 from tests.fixtures.constants import DUMMY_CHW, DUMMY_HWC, DUMMY_REPO_ID
 from tests.utils import require_x86_64_kernel
 
@@ -316,12 +331,184 @@ def test_add_frame_image_pil(image_dataset):
     assert dataset[0]["image"].shape == torch.Size(DUMMY_CHW)
 
 
+@pytest.mark.parametrize("image_format", ["npy", "webp"])
+def test_add_frame_image_format(tmp_path, empty_lerobot_dataset_factory, image_format):
+    features = {"image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]}}
+    dataset = empty_lerobot_dataset_factory(
+        root=tmp_path / "test", features=features, image_format=image_format, image_writer_threads=1
+    )
+    images = [np.random.randint(0, 256, DUMMY_CHW, dtype=np.uint8) for _ in range(3)]
+    for image in images:
+        dataset.add_frame({"image": image, "task": "Dummy task"})
+    assert (dataset.root / "images" / "image" / "episode_000000" / f"frame_000000.{image_format}").is_file()
+    dataset.save_episode()
+    dataset.stop_image_writer()
+
+    for i, image in enumerate(images):
+        assert torch.equal(dataset[i]["image"], torch.from_numpy(image).float() / 255)
+    expected_mean = np.stack(images).mean(axis=(0, 2, 3), keepdims=True)[0] / 255
+    np.testing.assert_allclose(dataset.meta.episodes_stats[0]["image"]["mean"], expected_mean, atol=1e-6)
+
+
 def test_image_array_to_pil_image_wrong_range_float_0_255():
     image = np.random.rand(*DUMMY_HWC) * 255
     with pytest.raises(ValueError):
         image_array_to_pil_image(image)
 
 
+def test_getitems_matches_getitem(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_length in [5, 7]:
+        for _ in range(ep_length):
+            frame = {"state": torch.randn(2), "image": np.random.rand(*DUMMY_CHW), "task": "Dummy task"}
+            dataset.add_frame(frame)
+        dataset.save_episode()
+
+    delta_timestamps = {
+        "state": [i / dataset.fps for i in [-2, -1, 0]],
+        "image": [i / dataset.fps for i in [-1, 0]],
+    }
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root, delta_timestamps=delta_timestamps)
+
+    indices = [0, 4, 5, 11, 4]
+    items = dataset.__getitems__(indices)
+    assert len(items) == len(indices)
+    for idx, batch_item in zip(indices, items, strict=True):
+        item = dataset[idx]
+        assert batch_item.keys() == item.keys()
+        for key, val in item.items():
+            if isinstance(val, torch.Tensor):
+                assert batch_item[key].dtype == val.dtype, key
+                assert batch_item[key].shape == val.shape, key
+                assert torch.equal(batch_item[key], val), key
+            else:
+                assert batch_item[key] == val, key
+
+    batch = next(iter(torch.utils.data.DataLoader(dataset, batch_size=4, shuffle=False)))
+    assert batch["state"].shape == (4, 3, 2)
+    assert batch["state_is_pad"].tolist()[0] == [True, True, False]
+    assert batch["image"].shape == (4, 2, *DUMMY_CHW)
+
+
+class PublicDataset:
+    """Exposes only the public API of a `datasets.Dataset`, as if its internals had changed."""
+
+    def __init__(self, dataset: datasets.Dataset):
+        self.dataset = dataset
+
+    def with_format(self, *args, **kwargs) -> datasets.Dataset:
+        return self.dataset.with_format(*args, **kwargs)
+
+
+@pytest.mark.parametrize("select", [None, [7, 2, 5, 0]])
+def test_take_hf_dataset_rows(select):
+    hf_dataset = datasets.Dataset.from_dict({"a": list(range(10)), "b": [float(i) for i in range(10)]})
+    if select is not None:
+        hf_dataset = hf_dataset.select(select)
+    hf_dataset.set_transform(hf_transform_to_torch)
+    rows = np.array([3, 1, 1, 0])
+
+    expected = hf_dataset.with_format("arrow", columns=["a"])[rows]
+    assert take_hf_dataset_rows(hf_dataset, rows, ["a"]).equals(expected)
+    assert take_hf_dataset_rows(PublicDataset(hf_dataset), rows, ["a"]).equals(expected)
+    assert take_hf_dataset_rows(hf_dataset, rows).column_names == ["a", "b"]
+
+
+def test_columnar_cache(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_length in [5, 7]:
+        for _ in range(ep_length):
+            dataset.add_frame({"state": torch.randn(2), "task": "Dummy task"})
+        dataset.save_episode()
+
+    delta_timestamps = {"state": [i / dataset.fps for i in [-2, -1, 0]]}
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root, delta_timestamps=delta_timestamps)
+    cached_dataset = LeRobotDataset(
+        dataset.repo_id, root=dataset.root, delta_timestamps=delta_timestamps, use_columnar_cache=True
+    )
+    assert dataset.columnar_cache is None
+    assert set(cached_dataset.columnar_cache) == {
+        "state",
+        "timestamp",
+        "frame_index",
+        "episode_index",
+        "index",
+        "task_index",
+    }
+    cache_dirs = list((dataset.root / "cache" / "columns").iterdir())
+    assert len(cache_dirs) == 1
+
+    indices = [0, 4, 5, 11]
+    for idx, batch_item in zip(indices, cached_dataset.__getitems__(indices), strict=True):
+        item = dataset[idx]
+        cached_item = cached_dataset[idx]
+        for key, val in item.items():
+            for other in [cached_item, batch_item]:
+                if isinstance(val, torch.Tensor):
+                    assert other[key].dtype == val.dtype, key
+                    assert torch.equal(other[key], val), key
+                else:
+                    assert other[key] == val, key
+
+    # The cache is reused, and a different episodes selection gets its own
+    LeRobotDataset(dataset.repo_id, root=dataset.root, use_columnar_cache=True)
+    assert list((dataset.root / "cache" / "columns").iterdir()) == cache_dirs
+    subset = LeRobotDataset(dataset.repo_id, root=dataset.root, episodes=[1], use_columnar_cache=True)
+    assert len(list((dataset.root / "cache" / "columns").iterdir())) == 2
+    assert len(subset.columnar_cache["index"]) == 7
+    assert subset[0]["index"].item() == 5
+
+
+def test_timestamps_validation_cache(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_length in [5, 7]:
+        for _ in range(ep_length):
+            dataset.add_frame({"state": torch.randn(2), "task": "Dummy task"})
+        dataset.save_episode()
+
+    LeRobotDataset(dataset.repo_id, root=dataset.root)
+    assert len(json.loads((dataset.root / VALIDATION_PATH).read_text())) == 1
+
+    with patch(
+        "lerobot.common.datasets.lerobot_dataset.check_timestamps_sync", wraps=check_timestamps_sync
+    ) as check_mock:
+        # Already validated
+        LeRobotDataset(dataset.repo_id, root=dataset.root)
+        assert check_mock.call_count == 0
+
+        # Another episodes selection, or another tolerance, are validated on their own
+        LeRobotDataset(dataset.repo_id, root=dataset.root, episodes=[1])
+        LeRobotDataset(dataset.repo_id, root=dataset.root, tolerance_s=1e-3)
+        assert check_mock.call_count == 2
+        LeRobotDataset(dataset.repo_id, root=dataset.root, episodes=[1], use_columnar_cache=True)
+        assert check_mock.call_count == 2
+
+
+def test_uint8_images(tmp_path, empty_lerobot_dataset_factory):
+    features = {"image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for _ in range(3):
+        dataset.add_frame({"image": np.random.rand(*DUMMY_CHW), "task": "Dummy task"})
+    dataset.save_episode()
+
+    float_dataset = LeRobotDataset(dataset.repo_id, root=dataset.root)
+    uint8_dataset = LeRobotDataset(dataset.repo_id, root=dataset.root, uint8_images=True)
+    for item, batch_item in zip(
+        [uint8_dataset[i] for i in range(3)], uint8_dataset.__getitems__([0, 1, 2]), strict=True
+    ):
+        idx = item["index"].item()
+        for image in [item["image"], batch_item["image"]]:
+            assert image.dtype == torch.uint8
+            assert image.shape == DUMMY_CHW
+            assert torch.equal(image.type(torch.float32) / 255, float_dataset[idx]["image"])
+
+
 # TODO(aliberts):
 # - [ ] test various attributes & state from init and create
 # - [ ] test init with episodes and check num_frames
@@ -436,6 +623,310 @@ def test_multidataset_frames():
             assert torch.equal(sub_dataset_item[k], dataset_item[k])
 
 
+@pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe is required to read the video info")
+def test_streaming_encoding(tmp_path, empty_lerobot_dataset_factory):
+    features = {"cam": {"dtype": "video", "shape": (3, 48, 64), "names": ["channels", "height", "width"]}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    dataset.start_video_encoders(vcodec="libx264")
+    for _ in range(2):
+        for i in range(10):
+            dataset.add_frame({"cam": np.full((48, 64, 3), i * 20, dtype=np.uint8), "task": "Dummy task"})
+        dataset.save_episode()
+
+    assert not (dataset.root / "images").exists()
+    assert dataset.meta.episodes_stats[1]["cam"]["count"].tolist() == [10]
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root)
+    assert len(dataset) == 20
+    assert abs(dataset[13]["cam"].mean().item() - 60 / 255) < 0.01
+
+
+def test_frame_cache_dir(tmp_path, empty_lerobot_dataset_factory):
+    # The video info is given, so that it isn't read with ffprobe
+    features = {
+        "cam": {
+            "dtype": "video",
+            "shape": (3, 48, 64),
+            "names": ["channels", "height", "width"],
+            "info": {"video.fps": 30, "video.codec": "h264"},
+        }
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    dataset.start_video_encoders(vcodec="libx264")
+    for _ in range(5):
+        dataset.add_frame({"cam": np.zeros((48, 64, 3), dtype=np.uint8), "task": "Dummy task"})
+    dataset.save_episode()
+
+    config = VideoFrameCacheConfig(enable=True, ram_size_mb=0)
+    cache_dir = dataset.create_frame_cache(config).cache_dir
+    assert dataset.create_frame_cache(config).cache_dir == cache_dir
+    assert dataset.create_frame_cache(VideoFrameCacheConfig(resize=(24, 32))).cache_dir != cache_dir
+    dataset.video_backend = "pyav_native"
+    assert dataset.create_frame_cache(config).cache_dir != cache_dir
+    dataset.video_backend = "pyav"
+
+    # Frames decoded from the videos of the re-recorded episode aren't reused
+    dataset.meta.episodes[0]["length"] = 4
+    assert dataset.create_frame_cache(config).cache_dir != cache_dir
+
+
+def test_video_index_not_built_on_load(tmp_path, empty_lerobot_dataset_factory, caplog):
+    # The video info is given, so that it isn't read with ffprobe
+    features = {
+        "cam": {
+            "dtype": "video",
+            "shape": (3, 48, 64),
+            "names": ["channels", "height", "width"],
+            "info": {"video.fps": 30, "video.codec": "h264"},
+        }
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    dataset.start_video_encoders(vcodec="libx264")
+    for _ in range(2):
+        for i in range(10):
+            dataset.add_frame({"cam": np.full((48, 64, 3), i * 20, dtype=np.uint8), "task": "Dummy task"})
+        dataset.save_episode()
+    # Indexed when saved
+    assert set(dataset.meta.video_index) == {0, 1}
+
+    # A dataset recorded without index is opened without indexing its videos
+    (dataset.root / VIDEO_INDEX_PATH).unlink()
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root)
+    assert dataset.meta.video_index == {}
+    assert not (dataset.root / VIDEO_INDEX_PATH).exists()
+
+    # A video whose frames don't match the timestamps only fails its items, with a warning at load
+    dataset.meta.add_video_index(1)
+    dataset.meta.video_index[1]["cam"]["pts"] *= 2
+    (dataset.root / VALIDATION_PATH).unlink()
+    with caplog.at_level(logging.WARNING):
+        dataset.check_timestamps()
+    assert "Episode 1 of 'cam'" in caplog.text
+
+
+def test_save_episode_appends_parquet_only(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_length in [3, 4]:
+        for _ in range(ep_length):
+            dataset.add_frame({"state": torch.randn(2), "task": "Dummy task"})
+        dataset.save_episode()
+        # The saved episode is not concatenated in memory
+        assert dataset._hf_dataset is None
+        assert len(dataset) == dataset.meta.total_frames
+
+    # It is reloaded from the parquet files on access
+    assert dataset[5]["episode_index"].item() == 1
+    assert dataset[5]["index"].item() == 5
+    assert dataset._hf_dataset is not None
+
+
+def test_num_frames_episodes_selection(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_length in [3, 4, 5]:
+        for _ in range(ep_length):
+            dataset.add_frame({"state": torch.randn(2), "task": "Dummy task"})
+        dataset.save_episode()
+
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root, episodes=[0, 2])
+    assert len(dataset) == 8
+    # Without the hf_dataset loaded, the frames are counted from the lengths of the selected episodes
+    dataset.hf_dataset = None
+    assert dataset.num_frames == 8
+    assert len(dataset) == 8
+
+
+def test_save_episode_with_dropped_images(tmp_path, empty_lerobot_dataset_factory):
+    features = {"image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]}}
+    dataset = empty_lerobot_dataset_factory(
+        root=tmp_path / "test",
+        features=features,
+        image_writer_processes=1,
+        image_writer_threads=1,
+        image_writer_shared_memory_slots=1,
+        drop_images_when_full=True,
+    )
+    image = np.random.rand(*DUMMY_CHW).astype(np.float32)
+    ring = SharedImageRing(image.shape, image.dtype, 1)
+    dataset.image_writer.rings[(image.shape, image.dtype.str)] = ring
+    try:
+        # The only slot is held, as if it was being written, so the images of the episode are dropped
+        ring.put(image)
+        for _ in range(3):
+            dataset.add_frame({"image": image, "task": "Dummy task"})
+        with pytest.raises(RuntimeError, match="3 images of episode 0 were dropped"):
+            dataset.save_episode()
+        dataset.clear_episode_buffer()
+
+        # Recorded again without dropping images, which wait for the slot to be freed by the writer
+        dataset.stop_image_writer()
+        dataset.start_image_writer(num_processes=1, num_threads=1, num_shared_memory_slots=1)
+        for _ in range(3):
+            dataset.add_frame({"image": image, "task": "Dummy task"})
+        dataset.save_episode()
+    finally:
+        dataset.stop_image_writer()
+    assert dataset.meta.total_frames == 3
+
+
+def test_async_saving(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features, async_saving=True)
+    dataset.start_image_writer(num_threads=2)
+    futures = []
+    for ep_idx, ep_length in enumerate([5, 3, 4]):
+        # The next episode is recorded while the previous ones are being saved
+        assert dataset.episode_buffer["episode_index"] == ep_idx
+        for i in range(ep_length):
+            dataset.add_frame(
+                {
+                    "state": torch.full((2,), float(i)),
+                    "image": np.random.rand(*DUMMY_CHW),
+                    "task": f"Task {ep_idx % 2}",
+                }
+            )
+        futures.append(dataset.save_episode())
+
+    dataset.stop_image_writer()
+    dataset.stop_episode_saver()
+    assert all(future.done() for future in futures)
+    assert dataset.meta.total_episodes == 3
+    assert [ep["length"] for ep in dataset.meta.episodes.values()] == [5, 3, 4]
+    assert dataset.meta.total_tasks == 2
+    assert not (dataset.root / "images").exists()
+
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root)
+    assert [dataset[idx]["index"].item() for idx in range(len(dataset))] == list(range(12))
+    assert dataset[6]["episode_index"].item() == 1
+    assert dataset[6]["state"].tolist() == [1, 1]
+    assert dataset[6]["task"] == "Task 1"
+
+
+def test_async_saving_metadata_snapshot(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features, async_saving=True)
+    written_total_tasks = []
+
+    def write_info_meanwhile(info, local_dir):
+        # A task of the next episode is added by the recording thread while the info is being written
+        if dataset.meta.get_task_index("Next task") is None:
+            dataset.meta.add_task("Next task")
+        written_total_tasks.append(info["total_tasks"])
+        write_info(info, local_dir)
+
+    with patch("lerobot.common.datasets.lerobot_dataset.write_info", side_effect=write_info_meanwhile):
+        for _ in range(3):
+            dataset.add_frame({"state": torch.randn(2), "task": "Dummy task"})
+        dataset.save_episode()
+        dataset.stop_episode_saver()
+
+    # The info written is the one of the episode, not the one being updated for the next episode
+    assert written_total_tasks == [1]
+    assert json.loads((dataset.root / INFO_PATH).read_text())["total_tasks"] == 1
+    assert dataset.meta.total_tasks == 2
+    # The lock of the metadata isn't pickled
+    assert pickle.loads(pickle.dumps(dataset.meta)).total_tasks == 2
+
+
+def test_async_saving_waits_in_background(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+        # The video info is given, so that it isn't read with ffprobe
+        "cam": {
+            "dtype": "video",
+            "shape": (3, 48, 64),
+            "names": ["channels", "height", "width"],
+            "info": {"video.fps": 30, "video.codec": "h264"},
+        },
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features, async_saving=True)
+    dataset.start_image_writer(num_threads=2)
+    dataset.start_video_encoders(vcodec="libx264")
+
+    waiting_threads = []
+    wait_images = dataset.image_writer.wait_until_done
+
+    def record_wait_images(*args, **kwargs):
+        waiting_threads.append(threading.current_thread().name)
+        return wait_images(*args, **kwargs)
+
+    finish_video = StreamingVideoEncoder.finish
+
+    def record_finish_video(self):
+        waiting_threads.append(threading.current_thread().name)
+        return finish_video(self)
+
+    dataset.image_writer.wait_until_done = record_wait_images
+    with patch.object(StreamingVideoEncoder, "finish", record_finish_video):
+        for ep_length in [4, 3]:
+            for i in range(ep_length):
+                dataset.add_frame(
+                    {
+                        "image": np.random.rand(*DUMMY_CHW),
+                        "cam": np.full((48, 64, 3), i * 20, dtype=np.uint8),
+                        "task": "Dummy task",
+                    }
+                )
+            dataset.save_episode()
+        dataset.stop_episode_saver()
+    dataset.stop_image_writer()
+
+    # The images and videos of the episodes were waited for by the episode saver only
+    assert len(waiting_threads) >= 4
+    assert all(name.startswith("episode_saver") for name in waiting_threads)
+    dataset = LeRobotDataset(dataset.repo_id, root=dataset.root)
+    assert [ep["length"] for ep in dataset.meta.episodes.values()] == [4, 3]
+    assert abs(dataset[5]["cam"].mean().item() - 20 / 255) < 0.01
+
+
+def test_multidataset_local(tmp_path, empty_lerobot_dataset_factory):
+    state = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    image = {"image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]}}
+    for repo_id, features, ep_lengths in [("dummy/a", {**state, **image}, [3, 4]), ("dummy/b", state, [5])]:
+        dataset = empty_lerobot_dataset_factory(root=tmp_path / repo_id, repo_id=repo_id, features=features)
+        for ep_length in ep_lengths:
+            for _ in range(ep_length):
+                frame = {"state": torch.randn(2), "task": "Dummy task"}
+                if "image" in features:
+                    frame["image"] = np.random.rand(*DUMMY_CHW)
+                dataset.add_frame(frame)
+            dataset.save_episode()
+
+    delta_timestamps = {"state": [-1 / 30, 0], "image": [0]}
+    dataset = MultiLeRobotDataset(["dummy/a", "dummy/b"], root=tmp_path, delta_timestamps=delta_timestamps)
+    assert dataset.disabled_features == {"image"}
+    # The disabled image column isn't loaded at all
+    assert "image" not in dataset._datasets[0].hf_dataset.column_names
+    assert dataset.cumulative_frames == [0, 7, 12]
+    assert len(dataset) == 12
+
+    indices = [11, 0, 6, 7, 3]
+    for idx, batch_item in zip(indices, dataset.__getitems__(indices), strict=True):
+        item = dataset[idx]
+        assert item["dataset_index"].item() == int(idx >= 7)
+        assert item["index"].item() == (idx if idx < 7 else idx - 7)
+        assert "image" not in item and "image_is_pad" not in item
+        assert item.keys() == batch_item.keys()
+        for key, val in item.items():
+            if isinstance(val, torch.Tensor):
+                assert torch.equal(batch_item[key], val), key
+
+    with pytest.raises(IndexError):
+        dataset[12]
+
+    # Only the frames of the second dataset are sampled for training
+    cfg = TrainPipelineConfig(
+        dataset=DatasetConfig(repo_id="dummy/a", sampling_weights=[0, 1]), policy=make_policy_config("act")
+    )
+    sampler = make_sampler(cfg, dataset)
+    assert isinstance(sampler, WeightedDatasetSampler)
+    assert len(sampler) == 12
+    assert all(idx >= 7 for idx in sampler)
+
+
 # TODO(aliberts): Move to more appropriate location
 def test_flatten_unflatten_dict():
     d = {
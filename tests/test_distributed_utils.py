@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import os
+import socket
+from pathlib import Path
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.amp import GradScaler
+from torch.nn.parallel import DistributedDataParallel
+
+from lerobot.common.utils.distributed_utils import (
+    broadcast_object,
+    cleanup_distributed,
+    get_rank,
+    get_world_size,
+    init_distributed,
+    is_distributed,
+    is_main_process,
+    unwrap_policy,
+)
+from lerobot.common.utils.logging_utils import AverageMeter, MetricsTracker
+from lerobot.scripts.train import update_policy
+
+WORLD_SIZE = 2
+
+
+class DummyPolicy(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(3, 2)
+
+    def forward(self, batch: dict) -> tuple[torch.Tensor, dict]:
+        loss = (self.linear(batch["observation.state"]) - batch["action"]).pow(2).mean()
+        return loss, {}
+
+
+def make_batch() -> dict:
+    generator = torch.Generator().manual_seed(0)
+    return {
+        "observation.state": torch.randn(8, 3, generator=generator),
+        "action": torch.randn(8, 2, generator=generator),
+    }
+
+
+def train_one_step(policy: torch.nn.Module, batch: dict, micro_batch_size: int | None = None) -> None:
+    optimizer = torch.optim.SGD(policy.parameters(), lr=0.1)
+    metrics = {key: AverageMeter(key) for key in ["loss", "grad_norm", "lr", "update_s"]}
+    metrics = MetricsTracker(8, 100, 10, metrics)
+    update_policy(
+        metrics,
+        policy,
+        batch,
+        optimizer,
+        10.0,
+        GradScaler("cpu", enabled=False),
+        micro_batch_size=micro_batch_size,
+    )
+
+
+def run_distributed(rank: int, port: int, output_dir: Path):
+    os.environ.update(
+        MASTER_ADDR="localhost",
+        MASTER_PORT=str(port),
+        WORLD_SIZE=str(WORLD_SIZE),
+        RANK=str(rank),
+        LOCAL_RANK=str(rank),
+    )
+    device = init_distributed(torch.device("cpu"))
+    try:
+        assert is_distributed() and get_rank() == rank and get_world_size() == WORLD_SIZE
+        assert is_main_process() == (rank == 0)
+        assert broadcast_object(f"rank_{rank}") == "rank_0"
+
+        # Different initializations, which DistributedDataParallel replaces with the one of rank 0
+        torch.manual_seed(rank)
+        policy = DistributedDataParallel(DummyPolicy().to(device))
+        # Each rank trains on its half of the batch, split in micro-batches of 3 and 1 samples
+        batch = {key: value[rank::WORLD_SIZE] for key, value in make_batch().items()}
+        train_one_step(policy, batch, micro_batch_size=3)
+        torch.save(unwrap_policy(policy).state_dict(), output_dir / f"rank_{rank}.pt")
+    finally:
+        cleanup_distributed()
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_not_distributed():
+    assert init_distributed(torch.device("cpu")) == torch.device("cpu")
+    assert not is_distributed()
+    assert get_rank() == 0 and get_world_size() == 1 and is_main_process()
+    assert broadcast_object("value") == "value"
+
+
+def test_init_distributed_timeout(monkeypatch):
+    calls = []
+    monkeypatch.setenv("WORLD_SIZE", str(WORLD_SIZE))
+    monkeypatch.setattr(dist, "init_process_group", lambda **kwargs: calls.append(kwargs))
+    init_distributed(torch.device("cpu"), timeout_s=7200)
+    init_distributed(torch.device("cpu"))
+    assert calls == [
+        {"backend": "gloo", "timeout": datetime.timedelta(seconds=7200)},
+        {"backend": "gloo", "timeout": None},
+    ]
+
+
+def test_distributed_update_policy(tmp_path):
+    mp.spawn(run_distributed, args=(get_free_port(), tmp_path), nprocs=WORLD_SIZE, join=True)
+
+    # The gradients are averaged across ranks, as if the whole batch was used by a single process
+    torch.manual_seed(0)
+    policy = DummyPolicy()
+    train_one_step(policy, make_batch())
+    for rank in range(WORLD_SIZE):
+        state_dict = torch.load(tmp_path / f"rank_{rank}.pt")
+        for key, value in policy.state_dict().items():
+            torch.testing.assert_close(state_dict[key], value)
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import queue
+import threading
 import time
 from multiprocessing import queues
 from unittest.mock import MagicMock, patch
@@ -21,11 +22,14 @@ import pytest
 from PIL import Image
 
 from lerobot.common.datasets.image_writer import (
+    IMAGE_FORMATS,
     AsyncImageWriter,
+    SharedImageRing,
     image_array_to_pil_image,
     safe_stop_image_writer,
     write_image,
 )
+from lerobot.common.datasets.utils import load_image_as_numpy
 from tests.fixtures.constants import DUMMY_HWC
 
 DUMMY_IMAGE = "test_image.png"
@@ -324,6 +328,52 @@ def test_wait_until_done_multiprocessing(tmp_path, img_array_factory):
         writer.stop()
 
 
+def test_wait_until_done_directory(tmp_path, img_array_factory):
+    release = threading.Event()
+
+    def write_image_blocking(image, fpath, image_format="png"):
+        if fpath.parent.name == "episode_1":
+            release.wait()
+        write_image(image, fpath, image_format)
+
+    with patch("lerobot.common.datasets.image_writer.write_image", side_effect=write_image_blocking):
+        writer = AsyncImageWriter(num_processes=0, num_threads=2)
+        try:
+            fpaths = {
+                ep: [tmp_path / f"episode_{ep}" / f"frame_{i:06d}.png" for i in range(5)] for ep in [0, 1]
+            }
+            for ep in [0, 1]:
+                fpaths[ep][0].parent.mkdir()
+                for fpath in fpaths[ep]:
+                    writer.save_image(img_array_factory(), fpath)
+            # The images of episode 0 are waited for, while the ones of episode 1 are still being written
+            writer.wait_until_done(tmp_path / "episode_0")
+            assert all(fpath.exists() for fpath in fpaths[0])
+            assert not any(fpath.exists() for fpath in fpaths[1])
+            release.set()
+            writer.wait_until_done(tmp_path / "episode_1")
+            assert all(fpath.exists() for fpath in fpaths[1])
+        finally:
+            release.set()
+            writer.stop()
+
+
+def test_wait_until_done_directory_multiprocessing(tmp_path, img_array_factory):
+    writer = AsyncImageWriter(num_processes=2, num_threads=2)
+    try:
+        for ep in [0, 1]:
+            (tmp_path / f"episode_{ep}").mkdir()
+            for i in range(10):
+                writer.save_image(img_array_factory(), tmp_path / f"episode_{ep}" / f"frame_{i:06d}.png")
+        for ep in [0, 1]:
+            writer.wait_until_done(tmp_path / f"episode_{ep}")
+            assert len(list((tmp_path / f"episode_{ep}").iterdir())) == 10
+        # Nothing left to wait for
+        writer.wait_until_done(tmp_path / "episode_2")
+    finally:
+        writer.stop()
+
+
 def test_exception_handling(tmp_path, img_array_factory):
     writer = AsyncImageWriter()
     try:
@@ -384,3 +434,63 @@ def test_main_process_time(tmp_path, img_tensor_factory):
         assert fpath.exists()
     finally:
         writer.stop()
+
+
+def test_save_image_shared_memory(tmp_path, img_array_factory):
+    writer = AsyncImageWriter(num_processes=2, num_threads=2, num_shared_memory_slots=4)
+    try:
+        image_arrays = [img_array_factory() for _ in range(20)] + [img_array_factory(50, 30)]
+        fpaths = [tmp_path / f"frame_{i:06d}.png" for i in range(len(image_arrays))]
+        for image_array, fpath in zip(image_arrays, fpaths, strict=True):
+            writer.save_image(image_array, fpath)
+        writer.wait_until_done()
+        for image_array, fpath in zip(image_arrays, fpaths, strict=True):
+            assert np.array_equal(np.array(Image.open(fpath)), image_array)
+
+        metrics = writer.metrics
+        # One ring per image shape, whose slots are all released
+        assert metrics["num_slots"] == 8
+        assert metrics["slots_in_use"] == 0
+        assert 1 <= metrics["max_slots_in_use"] <= 4
+        assert metrics["num_dropped_images"] == 0
+    finally:
+        writer.stop()
+
+
+def test_save_image_shared_memory_drop_when_full(tmp_path, img_array_factory):
+    writer = AsyncImageWriter(num_processes=1, num_threads=1, num_shared_memory_slots=1, drop_when_full=True)
+    try:
+        image_array = img_array_factory()
+        ring = writer.rings[(image_array.shape, image_array.dtype.str)] = SharedImageRing(
+            image_array.shape, image_array.dtype, 1
+        )
+        # Holds the only slot, as if it was being written
+        ring.put(image_array)
+        writer.save_image(image_array, tmp_path / DUMMY_IMAGE)
+        writer.wait_until_done()
+        assert not (tmp_path / DUMMY_IMAGE).exists()
+        assert writer.metrics["num_dropped_images"] == 1
+        assert writer.metrics["slots_in_use"] == 1
+        assert writer.pop_num_dropped_images(tmp_path) == 1
+        assert writer.pop_num_dropped_images(tmp_path) == 0
+    finally:
+        writer.stop()
+
+
+@pytest.mark.parametrize("image_format", list(IMAGE_FORMATS))
+def test_write_image_formats(tmp_path, img_array_factory, image_format):
+    image_array = img_array_factory()
+    fpath = tmp_path / f"frame_000000{IMAGE_FORMATS[image_format]}"
+    writer = AsyncImageWriter(num_threads=1, image_format=image_format)
+    try:
+        writer.save_image(image_array, fpath)
+        writer.wait_until_done()
+    finally:
+        writer.stop()
+    # All the formats are lossless
+    assert np.array_equal(load_image_as_numpy(fpath, dtype=np.uint8, channel_first=False), image_array)
+
+
+def test_invalid_image_format():
+    with pytest.raises(ValueError):
+        AsyncImageWriter(image_format="bmp")
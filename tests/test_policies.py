@@ -15,6 +15,7 @@
 # limitations under the License.
 import inspect
 from copy import deepcopy
+from functools import partial
 from pathlib import Path
 
 import einops
@@ -28,7 +29,7 @@ from lerobot.common.datasets.utils import cycle, dataset_to_policy_features
 from lerobot.common.envs.factory import make_env, make_env_config
 from lerobot.common.envs.utils import preprocess_observation
 from lerobot.common.optim.factory import make_optimizer_and_scheduler
-from lerobot.common.policies.act.modeling_act import ACTTemporalEnsembler
+from lerobot.common.policies.act.modeling_act import ACTPolicy, ACTTemporalEnsembler
 from lerobot.common.policies.factory import (
     get_policy_class,
     make_policy,
@@ -36,6 +37,7 @@ from lerobot.common.policies.factory import (
 )
 from lerobot.common.policies.normalize import Normalize, Unnormalize
 from lerobot.common.policies.pretrained import PreTrainedPolicy
+from lerobot.common.policies.utils import make_dummy_batch
 from lerobot.common.utils.random_utils import seeded_context
 from lerobot.configs.default import DatasetConfig
 from lerobot.configs.train import TrainPipelineConfig
@@ -360,6 +362,19 @@ def test_normalize(insert_temporal_dim):
     unnormalize(output_batch)
 
 
+def test_normalize_uint8_images():
+    input_features = {"observation.image": PolicyFeature(type=FeatureType.VISUAL, shape=(3, 8, 8))}
+    stats = {"observation.image": {"mean": torch.rand(3, 1, 1), "std": torch.rand(3, 1, 1) + 0.1}}
+    image = torch.randint(0, 256, (2, 3, 8, 8), dtype=torch.uint8)
+
+    for norm_mode in [NormalizationMode.MEAN_STD, NormalizationMode.IDENTITY]:
+        normalize = Normalize(input_features, {"VISUAL": norm_mode}, stats=stats)
+        expected = normalize({"observation.image": image.type(torch.float32) / 255})
+        output = normalize({"observation.image": image})
+        assert output["observation.image"].dtype == torch.float32
+        torch.testing.assert_close(output["observation.image"], expected["observation.image"])
+
+
 @pytest.mark.parametrize(
     "ds_repo_id, policy_name, policy_kwargs, file_name_extra",
     [
@@ -483,3 +498,91 @@ def test_act_temporal_ensembler():
         assert torch.all(offline_avg <= einops.reduce(seq_slice, "b s 1 -> b 1", "max"))
         # Selected atol=1e-4 keeping in mind actions in [-1, 1] and excepting 0.01% error.
         torch.testing.assert_close(online_avg, offline_avg, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "policy_name, policy_kwargs",
+    [
+        (
+            "act",
+            {
+                "dim_model": 64,
+                "dim_feedforward": 128,
+                "n_action_steps": 10,
+                "pretrained_backbone_weights": None,
+            },
+        ),
+        ("diffusion", {"down_dims": (32, 64), "horizon": 8, "n_action_steps": 4, "num_inference_steps": 3}),
+        (
+            "tdmpc",
+            {"horizon": 3, "n_gaussian_samples": 32, "n_pi_samples": 8, "n_elites": 4, "cem_iterations": 2},
+        ),
+    ],
+)
+def test_compile_policy(
+    lerobot_dataset_metadata_factory, info_factory, tmp_path, monkeypatch, policy_name, policy_kwargs
+):
+    """Check that compiling a policy leaves its state dict and its actions unchanged."""
+    # Only trace the compiled modules, generating their code takes minutes on CPU
+    monkeypatch.setattr(torch, "compile", partial(torch.compile, backend="eager"))
+    # TD-MPC only supports a camera named "observation.image" for inference
+    camera_features = {
+        "observation.image": {"shape": (84, 84, 3), "names": ["height", "width", "channels"], "info": None}
+    }
+    motor_features = {
+        key: {"dtype": "float32", "shape": (6,), "names": None} for key in ["action", "observation.state"]
+    }
+    info = info_factory(
+        total_episodes=1, total_frames=1, camera_features=camera_features, motor_features=motor_features
+    )
+    ds_meta = lerobot_dataset_metadata_factory(root=tmp_path / "init", info=info)
+
+    policy_cfg = make_policy_config(policy_name, device=DEVICE, **policy_kwargs)
+    policy = make_policy(policy_cfg, ds_meta=ds_meta)
+    compiled_policy = deepcopy(policy)
+    compiled_policy.compile_model()
+    assert compiled_policy.state_dict().keys() == policy.state_dict().keys()
+
+    assert compiled_policy.warmup(batch_size=2) > 0
+    batch = {key: value.uniform_() for key, value in make_dummy_batch(policy_cfg, 2, DEVICE).items()}
+    actions = {}
+    for name, p in [("eager", policy), ("compiled", compiled_policy)]:
+        p.eval()
+        p.reset()
+        with seeded_context(0):
+            actions[name] = torch.stack([p.select_action(dict(batch)) for _ in range(3)])
+    torch.testing.assert_close(actions["compiled"], actions["eager"], rtol=1e-4, atol=1e-4)
+
+    if policy_name == "tdmpc":
+        # The observations it wasn't configured with are rejected rather than silently ignored
+        policy.reset()
+        with pytest.raises(KeyError):
+            policy.select_action({**batch, "observation.unknown": torch.zeros(2, 6, device=DEVICE)})
+
+
+def test_warmup_batch_has_task(monkeypatch):
+    """Check that the warm-up batch has a task for each item only for the policies conditioned on language,
+    such as pi0, while the other policies get their input features only."""
+    policy_cfg = make_policy_config(
+        "act",
+        device=DEVICE,
+        input_features={
+            "observation.state": PolicyFeature(FeatureType.STATE, (2,)),
+            "observation.environment_state": PolicyFeature(FeatureType.ENV, (2,)),
+        },
+        output_features={"action": PolicyFeature(FeatureType.ACTION, (2,))},
+    )
+    policy = ACTPolicy(policy_cfg)
+    batches = []
+    monkeypatch.setattr(policy, "select_action", batches.append)
+    policy.warmup(batch_size=3)
+    assert batches[0].keys() == policy_cfg.input_features.keys()
+    assert batches[0]["observation.state"].shape == (3, 2)
+
+    monkeypatch.setattr(policy, "language_conditioned", True)
+    policy.warmup(batch_size=3)
+    assert batches[1]["task"] == [""] * 3
+
+    batch = make_dummy_batch(policy_cfg, 1, DEVICE, task="Grasp the cube.")
+    policy.warmup(batch=batch)
+    assert batches[2] is batch
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import itertools
+
+import pytest
+import torch
+
+from lerobot.common.datasets.prefetcher import DevicePrefetcher
+from lerobot.common.datasets.utils import cycle
+from tests.utils import require_cuda
+
+
+def make_batches(num_batches: int) -> list[dict]:
+    return [{"index": torch.arange(i * 4, (i + 1) * 4), "task": ["task"] * 4} for i in range(num_batches)]
+
+
+@pytest.mark.parametrize("num_batches", [1, 3])
+def test_device_prefetcher(num_batches):
+    batches = make_batches(10)
+    prefetcher = DevicePrefetcher(batches, torch.device("cpu"), num_batches=num_batches)
+
+    prefetched = list(prefetcher)
+    assert len(prefetched) == len(batches)
+    for batch, expected in zip(prefetched, batches, strict=True):
+        assert torch.equal(batch["index"], expected["index"])
+        assert batch["task"] == expected["task"]
+    assert prefetcher.wait_s >= 0 and prefetcher.copy_s >= 0
+    # The iterator stays exhausted
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+    prefetcher.close()
+
+
+def test_device_prefetcher_error():
+    def batches():
+        yield from make_batches(2)
+        raise ValueError("Corrupted frame")
+
+    prefetcher = DevicePrefetcher(batches(), torch.device("cpu"))
+    assert len(list(itertools.islice(prefetcher, 2))) == 2
+    with pytest.raises(ValueError, match="Corrupted frame"):
+        next(prefetcher)
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+    prefetcher.close()
+
+
+def test_device_prefetcher_close():
+    # The background thread is blocked on a full queue, closing must not wait for room in it
+    prefetcher = DevicePrefetcher(cycle(make_batches(2)), torch.device("cpu"), num_batches=1)
+    next(prefetcher)
+    prefetcher.close()
+    assert not prefetcher._thread.is_alive()
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+
+
+def test_device_prefetcher_invalid_num_batches():
+    with pytest.raises(ValueError):
+        DevicePrefetcher(make_batches(1), torch.device("cpu"), num_batches=0)
+
+
+@require_cuda
+def test_device_prefetcher_cuda():
+    batches = [
+        {key: value.pin_memory() for key, value in b.items() if key != "task"} for b in make_batches(5)
+    ]
+    prefetcher = DevicePrefetcher(batches, torch.device("cuda"))
+
+    for batch, expected in zip(prefetcher, batches, strict=True):
+        assert batch["index"].is_cuda
+        assert torch.equal(batch["index"].cpu(), expected["index"])
+    prefetcher.close()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import shutil
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.common.datasets.push_dataset_to_hub.parallel_conversion import (
+    convert_raw_dataset,
+    convert_raw_episode,
+)
+from lerobot.common.datasets.utils import DEFAULT_FEATURES
+
+h5py = pytest.importorskip("h5py")
+from lerobot.common.datasets.push_dataset_to_hub.aloha_hdf5_format import (  # noqa: E402
+    get_features,
+    iter_raw_episode,
+)
+
+EPISODES_LENGTHS = [12, 7, 9]
+
+
+@pytest.fixture
+def aloha_sim_raw_dir(tmp_path):
+    # "sim" in the name means uncompressed images
+    raw_dir = tmp_path / "aloha_sim_dummy_raw"
+    raw_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for ep_idx, ep_length in enumerate(EPISODES_LENGTHS):
+        with h5py.File(raw_dir / f"episode_{ep_idx}.hdf5", "w") as f:
+            f["/observations/qpos"] = rng.normal(size=(ep_length, 14)).astype(np.float32)
+            f["/action"] = rng.normal(size=(ep_length, 14)).astype(np.float32)
+            f["/observations/images/top"] = rng.integers(0, 256, size=(ep_length, 24, 32, 3), dtype=np.uint8)
+    return raw_dir
+
+
+@pytest.fixture
+def aloha_compressed_raw_dir(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    raw_dir = tmp_path / "aloha_dummy_raw"
+    raw_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for ep_idx, ep_length in enumerate(EPISODES_LENGTHS):
+        images = [np.full((24, 32, 3), 10 * i, dtype=np.uint8) for i in range(ep_length)]
+        buffers = [cv2.imencode(".jpg", img)[1] for img in images]
+        # jpeg buffers are padded to the same length, like on the real robots
+        padded = np.zeros((ep_length, max(len(buf) for buf in buffers)), dtype=np.uint8)
+        for i, buf in enumerate(buffers):
+            padded[i, : len(buf)] = buf
+        with h5py.File(raw_dir / f"episode_{ep_idx}.hdf5", "w") as f:
+            f["/observations/qpos"] = rng.normal(size=(ep_length, 14)).astype(np.float32)
+            f["/action"] = rng.normal(size=(ep_length, 14)).astype(np.float32)
+            f["/observations/images/top"] = padded
+    return raw_dir
+
+
+@pytest.mark.parametrize("num_workers, chunk_size", [(0, 64), (2, 64), (2, 4)])
+def test_convert_raw_dataset(tmp_path, aloha_sim_raw_dir, num_workers, chunk_size):
+    dataset = convert_raw_dataset(
+        aloha_sim_raw_dir,
+        "aloha_hdf5",
+        "dummy/aloha",
+        root=tmp_path / "dataset",
+        video=False,
+        single_task="Dummy task",
+        num_workers=num_workers,
+        chunk_size=chunk_size,
+    )
+
+    assert dataset.meta.total_episodes == len(EPISODES_LENGTHS)
+    assert len(dataset) == sum(EPISODES_LENGTHS)
+    assert [ep["length"] for ep in dataset.meta.episodes.values()] == EPISODES_LENGTHS
+    assert list(dataset.meta.episodes_stats) == [0, 1, 2]
+    assert dataset.meta.stats["observation.images.top"]["mean"].shape == (3, 1, 1)
+
+    with h5py.File(aloha_sim_raw_dir / "episode_1.hdf5", "r") as f:
+        qpos, image = f["/observations/qpos"][3], f["/observations/images/top"][3]
+    item = dataset[EPISODES_LENGTHS[0] + 3]
+    assert item["episode_index"] == 1
+    assert item["frame_index"] == 3
+    assert item["index"] == EPISODES_LENGTHS[0] + 3
+    assert item["task"] == "Dummy task"
+    assert torch.equal(item["observation.state"], torch.from_numpy(qpos))
+    assert torch.equal(
+        (item["observation.images.top"] * 255).round().byte(), torch.from_numpy(image).permute(2, 0, 1)
+    )
+
+
+def test_convert_raw_episode_wrong_length(tmp_path, aloha_sim_raw_dir):
+    features = {**get_features(aloha_sim_raw_dir, video=True), **DEFAULT_FEATURES}
+    data_path = "data/chunk-000/episode_000000.parquet"
+    video_path = "videos/chunk-000/observation.images.top/episode_000000.mp4"
+    with pytest.raises(ValueError, match="has 12 frames instead of 10"):
+        convert_raw_episode(
+            "aloha_hdf5",
+            aloha_sim_raw_dir,
+            0,
+            tmp_path,
+            features,
+            50,
+            data_path,
+            {"observation.images.top": video_path},
+            episode_index=0,
+            episode_length=10,
+            from_index=0,
+            task_index=0,
+            encoding={"vcodec": "libx264"},
+            chunk_size=4,
+        )
+    # The partial files of the episode are removed
+    assert not (tmp_path / data_path).exists()
+    assert not (tmp_path / video_path).exists()
+
+
+def test_iter_raw_episode(aloha_compressed_raw_dir):
+    chunks = list(iter_raw_episode(aloha_compressed_raw_dir, 0, chunk_size=5))
+    assert [len(chunk["action"]) for chunk in chunks] == [5, 5, 2]
+    assert [chunk["next.done"].sum() for chunk in chunks] == [0, 0, 1]
+
+    images = np.concatenate([chunk["observation.images.top"] for chunk in chunks])
+    assert images.shape == (12, 24, 32, 3)
+    expected = np.arange(12)[:, None, None, None] * 10
+    assert np.abs(images.astype(int) - expected).max() <= 2
+
+
+def test_convert_raw_dataset_compressed(tmp_path, aloha_compressed_raw_dir):
+    dataset = convert_raw_dataset(
+        aloha_compressed_raw_dir,
+        "aloha_hdf5",
+        "dummy/aloha",
+        root=tmp_path / "dataset",
+        video=False,
+        single_task="Dummy task",
+        num_workers=0,
+        chunk_size=4,
+    )
+    assert dataset.meta.features["observation.images.top"]["shape"] == (24, 32, 3)
+    assert len(dataset) == sum(EPISODES_LENGTHS)
+    image = dataset[EPISODES_LENGTHS[0] + 5]["observation.images.top"]
+    assert torch.allclose(image, torch.full_like(image, 50 / 255), atol=3 / 255)
+
+
+def test_convert_raw_dataset_episodes(tmp_path, aloha_sim_raw_dir):
+    dataset = convert_raw_dataset(
+        aloha_sim_raw_dir,
+        "aloha_hdf5",
+        "dummy/aloha",
+        root=tmp_path / "dataset",
+        video=False,
+        episodes=[2, 0],
+        single_task="Dummy task",
+        num_workers=0,
+    )
+    assert [ep["length"] for ep in dataset.meta.episodes.values()] == [9, 12]
+    assert dataset.hf_dataset["index"][-1].item() == 20
+
+
+@pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe is required to read the video info")
+def test_convert_raw_dataset_videos(tmp_path, aloha_sim_raw_dir):
+    dataset = convert_raw_dataset(
+        aloha_sim_raw_dir,
+        "aloha_hdf5",
+        "dummy/aloha",
+        root=tmp_path / "dataset",
+        single_task="Dummy task",
+        num_workers=2,
+    )
+    assert dataset.meta.video_keys == ["observation.images.top"]
+    for ep_idx in range(len(EPISODES_LENGTHS)):
+        assert (dataset.root / dataset.meta.get_video_file_path(ep_idx, "observation.images.top")).is_file()
+    assert dataset[len(dataset) - 1]["observation.images.top"].shape == (3, 24, 32)
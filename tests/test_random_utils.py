@@ -28,6 +28,7 @@ from lerobot.common.utils.random_utils import (
     serialize_python_rng_state,
     serialize_rng_state,
     serialize_torch_rng_state,
+    set_rank_seed,
     set_rng_state,
     set_seed,
 )
@@ -109,6 +110,17 @@ def test_set_seed():
     assert val1 == val2
 
 
+def test_set_rank_seed():
+    values = []
+    for rank in [0, 1, 0]:
+        set_seed(1337)
+        set_rank_seed(rank)
+        values.append((random.random(), np.random.rand(), torch.rand(1).item()))
+
+    assert values[0] == values[2]  # reproducible
+    assert all(a != b for a, b in zip(values[0], values[1], strict=True))  # different across ranks
+
+
 def test_seeded_context(fixed_seed):
     val1 = (random.random(), np.random.rand(), torch.rand(1).item())
     with seeded_context(1337):
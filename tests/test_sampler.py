@@ -13,10 +13,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import pytest
+import torch
 from datasets import Dataset
 
 from lerobot.common.datasets.push_dataset_to_hub.utils import calculate_episode_data_index
-from lerobot.common.datasets.sampler import EpisodeAwareSampler
+from lerobot.common.datasets.sampler import (
+    DistributedEpisodeAwareSampler,
+    EpisodeAwareSampler,
+    EpisodeBlockSampler,
+    WeightedDatasetSampler,
+)
 from lerobot.common.datasets.utils import (
     hf_transform_to_torch,
 )
@@ -88,3 +95,107 @@ def test_shuffle():
     assert sampler.indices == [0, 1, 2, 3, 4, 5]
     assert len(sampler) == 6
     assert set(sampler) == {0, 1, 2, 3, 4, 5}
+
+
+def test_distributed_episode_aware_sampler():
+    dataset = Dataset.from_dict(
+        {
+            "timestamp": [0.1 * i for i in range(7)],
+            "index": list(range(7)),
+            "episode_index": [0, 0, 0, 1, 1, 1, 1],
+        },
+    )
+    dataset.set_transform(hf_transform_to_torch)
+    episode_data_index = calculate_episode_data_index(dataset)
+    samplers = [
+        DistributedEpisodeAwareSampler(
+            episode_data_index, num_replicas=3, rank=rank, drop_n_last_frames=1, shuffle=True, seed=1337
+        )
+        for rank in range(3)
+    ]
+    # Frames 2 and 6 are dropped, 5 frames are split between 3 ranks with the first one repeated
+    assert [len(sampler) for sampler in samplers] == [2, 2, 2]
+    shards = [list(sampler) for sampler in samplers]
+    indices = [i for shard in shards for i in shard]
+    assert sorted(set(indices)) == [0, 1, 3, 4, 5]
+    assert len(indices) == 6
+
+    # The shuffling only depends on the seed and the number of iterations, so it is the same on all the ranks
+    sampler_a, sampler_b = (
+        DistributedEpisodeAwareSampler(episode_data_index, num_replicas=1, rank=0, shuffle=True, seed=1337)
+        for _ in range(2)
+    )
+    epochs = [list(sampler_a), list(sampler_a)]
+    assert epochs[0] != epochs[1]
+    assert [list(sampler_b), list(sampler_b)] == epochs
+
+    sampler = DistributedEpisodeAwareSampler(episode_data_index, num_replicas=2, rank=1)
+    assert list(sampler) == [1, 3, 5, 0]
+
+    with pytest.raises(ValueError):
+        DistributedEpisodeAwareSampler(episode_data_index, num_replicas=2, rank=2)
+
+
+def test_episode_block_sampler():
+    dataset = Dataset.from_dict(
+        {
+            "timestamp": [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7],
+            "index": [0, 1, 2, 3, 4, 5, 6],
+            "episode_index": [0, 0, 0, 0, 0, 1, 1],
+        },
+    )
+    dataset.set_transform(hf_transform_to_torch)
+    episode_data_index = calculate_episode_data_index(dataset)
+    sampler = EpisodeBlockSampler(episode_data_index, block_size=2, drop_n_last_frames=0)
+    assert [list(block) for block in sampler.blocks] == [[0, 1], [2, 3], [4], [5, 6]]
+    assert len(sampler) == 7
+    assert list(sampler) == [0, 1, 2, 3, 4, 5, 6]
+
+    sampler = EpisodeBlockSampler(episode_data_index, block_size=2, drop_n_first_frames=1, shuffle=True)
+    assert [list(block) for block in sampler.blocks] == [[1, 2], [3, 4], [6]]
+    indices = list(sampler)
+    assert sorted(indices) == [1, 2, 3, 4, 6]
+    # Without a shuffle buffer, blocks are kept contiguous
+    for block in sampler.blocks:
+        start = indices.index(block[0])
+        assert indices[start : start + len(block)] == list(block)
+
+
+def test_episode_block_sampler_shuffle_buffer():
+    dataset = Dataset.from_dict(
+        {
+            "timestamp": [0.1 * i for i in range(12)],
+            "index": list(range(12)),
+            "episode_index": [0] * 6 + [1] * 6,
+        },
+    )
+    dataset.set_transform(hf_transform_to_torch)
+    episode_data_index = calculate_episode_data_index(dataset)
+    sampler = EpisodeBlockSampler(episode_data_index, block_size=3, shuffle=True, shuffle_buffer_size=6)
+    indices = list(sampler)
+    assert sorted(indices) == list(range(12))
+    # Each window of the shuffle buffer is made of two whole blocks
+    for window_start in [0, 6]:
+        window = sorted(indices[window_start : window_start + 6])
+        assert {tuple(window[:3]), tuple(window[3:])} <= {tuple(block) for block in sampler.blocks}
+
+
+def test_weighted_dataset_sampler():
+    cumulative_frames = [0, 10, 10, 40]
+    generator = torch.Generator().manual_seed(0)
+    sampler = WeightedDatasetSampler(
+        cumulative_frames, weights=[3, 1, 1], num_samples=4000, generator=generator
+    )
+    sampler.chunk_size = 1000
+    indices = torch.tensor(list(sampler))
+    assert len(indices) == len(sampler) == 4000
+    assert indices.min() >= 0 and indices.max() < 40
+    # The empty dataset is never sampled, the first one three times more than the last one
+    first_ratio = (indices < 10).float().mean().item()
+    assert abs(first_ratio - 0.75) < 0.05
+
+    sampler = WeightedDatasetSampler(cumulative_frames)
+    assert len(sampler) == 40
+
+    with pytest.raises(ValueError):
+        WeightedDatasetSampler(cumulative_frames, weights=[1, 1])
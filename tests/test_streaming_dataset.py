@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.common.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.common.datasets.streaming_dataset import (
+    DirectoryFetcher,
+    HTTPFetcher,
+    StreamingFileCache,
+    StreamingLeRobotDataset,
+)
+from lerobot.common.datasets.utils import cycle
+from tests.fixtures.constants import DUMMY_CHW
+
+
+class CountingFetcher(DirectoryFetcher):
+    def __init__(self, source_dir):
+        super().__init__(source_dir)
+        self.fetched = []
+
+    def fetch(self, relpath, dest):
+        self.fetched.append(relpath)
+        super().fetch(relpath, dest)
+
+
+@pytest.fixture
+def source_dataset(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "image": {"dtype": "image", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "source", features=features)
+    for ep_length in [5, 7, 4, 6]:
+        for _ in range(ep_length):
+            dataset.add_frame(
+                {"state": torch.randn(2), "image": np.random.rand(*DUMMY_CHW), "task": "Dummy task"}
+            )
+        dataset.save_episode()
+    return dataset
+
+
+def test_streaming_matches_map_style(tmp_path, source_dataset):
+    delta_timestamps = {"state": [i / source_dataset.fps for i in [-2, -1, 0, 1]]}
+    fetcher = CountingFetcher(source_dataset.root)
+    dataset = StreamingLeRobotDataset(
+        source_dataset.repo_id, root=tmp_path / "stream", delta_timestamps=delta_timestamps, fetcher=fetcher
+    )
+    assert len(dataset) == 22
+    assert not (tmp_path / "stream" / "data").exists()
+
+    expected = LeRobotDataset(
+        source_dataset.repo_id, root=source_dataset.root, delta_timestamps=delta_timestamps
+    )
+    items = list(dataset)
+    assert len(items) == len(expected)
+    for item in items:
+        expected_item = expected[item["index"].item()]
+        assert set(item) == set(expected_item)
+        for key, val in expected_item.items():
+            if isinstance(val, torch.Tensor):
+                assert torch.allclose(item[key], val), key
+            else:
+                assert item[key] == val, key
+
+    # Episode files are fetched once, then read from the cache
+    num_fetched = len(fetcher.fetched)
+    list(dataset)
+    assert len(fetcher.fetched) == num_fetched
+
+
+@pytest.mark.parametrize("shuffle_buffer_size", [0, 8])
+def test_streaming_sharding(tmp_path, source_dataset, shuffle_buffer_size):
+    dataset = StreamingLeRobotDataset(
+        source_dataset.repo_id,
+        root=tmp_path / "stream",
+        fetcher=DirectoryFetcher(source_dataset.root),
+        shuffle=True,
+        shuffle_buffer_size=shuffle_buffer_size,
+    )
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=3, num_workers=2)
+    indices = torch.cat([batch["index"] for batch in dataloader]).tolist()
+    assert sorted(indices) == list(range(22))
+
+    dataset.set_epoch(1)
+    assert torch.cat([batch["index"] for batch in dataloader]).tolist() != indices
+
+
+def test_streaming_episodes_selection(tmp_path, source_dataset):
+    dataset = StreamingLeRobotDataset(
+        source_dataset.repo_id,
+        root=tmp_path / "stream",
+        episodes=[1, 3],
+        fetcher=DirectoryFetcher(source_dataset.root),
+    )
+    assert len(dataset) == 13
+    assert sorted({item["episode_index"].item() for item in dataset}) == [1, 3]
+
+
+def test_http_fetcher(tmp_path, source_dataset):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(source_dataset.root))
+    with ThreadingHTTPServer(("localhost", 0), handler) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            fetcher = HTTPFetcher(f"http://localhost:{server.server_address[1]}/")
+            relpath = str(source_dataset.meta.get_data_file_path(0))
+            fetcher.fetch(relpath, tmp_path / "episode.parquet")
+            assert (tmp_path / "episode.parquet").read_bytes() == (source_dataset.root / relpath).read_bytes()
+            with pytest.raises(FileNotFoundError):
+                fetcher.fetch("data/chunk-000/missing.parquet", tmp_path / "missing.parquet")
+        finally:
+            server.shutdown()
+
+    with pytest.raises(ValueError):
+        HTTPFetcher("file:///etc")
+
+
+def test_file_cache_eviction(tmp_path, source_dataset):
+    fetcher = CountingFetcher(source_dataset.root)
+    relpaths = [str(source_dataset.meta.get_data_file_path(ep_idx)) for ep_idx in range(4)]
+    sizes_mb = [(source_dataset.root / relpath).stat().st_size / 1024**2 for relpath in relpaths]
+    # Room for the files of episodes 0 and 3 only
+    max_size_mb = sizes_mb[0] + sizes_mb[3]
+    cache = StreamingFileCache(tmp_path / "cache", fetcher, max_size_mb=max_size_mb)
+
+    for relpath in relpaths[:3]:
+        cache.get(relpath)
+    # All the files are pinned, nothing can be evicted
+    assert all((tmp_path / "cache" / relpath).is_file() for relpath in relpaths[:3])
+
+    for relpath in relpaths[:3]:
+        cache.release(relpath)
+    cache.get(relpaths[0])
+    cache.get(relpaths[3])
+    assert (tmp_path / "cache" / relpaths[0]).is_file()
+    assert not (tmp_path / "cache" / relpaths[1]).is_file()
+    assert not (tmp_path / "cache" / relpaths[2]).is_file()
+    assert cache.size_mb <= max_size_mb
+
+    with pytest.raises(FileNotFoundError):
+        cache.get("data/chunk-000/missing.parquet")
+
+
+def test_streaming_reshuffled_by_cycle(tmp_path, source_dataset):
+    dataset = StreamingLeRobotDataset(
+        source_dataset.repo_id,
+        root=tmp_path / "stream",
+        fetcher=DirectoryFetcher(source_dataset.root),
+        shuffle=True,
+    )
+    # The workers get a copy of the dataset at each pass, which `cycle` sets to the next epoch
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=22, num_workers=2)
+    dl_iter = cycle(dataloader, set_epoch=dataset.set_epoch)
+    first_pass = torch.cat([next(dl_iter)["index"], next(dl_iter)["index"]]).tolist()
+    second_pass = torch.cat([next(dl_iter)["index"], next(dl_iter)["index"]]).tolist()
+    assert sorted(first_pass) == sorted(second_pass) == list(range(22))
+    assert first_pass != second_pass
+    assert dataset.epoch == 1
+
+
+def test_streaming_drop_n_last_frames(tmp_path, source_dataset):
+    dataset = StreamingLeRobotDataset(
+        source_dataset.repo_id,
+        root=tmp_path / "stream",
+        fetcher=DirectoryFetcher(source_dataset.root),
+        drop_n_last_frames=2,
+    )
+    frame_indices = {}
+    for item in dataset:
+        frame_indices.setdefault(item["episode_index"].item(), []).append(item["frame_index"].item())
+    assert frame_indices == {ep_idx: list(range(length - 2)) for ep_idx, length in enumerate([5, 7, 4, 6])}
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+import torch
+from torch.amp import GradScaler
+
+from lerobot.common.datasets.utils import split_batch
+from lerobot.common.utils.logging_utils import AverageMeter, MetricsTracker
+from lerobot.scripts.train import update_policy
+
+
+class DummyPolicy(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(3, 2)
+
+    def forward(self, batch: dict) -> tuple[torch.Tensor, dict]:
+        loss = (self.linear(batch["observation.state"]) - batch["action"]).pow(2).mean()
+        return loss, {"l2_loss": loss.item(), "num_tasks": len(batch["task"])}
+
+
+def make_batch(batch_size: int = 10) -> dict:
+    generator = torch.Generator().manual_seed(0)
+    return {
+        "observation.state": torch.randn(batch_size, 3, generator=generator),
+        "action": torch.randn(batch_size, 2, generator=generator),
+        "task": [f"task {i}" for i in range(batch_size)],
+    }
+
+
+def test_split_batch():
+    micro_batches = split_batch(make_batch(10), 4)
+    assert [len(mb["task"]) for mb in micro_batches] == [4, 4, 2]
+    assert [len(mb["action"]) for mb in micro_batches] == [4, 4, 2]
+    assert micro_batches[2]["task"] == ["task 8", "task 9"]
+    with pytest.raises(ValueError):
+        split_batch(make_batch(), 0)
+
+
+@pytest.mark.parametrize("use_amp", [False, True])
+def test_update_policy_micro_batches(use_amp):
+    results = []
+    for micro_batch_size in [None, 3]:
+        torch.manual_seed(0)
+        policy = DummyPolicy()
+        optimizer = torch.optim.SGD(policy.parameters(), lr=0.1)
+        lr_scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=1, gamma=0.5)
+        metrics = {key: AverageMeter(key) for key in ["loss", "grad_norm", "lr", "update_s"]}
+        metrics = MetricsTracker(10, 100, 10, metrics)
+
+        metrics, output_dict = update_policy(
+            metrics,
+            policy,
+            make_batch(),
+            optimizer,
+            10.0,
+            GradScaler("cpu", enabled=use_amp),
+            lr_scheduler=lr_scheduler,
+            use_amp=use_amp,
+            micro_batch_size=micro_batch_size,
+        )
+        # The scheduler is stepped once per optimization step, not per micro-batch
+        assert optimizer.param_groups[0]["lr"] == pytest.approx(0.05)
+        results.append((policy.state_dict(), metrics.loss.val, metrics.grad_norm.val, output_dict))
+
+    (state_dict, loss, grad_norm, output_dict), (mb_state_dict, mb_loss, mb_grad_norm, mb_output_dict) = (
+        results
+    )
+    # Accumulating the gradients of the micro-batches is equivalent to using the whole batch
+    tolerance = {"atol": 1e-2, "rtol": 1e-2} if use_amp else {}
+    for key, value in state_dict.items():
+        torch.testing.assert_close(mb_state_dict[key], value, **tolerance)
+    assert mb_loss == pytest.approx(loss, rel=1e-2 if use_amp else 1e-5)
+    assert mb_grad_norm == pytest.approx(grad_norm, rel=1e-2 if use_amp else 1e-5)
+    assert mb_output_dict["l2_loss"] == pytest.approx(output_dict["l2_loss"], rel=1e-2 if use_amp else 1e-5)
+    # Averaged over the micro-batches of 3, 3, 3 and 1 samples, weighted by their size
+    assert mb_output_dict["num_tasks"] == pytest.approx((3 * 3 * 3 + 1 * 1) / 10)
@@ -14,26 +14,39 @@
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import pytest
+import torch
+from safetensors.torch import load_file
+
 from lerobot.common.constants import (
     CHECKPOINTS_DIR,
     LAST_CHECKPOINT_LINK,
     OPTIMIZER_PARAM_GROUPS,
     OPTIMIZER_STATE,
+    PRETRAINED_MODEL_DIR,
     RNG_STATE,
     SCHEDULER_STATE,
     TRAINING_STATE_DIR,
     TRAINING_STEP,
 )
+from lerobot.common.optim.optimizers import AdamConfig
+from lerobot.common.policies.act.configuration_act import ACTConfig
+from lerobot.common.policies.act.modeling_act import ACTPolicy
 from lerobot.common.utils.train_utils import (
+    AsyncCheckpointer,
     get_step_checkpoint_dir,
     get_step_identifier,
     load_training_state,
     load_training_step,
+    prune_checkpoints,
     save_checkpoint,
     save_training_state,
     save_training_step,
     update_last_checkpoint,
 )
+from lerobot.configs.default import DatasetConfig
+from lerobot.configs.train import TrainPipelineConfig
+from lerobot.configs.types import FeatureType, PolicyFeature
 
 
 def test_get_step_identifier():
@@ -95,3 +108,105 @@ def test_save_load_training_state(tmp_path, optimizer, scheduler):
     assert loaded_step == 10
     assert loaded_optimizer is optimizer
     assert loaded_scheduler is scheduler
+
+
+@pytest.mark.parametrize(
+    "keep_last, keep_every, expected_kept",
+    [
+        (None, None, [1, 2, 3, 4, 5, 6]),
+        (2, None, [5, 6]),
+        (2, 3, [3, 5, 6]),
+        (10, 3, [1, 2, 3, 4, 5, 6]),
+    ],
+)
+def test_prune_checkpoints(tmp_path, keep_last, keep_every, expected_kept):
+    for step in range(1, 7):
+        (tmp_path / f"{step:06d}").mkdir()
+    removed = prune_checkpoints(tmp_path, keep_last, keep_every)
+    kept = sorted(int(path.name) for path in tmp_path.iterdir())
+    assert kept == expected_kept
+    assert sorted(int(path.name) for path in removed) == sorted(set(range(1, 7)) - set(expected_kept))
+
+
+def test_prune_checkpoints_keeps_last(tmp_path):
+    for step in range(1, 4):
+        (tmp_path / f"{step:06d}").mkdir()
+    update_last_checkpoint(tmp_path / "000001")
+    prune_checkpoints(tmp_path, keep_last=1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["000001", "000003", LAST_CHECKPOINT_LINK]
+
+
+@pytest.fixture
+def train_setup():
+    policy_cfg = ACTConfig(
+        input_features={
+            "observation.state": PolicyFeature(FeatureType.STATE, (2,)),
+            "observation.environment_state": PolicyFeature(FeatureType.ENV, (2,)),
+        },
+        output_features={"action": PolicyFeature(FeatureType.ACTION, (2,))},
+        dim_model=8,
+        n_heads=2,
+        dim_feedforward=8,
+        chunk_size=4,
+        n_action_steps=4,
+        latent_dim=4,
+        device="cpu",
+    )
+    cfg = TrainPipelineConfig(dataset=DatasetConfig(repo_id="lerobot/test"), policy=policy_cfg)
+    policy = ACTPolicy(policy_cfg)
+    optimizer = AdamConfig().build(policy.parameters())
+    loss = sum(param.sum() for param in policy.parameters())
+    loss.backward()
+    optimizer.step()
+    return cfg, policy, optimizer
+
+
+def test_async_checkpointer(tmp_path, train_setup, scheduler):
+    cfg, policy, optimizer = train_setup
+    sync_dir = tmp_path / "sync" / "000010"
+    save_checkpoint(sync_dir, 10, cfg, policy, optimizer, scheduler)
+
+    checkpoints_dir = tmp_path / "async"
+    checkpointer = AsyncCheckpointer()
+    saved = []
+    checkpointer.save(checkpoints_dir / "000010", 10, cfg, policy, optimizer, scheduler, saved.append)
+    state_dict = {key: value.clone() for key, value in policy.state_dict().items()}
+    # The training goes on while the checkpoint is written
+    with torch.no_grad():
+        for param in policy.parameters():
+            param.add_(1.0)
+    checkpointer.stop()
+
+    async_dir = checkpoints_dir / "000010"
+    assert saved == [async_dir]
+    assert (checkpoints_dir / LAST_CHECKPOINT_LINK).resolve() == async_dir
+    assert sorted(path.name for path in checkpoints_dir.iterdir()) == ["000010", LAST_CHECKPOINT_LINK]
+    async_files = sorted(path.relative_to(async_dir) for path in async_dir.rglob("*"))
+    assert async_files == sorted(path.relative_to(sync_dir) for path in sync_dir.rglob("*"))
+    for name in [OPTIMIZER_STATE, RNG_STATE]:
+        async_state = load_file(async_dir / TRAINING_STATE_DIR / name)
+        sync_state = load_file(sync_dir / TRAINING_STATE_DIR / name)
+        assert async_state.keys() == sync_state.keys()
+        for key in sync_state:
+            torch.testing.assert_close(async_state[key], sync_state[key])
+
+    for name in ["config.json", "train_config.json"]:
+        sync_config = (sync_dir / PRETRAINED_MODEL_DIR / name).read_text()
+        assert (async_dir / PRETRAINED_MODEL_DIR / name).read_text() == sync_config
+
+    loaded_policy = ACTPolicy.from_pretrained(async_dir / PRETRAINED_MODEL_DIR, config=cfg.policy)
+    for key, value in loaded_policy.state_dict().items():
+        torch.testing.assert_close(value, state_dict[key])
+
+
+def test_async_checkpointer_retention(tmp_path, train_setup):
+    cfg, policy, optimizer = train_setup
+    checkpointer = AsyncCheckpointer(keep_last=2, keep_every=2)
+    for step in range(1, 6):
+        checkpointer.save(get_step_checkpoint_dir(tmp_path, 5, step), step, cfg, policy, optimizer)
+    checkpointer.stop()
+
+    checkpoints_dir = tmp_path / CHECKPOINTS_DIR
+    names = sorted(path.name for path in checkpoints_dir.iterdir())
+    assert names == ["000002", "000004", "000005", LAST_CHECKPOINT_LINK]
+    assert (checkpoints_dir / LAST_CHECKPOINT_LINK).resolve() == checkpoints_dir / "000005"
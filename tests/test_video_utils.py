@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+import shutil
+
+import av
+import numpy as np
+import pytest
+import torch
+
+from lerobot.common.datasets.image_writer import IMAGE_FORMATS, write_image
+from lerobot.common.datasets.utils import load_video_index, write_video_index
+from lerobot.common.datasets.video_utils import (
+    VIDEO_BACKENDS,
+    StreamingVideoEncoder,
+    VideoDecoderCache,
+    VideoFrameCache,
+    VideoFrameCacheConfig,
+    decode_video_frames,
+    decode_video_frames_by_spans,
+    decode_video_frames_torchvision,
+    encode_video_frames,
+    get_frames_timestamps,
+    get_video_frames_index,
+)
+
+FPS = 10
+
+
+def write_dummy_video(video_path, num_frames: int = 30, gop_size: int = 2):
+    with av.open(str(video_path), "w") as container:
+        stream = container.add_stream("libx264", rate=FPS)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, "yuv420p"
+        stream.options = {"g": str(gop_size)}
+        for i in range(num_frames):
+            img = np.full((48, 64, 3), i * 8, dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(img, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return video_path
+
+
+@pytest.fixture
+def video_paths(tmp_path):
+    return [write_dummy_video(tmp_path / f"episode_{i}.mp4") for i in range(3)]
+
+
+@pytest.mark.parametrize("backend", ["pyav", "pyav_native"])
+def test_decoder_cache_matches_uncached(video_paths, backend):
+    cache = VideoDecoderCache()
+    tolerance_s = 0.5 / FPS
+    for timestamps in [[1.0, 1.2], [0.3], [2.5, 2.9], [0.0, 0.1], [2.9]]:
+        expected = decode_video_frames(video_paths[0], timestamps, tolerance_s, backend)
+        frames = decode_video_frames(video_paths[0], timestamps, tolerance_s, backend, decoder_cache=cache)
+        assert torch.equal(frames, expected)
+    assert len(cache) == 1
+
+
+def test_pyav_native_backend(video_paths):
+    tolerance_s = 0.5 / FPS
+    for timestamps in [[1.0, 1.2], [0.3], [0.5, 2.0], [0.0, 0.1], [2.9]]:
+        expected = decode_video_frames_torchvision(video_paths[0], timestamps, tolerance_s, "pyav")
+        frames = decode_video_frames(video_paths[0], timestamps, tolerance_s, "pyav_native")
+        assert torch.equal(frames, expected)
+
+        frames = decode_video_frames(
+            video_paths[0], timestamps, tolerance_s, "pyav_native", return_uint8=True
+        )
+        assert frames.dtype == torch.uint8
+        assert torch.equal(frames.type(torch.float32) / 255, expected)
+
+
+def test_pyav_native_backend_stops_after_span(video_paths):
+    class CountingReader:
+        def __init__(self, reader):
+            self.reader = reader
+            self.num_decoded = 0
+
+        def __getattr__(self, name):
+            return getattr(self.reader, name)
+
+        def decode(self, *args, **kwargs):
+            for frame in self.reader.decode(*args, **kwargs):
+                self.num_decoded += 1
+                yield frame
+
+    backend = VIDEO_BACKENDS["pyav_native"]
+    reader = CountingReader(backend.open(str(video_paths[0])))
+    try:
+        # The last timestamp falls between two frames, none of which is within the tolerance
+        frames, loaded_ts = backend.load_frames(reader, [1.0, 1.25], tolerance_s=0.02)
+    finally:
+        backend.close(reader.reader)
+    assert loaded_ts == pytest.approx([1.0])
+    assert len(frames) == 1
+    # The decoding stops at the first frame after the span rather than at the end of the video (30 frames)
+    assert reader.num_decoded < 10
+
+
+def test_unknown_backend(video_paths):
+    assert {"pyav", "video_reader", "pyav_native"} <= set(VIDEO_BACKENDS)
+    with pytest.raises(ValueError):
+        decode_video_frames(video_paths[0], [0.0], 0.05, "unknown")
+
+
+def test_decoder_cache_lru_eviction(video_paths):
+    cache = VideoDecoderCache(max_open_readers=2)
+    reader_0 = cache.get(video_paths[0])
+    cache.get(video_paths[1])
+    assert cache.get(video_paths[0]) is reader_0
+
+    cache.get(video_paths[2])
+    assert len(cache) == 2
+    assert (str(video_paths[0]), "pyav") in cache
+    assert (str(video_paths[1]), "pyav") not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_decoder_cache_pickle_drops_readers(video_paths):
+    cache = VideoDecoderCache(max_open_readers=4)
+    cache.get(video_paths[0])
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert len(unpickled) == 0
+    assert unpickled.max_open_readers == 4
+
+
+def test_decoder_cache_invalid_size():
+    with pytest.raises(ValueError):
+        VideoDecoderCache(max_open_readers=0)
+
+
+def test_decode_video_frames_by_spans(video_paths):
+    tolerance_s = 0.5 / FPS
+    timestamps = [1.2, 0.3, 1.0, 1.1, 0.3, 2.9, 1.0]
+    frames = decode_video_frames_by_spans(
+        video_paths[0], timestamps, tolerance_s, decoder_cache=VideoDecoderCache()
+    )
+    assert frames.shape == (len(timestamps), 3, 48, 64)
+    for ts, frame in zip(timestamps, frames, strict=True):
+        expected = decode_video_frames_torchvision(video_paths[0], [ts], tolerance_s)
+        assert torch.equal(frame, expected[0])
+
+
+def test_video_frames_index(tmp_path):
+    video_path = write_dummy_video(tmp_path / "episode_0.mp4", gop_size=5)
+    frames_index = get_video_frames_index(video_path)
+    assert frames_index["keyframes"] == [0, 5, 10, 15, 20, 25]
+    np.testing.assert_allclose(get_frames_timestamps(frames_index), np.arange(30) / FPS)
+
+    write_video_index(0, "cam", frames_index, tmp_path)
+    write_video_index(1, "cam", frames_index, tmp_path)
+    video_index = load_video_index(tmp_path)
+    assert set(video_index) == {0, 1}
+    assert video_index[1]["cam"]["pts"].tolist() == frames_index["pts"]
+
+
+@pytest.mark.parametrize("backend", ["pyav", "pyav_native"])
+def test_decode_with_frames_index(tmp_path, backend):
+    video_path = write_dummy_video(tmp_path / "episode_0.mp4", gop_size=5)
+    frames_index = get_video_frames_index(video_path)
+    tolerance_s = 0.5 / FPS
+    for timestamps in [[1.0, 1.2], [0.3, 2.9], [0.0, 0.4, 0.5, 2.1], [2.9]]:
+        expected = decode_video_frames(video_path, timestamps, tolerance_s, backend)
+        frames = decode_video_frames(video_path, timestamps, tolerance_s, backend, frames_index=frames_index)
+        assert torch.equal(frames, expected)
+
+    timestamps = [2.9, 0.3, 1.2, 0.3]
+    frames = decode_video_frames_by_spans(
+        video_path, timestamps, tolerance_s, backend, frames_index=frames_index
+    )
+    assert torch.equal(frames, decode_video_frames(video_path, timestamps, tolerance_s, backend))
+
+
+def test_frames_index_tolerance_violation(tmp_path):
+    video_path = write_dummy_video(tmp_path / "episode_0.mp4")
+    frames_index = get_video_frames_index(video_path)
+    with pytest.raises(AssertionError):
+        decode_video_frames(video_path, [3.5], 0.5 / FPS, frames_index=frames_index)
+
+
+def test_streaming_video_encoder(tmp_path):
+    encoder = StreamingVideoEncoder(FPS, vcodec="libx264", max_queue_size=4)
+    images = [np.full((3, 48, 64), i * 8, dtype=np.uint8) for i in range(20)]
+    for episode_index in range(2):
+        encoder.start(tmp_path / f"episode_{episode_index}.mp4")
+        for image in images:
+            encoder.add_frame(image)
+        video_path = encoder.finish()
+
+    frames_index = get_video_frames_index(video_path)
+    np.testing.assert_allclose(get_frames_timestamps(frames_index), np.arange(20) / FPS)
+    frames = decode_video_frames(video_path, [0.0, 1.9], 0.5 / FPS, return_uint8=True)
+    for frame, image in zip(frames, [images[0], images[-1]], strict=True):
+        assert np.abs(frame.numpy().astype(int) - image).max() <= 2
+
+    pixels = np.stack(images).astype(np.float64) / 255
+    np.testing.assert_allclose(encoder.stats["mean"], pixels.mean(axis=(0, 2, 3), keepdims=True)[0])
+    assert encoder.stats["count"].tolist() == [20]
+
+    encoder.start(tmp_path / "cancelled.mp4")
+    encoder.add_frame(images[0])
+    encoder.cancel()
+    assert not (tmp_path / "cancelled.mp4").exists()
+
+
+FRAME_SHAPE = (3, 4, 4)
+
+
+def make_frames(frame_indices, ep_idx=0):
+    return torch.stack([torch.full(FRAME_SHAPE, 10 * ep_idx + i, dtype=torch.uint8) for i in frame_indices])
+
+
+@pytest.mark.parametrize("eviction", ["lru", "fifo"])
+def test_frame_cache_ram_eviction(tmp_path, eviction):
+    ram_size_mb = 2 * np.prod(FRAME_SHAPE) / 1024**2
+    config = VideoFrameCacheConfig(enable=True, ram_size_mb=ram_size_mb, eviction=eviction, use_disk=False)
+    cache = VideoFrameCache(config, tmp_path, {"cam": FRAME_SHAPE}, {0: 10})
+
+    cache.put("cam", 0, np.array([0, 1]), make_frames([0, 1]))
+    frames, found = cache.get("cam", 0, np.array([0, 1, 2]))
+    assert found.tolist() == [True, True, False]
+    assert torch.equal(frames[:2], make_frames([0, 1]))
+
+    # Frame 0 is both the least recently used and the first inserted
+    cache.get("cam", 0, np.array([1]))
+    cache.put("cam", 0, np.array([2]), make_frames([2]))
+    _, found = cache.get("cam", 0, np.array([0, 1, 2]))
+    assert found.tolist() == [False, True, True]
+
+    # Frame 2 is now the least recently used, while frame 1 is still the first inserted
+    cache.get("cam", 0, np.array([1]))
+    cache.put("cam", 0, np.array([3]), make_frames([3]))
+    _, found = cache.get("cam", 0, np.array([1, 2, 3]))
+    assert found.tolist() == ([True, False, True] if eviction == "lru" else [False, True, True])
+
+
+def test_frame_cache_disk(tmp_path):
+    config = VideoFrameCacheConfig(
+        enable=True, ram_size_mb=0, disk_size_mb=15 * np.prod(FRAME_SHAPE) / 1024**2
+    )
+    episode_lengths = {0: 10, 1: 5, 2: 5}
+    cache = VideoFrameCache(config, tmp_path, {"cam": FRAME_SHAPE}, episode_lengths)
+    cache.put("cam", 0, np.array([3, 7]), make_frames([3, 7]))
+    cache.put("cam", 1, np.array([4]), make_frames([4], ep_idx=1))
+    # Episode 2 doesn't fit in the disk budget
+    cache.put("cam", 2, np.array([0]), make_frames([0], ep_idx=2))
+    assert not (tmp_path / "cam" / "episode_000002.npy").exists()
+
+    assert cache.__getstate__()["_memmaps"] == {}
+
+    # Frames persist across instances
+    cache = VideoFrameCache(config, tmp_path, {"cam": FRAME_SHAPE}, episode_lengths)
+    frames, found = cache.get("cam", 0, np.array([7, 3, 4]))
+    assert found.tolist() == [True, True, False]
+    assert torch.equal(frames[:2], make_frames([7, 3]))
+    frames, found = cache.get("cam", 1, np.array([4]))
+    assert found.all() and torch.equal(frames, make_frames([4], ep_idx=1))
+    _, found = cache.get("cam", 2, np.array([0]))
+    assert not found.any()
+
+
+def test_frame_cache_disk_shape_changed(tmp_path):
+    config = VideoFrameCacheConfig(enable=True, ram_size_mb=0)
+    cache = VideoFrameCache(config, tmp_path, {"cam": FRAME_SHAPE}, {0: 10})
+    cache.put("cam", 0, np.array([3]), make_frames([3]))
+
+    # The episode was re-recorded with fewer frames: its stale frames are discarded
+    cache = VideoFrameCache(config, tmp_path, {"cam": FRAME_SHAPE}, {0: 5})
+    _, found = cache.get("cam", 0, np.array([3]))
+    assert not found.any()
+    cache.put("cam", 0, np.array([4]), make_frames([4]))
+    frames, found = cache.get("cam", 0, np.array([4]))
+    assert found.all() and torch.equal(frames, make_frames([4]))
+
+
+def test_frame_cache_invalid_eviction():
+    with pytest.raises(ValueError):
+        VideoFrameCacheConfig(eviction="random")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is required to encode the frames")
+@pytest.mark.parametrize("image_format", ["png", "npy", "webp"])
+def test_encode_video_frames_formats(tmp_path, image_format):
+    images = [np.full((48, 64, 3), i * 8, dtype=np.uint8) for i in range(10)]
+    for i, image in enumerate(images):
+        write_image(image, tmp_path / f"frame_{i:06d}{IMAGE_FORMATS[image_format]}", image_format)
+    video_path = tmp_path / "episode_0.mp4"
+    encode_video_frames(tmp_path, video_path, FPS, vcodec="libx264")
+
+    frames = decode_video_frames(video_path, [0.0, 0.9], 0.5 / FPS, return_uint8=True)
+    for frame, image in zip(frames, [images[0], images[-1]], strict=True):
+        assert np.abs(frame.numpy().transpose(1, 2, 0).astype(int) - image).max() <= 2